@@ -1,5 +1,12 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+try:
+    import orjson
+    from flask_orjson import OrjsonProvider
+except ImportError: # Sin orjson se usa el json de la stdlib en modo compacto
+    orjson = None
+    OrjsonProvider = None
 # from flask_socketio import SocketIO # Para WebSockets (pip install Flask-SocketIO)
 # from flask_cors import CORS # Para permitir peticiones desde React en desarrollo (pip install Flask-Cors)
 import sys
@@ -8,8 +15,27 @@ sys.path.append('..')
 from bot import main as bot_main # Para acceder a 'current_position', etc. (Necesita refactorizar estado)
 from bot import kraken_api
 from bot.utils import logger
+from api.models import encode_trades
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """Provider JSON de la stdlib sin indentación ni ordenación de claves."""
+    compact = True   # separators=(',', ':')
+    sort_keys = False
 
 app = Flask(__name__)
+# Sin pretty-print ni ordenación de claves: el dashboard React no envía 'X-Requested-With'
+app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
+app.config['JSON_SORT_KEYS'] = False
+
+if OrjsonProvider is not None:
+    # Serialización JSON con orjson (mucho más rápido que json de la stdlib).
+    # OPT_SERIALIZE_NUMPY permite devolver escalares/arrays numpy (balances, backtests) sin callbacks default()
+    app.json_provider_class = OrjsonProvider
+    app.json = OrjsonProvider(app)
+    app.json.option = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+else:
+    app.json_provider_class = CompactJSONProvider
+    app.json = CompactJSONProvider(app)
 # CORS(app) # Habilitar CORS si frontend está en dominio/puerto diferente
 # socketio = SocketIO(app, cors_allowed_origins="*") # Configurar SocketIO
 
@@ -55,6 +81,10 @@ def get_closed_trades():
         {'pair': 'XBT/USD', 'direction': 'LONG', 'size': 0.01, 'entry_price': 39500, 'exit_price': 39700, 'pnl': 2.0, 'reason': 'Take Profit 1', 'time': '2024-04-10 10:30:00'},
         {'pair': 'XBT/USD', 'direction': 'SHORT', 'size': 0.01, 'entry_price': 39800, 'exit_price': 39850, 'pnl': -0.5, 'reason': 'Stop Loss', 'time': '2024-04-10 14:15:00'}
     ]
+    # Con msgspec se construye la respuesta a mano: sin validación pydantic ni capa JSON de Flask
+    body = encode_trades(simulated_trades)
+    if body is not None:
+        return Response(body, mimetype='application/json')
     return jsonify(simulated_trades)
 
 # --- Endpoints de Control (Ejemplo - ¡Requieren Lógica Segura!) ---
@@ -113,6 +143,8 @@ def stop_trade():
         return jsonify({"error": "Error interno al cerrar la posición"}), 500
 
 # --- Ejecución de la API Flask ---
+# En producción: gunicorn -k gthread --workers 1 --threads 16 --bind 0.0.0.0:5000 api.app:app
+# (servidor de desarrollo de Flask sólo para pruebas locales)
 if __name__ == '__main__':
     logger.info("Iniciando API Flask para Dashboard...")
     # Usar socketio.run(app) si se usa SocketIO
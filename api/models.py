@@ -1,27 +1,55 @@
+from typing import List, Optional
+
+try:
+    import msgspec # Structs validados/serializados en C: mucho más rápidos que pydantic en listas
+except ImportError:
+    msgspec = None
 from pydantic import BaseModel
-from typing import Optional
 
-class Trade(BaseModel):
-    pair: str
-    direction: str
-    size: float
-    entry_price: float
-    exit_price: float
-    pnl: float
-    reason: str
-    time: str
+if msgspec is not None:
+    class Trade(msgspec.Struct):
+        pair: str
+        direction: str
+        size: float
+        entry_price: float
+        exit_price: float
+        pnl: float
+        reason: str
+        time: str
 
-class Position(BaseModel):
-    pair: str
-    direction: str
-    size: float
-    entry_price: float
-    sl: float
-    tp1: float
-    tp2: Optional[float] = None
-    current_price: float
-    pnl: float
-    pnl_pct: float
+    class Position(msgspec.Struct, kw_only=True):
+        pair: str
+        direction: str
+        size: float
+        entry_price: float
+        sl: float
+        tp1: float
+        tp2: Optional[float] = None
+        current_price: float
+        pnl: float
+        pnl_pct: float
+else:
+    class Trade(BaseModel):
+        pair: str
+        direction: str
+        size: float
+        entry_price: float
+        exit_price: float
+        pnl: float
+        reason: str
+        time: str
+
+    class Position(BaseModel):
+        pair: str
+        direction: str
+        size: float
+        entry_price: float
+        sl: float
+        tp1: float
+        tp2: Optional[float] = None
+        current_price: float
+        pnl: float
+        pnl_pct: float
 
 class OrderParams(BaseModel):
     pair: str
@@ -33,4 +61,13 @@ class OrderParams(BaseModel):
 class OrderResult(BaseModel):
     status: str
     txid: Optional[str] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+
+def encode_trades(rows) -> Optional[bytes]:
+    """
+    Valida y serializa una lista de trades (dicts) directamente a bytes JSON con msgspec.
+    Retorna None si msgspec no está instalado (el llamador usa jsonify).
+    """
+    if msgspec is None:
+        return None
+    return msgspec.json.encode(msgspec.convert(rows, List[Trade]))
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+Decorador `njit` de Numba con alternativa en Python puro.
+Si Numba no está instalado, las funciones decoradas se ejecutan como Python normal.
+"""
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        # Soporta tanto @njit como @njit(cache=True, ...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -1,19 +1,111 @@
 # -*- coding: utf-8 -*-
+import numpy as np
 import pandas as pd
-from bot import kraken_api, indicators, strategies, risk_manager, config
+from bot import ohlc_cache, indicators, strategies, risk_manager, config
 from bot.utils import logger
+from bot._njit import njit, NUMBA_AVAILABLE
 import matplotlib.pyplot as plt
 
+# Tamaño de bloque para buscar la vela de salida: acota el trabajo a ~la duración del trade
+_EXIT_SCAN_BLOCK = 256
+
+# Campos del registro de trades (array estructurado preasignado, un trade por fila)
+_TRADE_FIELDS = [
+    ('direction', 'U5'), ('size', np.float64),
+    ('entry_price', np.float64), ('exit_price', np.float64),
+    ('pnl', np.float64), ('reason', 'U16'), ('capital_after', np.float64),
+]
+
+# Motivos de salida indexados por el código que retorna _scan_exit
+_EXIT_REASONS = ("Stop Loss", "Take Profit 1", "Take Profit 2")
+
+@njit(cache=True)
+def _scan_exit(highs, lows, start, sl, tp1, tp2, has_tp2):
+    """
+    Kernel compilado: recorre las velas desde start hasta la primera que toca SL o TP.
+    Retorna (índice, código) con código 0=SL, 1=TP1, 2=TP2, o (-1, -1) si no hay salida.
+    """
+    tp_level = min(tp1, tp2) if has_tp2 else tp1
+    for j in range(start, highs.shape[0]):
+        # Misma prioridad que la simulación vela a vela: SL > TP2 > TP1
+        if lows[j] <= sl:
+            return j, 0
+        if highs[j] >= tp_level:
+            if has_tp2 and highs[j] >= tp2:
+                return j, 2
+            return j, 1
+    return -1, -1
+
+def _find_exit(position, highs, lows, start, partial_tp):
+    """
+    Busca la primera vela >= start en la que la posición toca SL o TP.
+    Con Numba recorre las velas en el kernel _scan_exit; sin Numba usa máximos/mínimos
+    acumulados (monótonos) + np.searchsorted por bloques, sin ramas Python por vela.
+    Retorna (índice, precio_salida, motivo) o (None, None, None) si no hay salida.
+    """
+    if position['direction'] != 'LONG':
+        return None, None, None # SHORT: lógica de salida pendiente (placeholder)
+
+    sl = position['sl']
+    tp1 = position['tp1']
+    tp2 = position['tp2'] if partial_tp else None
+    tp_level = min(tp1, tp2) if tp2 else tp1
+
+    if NUMBA_AVAILABLE:
+        # Niveles en el dtype de las velas: mismas comparaciones que la versión NumPy
+        cast = lows.dtype.type
+        j, code = _scan_exit(highs, lows, start, cast(sl), cast(tp1), cast(tp2 or tp1), bool(tp2))
+        if j < 0:
+            return None, None, None
+        return j, (sl, tp1, tp2)[code], _EXIT_REASONS[code]
+
+    n = len(highs)
+    for block_start in range(start, n, _EXIT_SCAN_BLOCK):
+        block_end = min(block_start + _EXIT_SCAN_BLOCK, n)
+        running_low = np.minimum.accumulate(lows[block_start:block_end])
+        running_high = np.maximum.accumulate(highs[block_start:block_end])
+        # -running_low y running_high son no decrecientes -> búsqueda binaria
+        k = min(np.searchsorted(-running_low, -sl, side='left'),
+                np.searchsorted(running_high, tp_level, side='left'))
+        if k < block_end - block_start:
+            j = block_start + k
+            # Misma prioridad que la simulación vela a vela: SL > TP2 > TP1
+            if lows[j] <= sl:
+                return j, sl, "Stop Loss"
+            if tp2 and highs[j] >= tp2:
+                return j, tp2, "Take Profit 2"
+            return j, tp1, "Take Profit 1"
+    return None, None, None
+
+def compute_metrics(pnls: np.ndarray, initial_capital=10000.0, periods_per_year=252) -> dict:
+    """
+    Métricas del backtest sólo con reducciones NumPy sobre el array de PnL por trade.
+    Retorna {'net_pnl', 'win_rate', 'max_drawdown', 'sharpe'}.
+    """
+    pnls = np.asarray(pnls, dtype=np.float64)
+    if pnls.size == 0:
+        return {'net_pnl': 0.0, 'win_rate': 0.0, 'max_drawdown': 0.0, 'sharpe': 0.0}
+
+    equity = initial_capital + np.cumsum(pnls)
+    drawdown = equity - np.maximum.accumulate(np.maximum(equity, initial_capital))
+    std = pnls.std()
+    return {
+        'net_pnl': float(pnls.sum()),
+        'win_rate': float((pnls > 0).mean() * 100),
+        'max_drawdown': float(drawdown.min()),
+        'sharpe': float(pnls.mean() / std * np.sqrt(periods_per_year)) if std > 0 else 0.0,
+    }
+
 def run_backtest(pair, interval, start_date, end_date):
     """
     Ejecuta una simulación de backtesting básica.
     ¡Placeholder! Necesita desarrollo completo del motor, métricas y visualización.
     """
-    logger.info(f"Iniciando backtest para {pair} ({interval} min) desde {start_date} hasta {end_date}")
+    logger.info("Iniciando backtest para %s (%s min) desde %s hasta %s", pair, interval, start_date, end_date)
 
     # 1. Obtener Datos Históricos (¡Necesita manejar paginación!)
     # Asumimos que obtenemos un DataFrame 'df_history' completo para el rango
-    df_history, _ = kraken_api.get_historical_data(pair, interval) # Simplificado
+    df_history, _ = ohlc_cache.get_history(pair, interval) # Reutiliza la caché local
     if df_history is None or df_history.empty:
         logger.error("No se pudieron obtener datos históricos para el backtest.")
         return None
@@ -28,103 +120,119 @@ def run_backtest(pair, interval, start_date, end_date):
         return None
 
     # 3. Simular Trades (Iterar sobre velas)
-    trades = []
-    capital = 10000 # Capital inicial simulado
+    initial_capital = 10000.0 # Capital inicial simulado (float64 aunque el OHLC sea float32)
+    capital = initial_capital
     position = None # {'direction', 'entry_price', 'size', 'sl', 'tp1', 'tp2'}
 
     logger.info("Iniciando simulación de trades...")
-    for i in range(1, len(df_history)): # Empezar desde la segunda vela para tener datos previos
-        current_candle = df_history.iloc[i]
-        previous_candles = df_history.iloc[:i+1] # DataFrame hasta la vela actual
+    # Columnas OHLC como arrays numpy contiguos: evita df.iloc[i] (Series nueva) en cada vela
+    opens = df_history['open'].to_numpy()
+    highs = df_history['high'].to_numpy()
+    lows = df_history['low'].to_numpy()
+    times = df_history.index.to_numpy()
+    n_candles = len(df_history)
+    # Las estrategias sólo leen las últimas velas: ventana acotada en vez del prefijo creciente
+    signal_window = strategies.required_candles()
+    # Máximos/mínimos/volumen medio del lookback de rotura precalculados una vez (O(N))
+    breakout = strategies.breakout_levels(highs, lows, df_history['volume'].to_numpy())
+    # Criterios de reversión y rotura evaluados de una vez para todas las velas (columnas NumPy)
+    reversal_scores, reversal_flags = strategies.check_reversal_signal_vectorized(df_history)
+    breakout_scored = strategies.check_breakout_signal_vectorized(df_history, breakout)
+    # Índices i cuya vela i-1 puede dar señal VERDE: el resto de velas sin posición se saltan
+    entry_candidates = np.flatnonzero(strategies.green_candidates((reversal_scores, reversal_flags), breakout_scored)[:-1]) + 1
+    # Constantes y funciones del bucle en variables locales (LOAD_FAST en vez de LOAD_ATTR por vela)
+    partial_tp = config.ENABLE_PARTIAL_TP
+    signal_green = strategies.SIGNAL_GREEN
+    check_reversal_signal = strategies.check_reversal_signal
+    check_breakout_signal = strategies.check_breakout_signal
+    position_size = risk_manager.position_size
+    # Cada trade ocupa al menos una vela: n_candles es cota superior del número de trades
+    trades = np.empty(n_candles, dtype=[('entry_time', times.dtype), ('exit_time', times.dtype)] + _TRADE_FIELDS)
+    trade_count = 0
 
+    i = 1 # Empezar desde la segunda vela para tener datos previos
+    while i < n_candles:
         # Lógica de Salida (SL/TP) - ¡Muy Simplificada!
         if position:
-            pnl_ratio = 0
-            if position['direction'] == 'LONG':
-                if current_candle['low'] <= position['sl']:
-                    exit_price = position['sl']
-                    reason = "Stop Loss"
-                elif config.ENABLE_PARTIAL_TP and position['tp2'] and current_candle['high'] >= position['tp2']:
-                     # Lógica parcial TP2 (compleja, omitida por ahora)
-                     exit_price = position['tp2']
-                     reason = "Take Profit 2"
-                elif current_candle['high'] >= position['tp1']:
-                    # Lógica parcial TP1 o salida completa
-                    exit_price = position['tp1']
-                    reason = "Take Profit 1"
-                else: # No se alcanzó salida
-                    exit_price = None
-            else: # SHORT (Lógica inversa)
-                 exit_price = None # Placeholder
-
-            if exit_price:
-                 # Registrar trade cerrado
-                 pnl = (exit_price - position['entry_price']) * position['size'] if position['direction'] == 'LONG' else (position['entry_price'] - exit_price) * position['size']
-                 capital += pnl
-                 trades.append({
-                     'entry_time': position['entry_time'], 'exit_time': current_candle.name,
-                     'direction': position['direction'], 'size': position['size'],
-                     'entry_price': position['entry_price'], 'exit_price': exit_price,
-                     'pnl': pnl, 'reason': reason, 'capital_after': capital
-                 })
-                 logger.debug(f"Trade cerrado: {reason} @ {exit_price:.2f}, PnL={pnl:.2f}, Capital={capital:.2f}")
-                 position = None
+            # Saltar directamente a la primera vela que toca SL o TP (sin iterar vela a vela)
+            exit_idx, exit_price, reason = _find_exit(position, highs, lows, i, partial_tp)
+            if exit_idx is None:
+                break # La posición sigue abierta hasta el final de los datos
+            i = exit_idx
 
+            # Registrar trade cerrado
+            pnl = (exit_price - position['entry_price']) * position['size'] if position['direction'] == 'LONG' else (position['entry_price'] - exit_price) * position['size']
+            capital += pnl
+            trades[trade_count] = (
+                position['entry_time'], times[i],
+                position['direction'], position['size'],
+                position['entry_price'], exit_price,
+                pnl, reason, capital
+            )
+            trade_count += 1
+            logger.debug("Trade cerrado: %s @ %.2f, PnL=%.2f, Capital=%.2f", reason, exit_price, pnl, capital)
+            position = None
 
         # Lógica de Entrada (Si no hay posición abierta)
-        if not position:
-            # Pasar el DataFrame hasta la vela *anterior* a las funciones de señal
-            df_for_signal = df_history.iloc[:i] # Hasta i-1
-
-            signal_status_rev, signal_details_rev = strategies.check_reversal_signal(df_for_signal)
-            signal_status_brk, signal_details_brk = strategies.check_breakout_signal(df_for_signal)
-
-            signal_to_use = None
-            if signal_status_rev == strategies.SIGNAL_GREEN:
-                signal_to_use = signal_details_rev
-                logger.info(f"Backtest: Señal {signal_to_use['strategy']} {signal_to_use['direction']} detectada en {current_candle.name}")
-            elif signal_status_brk == strategies.SIGNAL_GREEN:
-                 signal_to_use = signal_details_brk
-                 logger.info(f"Backtest: Señal {signal_to_use['strategy']} {signal_to_use['direction']} detectada en {current_candle.name}")
-
-            if signal_to_use:
-                # Calcular tamaño
-                size = risk_manager.calculate_position_size(
-                    entry_price=current_candle['open'], # Entrar en apertura siguiente vela
-                    stop_loss_price=signal_to_use['stop_loss'],
-                    capital=capital
-                )
-
-                if size > 0:
-                    # Abrir posición simulada
-                    position = {
-                        'direction': signal_to_use['direction'],
-                        'entry_price': current_candle['open'], # Entrar en apertura siguiente vela
-                        'entry_time': current_candle.name,
-                        'size': size,
-                        'sl': signal_to_use['stop_loss'],
-                        'tp1': signal_to_use['take_profit_1'],
-                        'tp2': signal_to_use.get('take_profit_2', None),
-                        'strategy': signal_to_use['strategy']
-                    }
-                    logger.debug(f"Backtest: Abriendo posición {position['direction']} {position['size']} {pair} @ {position['entry_price']:.2f}")
+        # Saltar a la siguiente vela candidata (las demás no pueden abrir posición)
+        k = np.searchsorted(entry_candidates, i)
+        if k == len(entry_candidates):
+            break
+        i = int(entry_candidates[k])
+
+        # Pasar las últimas velas hasta la *anterior* a las funciones de señal
+        df_for_signal = df_history.iloc[max(0, i - signal_window):i] # Hasta i-1
+
+        signal_status_rev, signal_details_rev = check_reversal_signal(
+            df_for_signal, (reversal_scores[i - 1], reversal_flags[i - 1])) # Criterios de la vela i-1
+        levels = {name: values[i - 1] for name, values in breakout.items()} # Niveles de la vela i-1
+        signal_status_brk, signal_details_brk = check_breakout_signal(df_for_signal, levels)
+
+        signal_to_use = None
+        if signal_status_rev == signal_green:
+            signal_to_use = signal_details_rev
+            logger.info("Backtest: Señal %s %s detectada en %s", signal_to_use['strategy'], signal_to_use['direction'], times[i])
+        elif signal_status_brk == signal_green:
+             signal_to_use = signal_details_brk
+             logger.info("Backtest: Señal %s %s detectada en %s", signal_to_use['strategy'], signal_to_use['direction'], times[i])
+
+        if signal_to_use:
+            # Calcular tamaño (kernel numérico, sin validaciones ni logs por señal)
+            size = position_size(float(opens[i]), signal_to_use['stop_loss'], capital) # Entrar en apertura siguiente vela
+
+            if size > 0:
+                # Abrir posición simulada
+                position = {
+                    'direction': signal_to_use['direction'],
+                    'entry_price': float(opens[i]), # Entrar en apertura siguiente vela
+                    'entry_time': times[i],
+                    'size': size,
+                    'sl': signal_to_use['stop_loss'],
+                    'tp1': signal_to_use['take_profit_1'],
+                    'tp2': signal_to_use.get('take_profit_2', None),
+                    'strategy': signal_to_use['strategy']
+                }
+                logger.debug("Backtest: Abriendo posición %s %s %s @ %.2f", position['direction'], position['size'], pair, position['entry_price'])
+        i += 1
 
 
     # 4. Calcular Métricas y Generar Reporte/Visualización
-    logger.info(f"Simulación completada. Total trades: {len(trades)}")
-    if not trades:
+    logger.info("Simulación completada. Total trades: %d", trade_count)
+    if not trade_count:
         logger.warning("No se generaron trades en el backtest.")
         return None
 
-    results_df = pd.DataFrame(trades)
+    trades = trades[:trade_count]
+    results_df = pd.DataFrame({name: trades[name] for name in trades.dtype.names})
     results_df.set_index('exit_time', inplace=True)
 
-    # --- Cálculo de Métricas (Implementación Necesaria) ---
-    net_pnl = results_df['pnl'].sum()
-    win_rate = (results_df['pnl'] > 0).mean() * 100
-    # Drawdown, Sharpe, etc.
+    # --- Cálculo de Métricas ---
+    # Sobre el array float64 contiguo, sin pasar por la columna del DataFrame
+    metrics = compute_metrics(np.ascontiguousarray(trades['pnl']), initial_capital)
+    results_df.attrs['metrics'] = metrics
 
-    logger.info(f"Resultado Backtest: PnL Neto={net_pnl:.2f}, Win Rate={win_rate:.2f}%")
+    logger.info("Resultado Backtest: PnL Neto=%.2f, Win Rate=%.2f%%, Max Drawdown=%.2f, Sharpe=%.2f",
+                metrics['net_pnl'], metrics['win_rate'], metrics['max_drawdown'], metrics['sharpe'])
 
     # --- Visualización (Implementación Necesaria) ---
     plt.figure(figsize=(12, 6))
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Velas con indicadores en estructura de arrays (SoA) para el ciclo en vivo.
+Las funciones de señal sólo leen colas de unas pocas columnas: en lugar de un DataFrame
+(BlockManager, tipos mezclados) se guarda una fila float64 contigua por columna en un
+buffer circular que crece vela a vela sin copiar el historial.
+"""
+import numpy as np
+import pandas as pd
+
+class Candles:
+    """
+    Buffer circular SoA de capacidad fija. Cada valor se escribe dos veces (posiciones k y
+    k + capacity): las últimas n velas (n <= capacity) son siempre un slice contiguo de cada
+    columna, sin np.roll ni copias.
+    """
+    __slots__ = ('columns', 'index', 'capacity', 'data', 'times', 'index_name', 'count', 'last_time')
+
+    def __init__(self, columns, capacity, time_dtype='datetime64[ns]', index_name=None):
+        self.columns = tuple(columns)
+        self.index = {name: k for k, name in enumerate(self.columns)} # columna -> fila de data
+        self.capacity = capacity
+        self.data = np.full((len(self.columns), 2 * capacity), np.nan)
+        self.times = np.zeros(2 * capacity, dtype=time_dtype) # Instante de cada vela, mismo esquema doble
+        self.index_name = index_name
+        self.count = 0 # Velas escritas desde el inicio (la última está en (count - 1) % capacity)
+        self.last_time = None
+
+    @classmethod
+    def from_frame(cls, df, capacity=None):
+        """Candles con las columnas numéricas de df (las últimas `capacity` velas, por defecto todas)."""
+        numeric = df.select_dtypes('number')
+        times = np.asarray(df.index)
+        candles = cls(numeric.columns, capacity or max(len(df), 1), times.dtype, df.index.name)
+        values = numeric.to_numpy(np.float64)[-candles.capacity:].T
+        times = times[-candles.capacity:]
+        n = values.shape[1]
+        candles.data[:, :n] = values
+        candles.data[:, candles.capacity:candles.capacity + n] = values
+        candles.times[:n] = times
+        candles.times[candles.capacity:candles.capacity + n] = times
+        candles.count = n
+        candles.last_time = df.index[-1] if n else None
+        return candles
+
+    def _write(self, slot, values, time=None):
+        self.data[:, slot] = values
+        self.data[:, slot + self.capacity] = values
+        if time is not None:
+            self.times[slot] = self.times[slot + self.capacity] = time
+
+    def append(self, values, time=None):
+        """Añade una vela (valores en el orden de columns)."""
+        self._write(self.count % self.capacity, values, time)
+        self.count += 1
+        self.last_time = time
+
+    def replace_last(self, values):
+        """Sustituye la última vela (vela aún abierta que el exchange actualiza)."""
+        self._write((self.count - 1) % self.capacity, values)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def _end(self):
+        return (self.count - 1) % self.capacity + 1 + self.capacity
+
+    def tail(self, n):
+        """Vista (columnas x velas) de las últimas n velas."""
+        n = min(n, len(self))
+        end = self._end()
+        return self.data[:, end - n:end]
+
+    def tail_block(self, columns, n):
+        """Últimas n velas de 'columns' como ndarray float64 (filas = velas), como strategies._tail_block."""
+        return self.tail(n)[[self.index[name] for name in columns]].T
+
+    def column(self, name):
+        """Vista de una columna en orden cronológico."""
+        return self.tail(len(self))[self.index[name]]
+
+    def to_frame(self, n=None):
+        """
+        DataFrame (copia) de las últimas n velas, por defecto todas, indexado por tiempo.
+        Todas las columnas son float64: sólo para consumidores que necesitan un DataFrame.
+        """
+        n = len(self) if n is None else min(n, len(self))
+        end = self._end()
+        index = pd.Index(self.times[end - n:end], name=self.index_name)
+        return pd.DataFrame(self.tail(n).T.copy(), index=index, columns=list(self.columns))
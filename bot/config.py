@@ -10,6 +10,7 @@ load_dotenv()
 # ¡¡NUNCA codificar las claves directamente aquí!! Leer desde el entorno.
 KRAKEN_API_KEY = os.getenv("KRAKEN_API_KEY")
 KRAKEN_API_SECRET = os.getenv("KRAKEN_API_SECRET")
+KRAKEN_TIER = os.getenv("KRAKEN_TIER", "starter") # Nivel de cuenta: 'starter', 'intermediate' o 'pro'
 
 # --- Parámetros de Trading ---
 TRADING_PAIR = "XBT/USD"  # Par a operar (ejemplo, debe ser formato Kraken)
@@ -36,6 +37,11 @@ BREAKOUT_LOOKBACK_PERIOD = 20 # Velas para identificar consolidación/rango
 BREAKOUT_VOLUME_MA_PERIOD = 20
 BREAKOUT_VOLUME_FACTOR = 1.5 # Volumen de ruptura debe ser > 1.5x el promedio
 
+# Puntuación ponderada (bot/scoring.py)
+RSI_WEIGHT = 0.3
+MACD_WEIGHT = 0.3
+GPT_SENTIMENT_WEIGHT = 0.4
+
 # --- Gestión de Riesgo ---
 USE_TRAILING_STOP = False
 TRAILING_STOP_TYPE = 'ATR' # 'PERCENT' o 'ATR'
@@ -50,6 +56,20 @@ MOVE_TO_BE_THRESHOLD = 0.6 # Mover SL a BE cuando se alcanza el 60% del camino a
 LOG_LEVEL = "INFO"        # Nivel de logging: DEBUG, INFO, WARNING, ERROR
 MAX_API_RETRIES = 5       # Máximos reintentos para llamadas API fallidas
 API_RETRY_DELAY = 2       # Delay inicial en segundos para reintentos
+API_RETRY_MAX_DELAY = 30  # Tope (s) del backoff con jitter
+CIRCUIT_BREAKER_THRESHOLD = 3  # Fallos consecutivos que abren el circuit breaker
+CIRCUIT_BREAKER_COOLDOWN = 60  # Segundos que el circuito permanece abierto
+OHLC_DTYPE = "float32"    # Precisión de las columnas OHLC descargadas (float32 basta para indicadores)
+OHLC_CACHE_DIR = os.path.join("data", "ohlc") # Caché Parquet del historial OHLC por par/intervalo
+OHLC_CACHE_MAX_ROWS = 5000 # Velas máximas conservadas por par/intervalo
+KRAKEN_IO_WORKERS = 4      # Hilos para solapar llamadas de red a Kraken
+KRAKEN_POOL_CONNECTIONS = 4 # Pools de conexiones HTTPS reutilizables
+KRAKEN_POOL_MAXSIZE = 20    # Conexiones keep-alive máximas por pool
+KRAKEN_ACCEPT_GZIP = True   # False: pedir respuestas sin gzip (menos CPU, más bytes por la red)
+RATE_LIMIT_COOLDOWN = 5.0 # Pausa (s) tras un error de rate limit de Kraken
+BALANCE_CACHE_TTL = 1.0   # Segundos que se reutiliza el balance antes de volver a consultar Kraken
+TICKER_CACHE_TTL = 0.3    # Segundos que se reutiliza el ticker de cada par
+TICKER_BATCH_WINDOW = 0.05 # Ventana (s) para agrupar peticiones de ticker en una sola llamada
 
 # Validar que las claves API están presentes
 if not KRAKEN_API_KEY or not KRAKEN_API_SECRET:
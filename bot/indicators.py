@@ -1,48 +1,209 @@
 # bot/indicators.py
 
+import hashlib
+import numpy as np
 import pandas as pd
-import ta
-from typing import Dict
-import pandas as pd
+from collections import OrderedDict
+from bot import config
+from bot._njit import njit
+
+# Caché LRU de resultados de add_indicators (clave: contenido OHLCV + periodos de config)
+_INDICATOR_CACHE_SIZE = 32
+_indicator_cache = OrderedDict()
+
+def _df_signature(df: pd.DataFrame):
+    """
+    Firma del DataFrame: longitud, extremos del índice, periodos actuales de config
+    (kernel_params) y un digest de todas las velas OHLCV. El digest recorre los bytes
+    de las velas una vez, mucho menos que el kernel más la copia del resultado; así dos
+    ventanas que sólo difieren en velas intermedias, o un cambio de periodo, no colisionan.
+    """
+    if df.empty:
+        return None
+    values = np.ascontiguousarray(df[['open', 'high', 'low', 'close', 'volume']].to_numpy())
+    digest = hashlib.blake2b(values, digest_size=16).digest()
+    return (len(df), df.index[0], df.index[-1], kernel_params(), values.dtype.str, digest)
+
+@njit(cache=True, fastmath=True)
+def _compute_indicators(close, high, low, volume, rsi_n, macd_fast, macd_slow, macd_sign,
+                        stoch_n, stoch_smooth, ema_short, ema_long, ema_fast,
+                        sma_slow, sma_trend, vol_ma):
+    """
+    Kernel fusionado: calcula RSI (Wilder), MACD, Estocástico, EMAs, SMAs de cierre y
+    media de volumen en una sola pasada sobre los arrays. Mismas definiciones (y NaN
+    iniciales) que la librería `ta` / pandas rolling.
+    Acepta float32 o float64: acumula en float64 y devuelve arrays del dtype de entrada.
+    """
+    n = close.shape[0]
+    rsi = np.full(n, np.nan, close.dtype)
+    macd = np.full(n, np.nan, close.dtype)
+    macd_signal = np.full(n, np.nan, close.dtype)
+    stoch_k = np.full(n, np.nan, close.dtype)
+    stoch_d = np.full(n, np.nan, close.dtype)
+    ema_s = np.empty(n, close.dtype)
+    ema_l = np.empty(n, close.dtype)
+    ema_f = np.empty(n, close.dtype)
+    sma_sl = np.full(n, np.nan, close.dtype)
+    sma_tr = np.full(n, np.nan, close.dtype)
+    vol_m = np.full(n, np.nan, close.dtype)
+
+    a_rsi = 1.0 / rsi_n
+    a_fast = 2.0 / (macd_fast + 1.0)
+    a_slow = 2.0 / (macd_slow + 1.0)
+    a_sign = 2.0 / (macd_sign + 1.0)
+    a_s = 2.0 / (ema_short + 1.0)
+    a_l = 2.0 / (ema_long + 1.0)
+    a_f = 2.0 / (ema_fast + 1.0)
+
+    up_avg = 0.0
+    dn_avg = 0.0
+    e_fast = 0.0
+    e_slow = 0.0
+    e_sign = 0.0
+    e_s = 0.0
+    e_l = 0.0
+    e_f = 0.0
+    slow_sum = 0.0
+    trend_sum = 0.0
+    vol_sum = 0.0
+    for i in range(n):
+        c = close[i]
+        if i == 0:
+            e_fast = c
+            e_slow = c
+            e_s = c
+            e_l = c
+            e_f = c
+        else:
+            diff = c - close[i - 1]
+            up = diff if diff > 0.0 else 0.0
+            dn = -diff if diff < 0.0 else 0.0
+            up_avg = (1.0 - a_rsi) * up_avg + a_rsi * up
+            dn_avg = (1.0 - a_rsi) * dn_avg + a_rsi * dn
+            e_fast = (1.0 - a_fast) * e_fast + a_fast * c
+            e_slow = (1.0 - a_slow) * e_slow + a_slow * c
+            e_s = (1.0 - a_s) * e_s + a_s * c
+            e_l = (1.0 - a_l) * e_l + a_l * c
+            e_f = (1.0 - a_f) * e_f + a_f * c
+        ema_s[i] = e_s
+        ema_l[i] = e_l
+        ema_f[i] = e_f
+
+        # SMAs de cierre y media de volumen con sumas móviles
+        slow_sum += c
+        trend_sum += c
+        vol_sum += volume[i]
+        if i >= sma_slow:
+            slow_sum -= close[i - sma_slow]
+        if i >= sma_trend:
+            trend_sum -= close[i - sma_trend]
+        if i >= vol_ma:
+            vol_sum -= volume[i - vol_ma]
+        if i >= sma_slow - 1:
+            sma_sl[i] = slow_sum / sma_slow
+        if i >= sma_trend - 1:
+            sma_tr[i] = trend_sum / sma_trend
+        if i >= vol_ma - 1:
+            vol_m[i] = vol_sum / vol_ma
+
+        # RSI válido desde la vela rsi_n-1 (min_periods de `ta`)
+        if i >= rsi_n - 1:
+            rsi[i] = 100.0 if dn_avg == 0.0 else 100.0 - 100.0 / (1.0 + up_avg / dn_avg)
+
+        # MACD: la línea de señal arranca en la primera vela con MACD válido
+        if i >= macd_slow - 1:
+            m = e_fast - e_slow
+            macd[i] = m
+            e_sign = m if i == macd_slow - 1 else (1.0 - a_sign) * e_sign + a_sign * m
+            if i >= macd_slow + macd_sign - 2:
+                macd_signal[i] = e_sign
 
+        # Estocástico %K (ventana stoch_n) y %D (media móvil de %K)
+        if i >= stoch_n - 1:
+            lo = low[i]
+            hi = high[i]
+            for j in range(i - stoch_n + 1, i):
+                if low[j] < lo:
+                    lo = low[j]
+                if high[j] > hi:
+                    hi = high[j]
+            # Ventana plana (hi == lo, habitual en velas de 1m tranquilas): %K indefinido
+            stoch_k[i] = 100.0 * (c - lo) / (hi - lo) if hi != lo else np.nan
+            if i >= stoch_n + stoch_smooth - 2:
+                # Suma directa de las últimas stoch_smooth velas (no acumulada): un NaN sólo
+                # afecta a las %D cuya ventana lo contiene
+                k_sum = 0.0
+                for j in range(i - stoch_smooth + 1, i + 1):
+                    k_sum += stoch_k[j]
+                stoch_d[i] = k_sum / stoch_smooth
+
+    return rsi, macd, macd_signal, stoch_k, stoch_d, ema_s, ema_l, ema_f, sma_sl, sma_tr, vol_m
+
+
+def kernel_params():
+    """Periodos de _compute_indicators (en su orden, tras los arrays de entrada)."""
+    return (config.RSI_PERIOD, 12, 26, 9, config.STOCH_K, config.STOCH_D, 50, 200,
+            config.EMA_FAST_PERIOD, config.SMA_SLOW_PERIOD, config.SMA_TREND_PERIOD,
+            config.REVERSAL_VOLUME_MA_PERIOD)
+
+def indicator_columns(rsi, macd, macd_signal, stoch_k, stoch_d, ema_50, ema_200,
+                      ema_fast, sma_slow, sma_trend, volume_ma):
+    """
+    Columnas que añade add_indicators a partir de las salidas del kernel (arrays o
+    escalares de una sola vela). Las columnas de las estrategias reutilizan los mismos valores.
+    """
+    return {
+        'rsi': rsi,
+        'macd': macd, 'macd_signal': macd_signal, 'macd_diff': macd - macd_signal,
+        'stoch_k': stoch_k, 'stoch_d': stoch_d,
+        'ema_50': ema_50, 'ema_200': ema_200,
+        'RSI': rsi, 'STOCHk': stoch_k, 'STOCHd': stoch_d, 'MACD': macd,
+        'EMA_fast': ema_fast, 'SMA_slow': sma_slow, 'SMA_trend': sma_trend, 'Volume_MA': volume_ma,
+    }
 
 def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """
     Añade indicadores técnicos al DataFrame de precios.
     Espera columnas: ['open', 'high', 'low', 'close', 'volume'].
     Devuelve copia con columnas añadidas:
-      - rsi (14)
+      - rsi (RSI_PERIOD)
       - macd, macd_signal, macd_diff
-      - stoch_k, stoch_d (14)
+      - stoch_k, stoch_d (STOCH_K, STOCH_D)
       - ema_50, ema_200
+    y las columnas que usan las estrategias, compartiendo los mismos arrays:
+      - RSI, STOCHk, STOCHd, MACD
+      - EMA_fast, SMA_slow, SMA_trend, Volume_MA
     """
-    df = df.copy()
-
     # Asegurar las columnas necesarias
     required = ['open', 'high', 'low', 'close', 'volume']
     for col in required:
         if col not in df.columns:
             raise ValueError(f"DataFrame debe contener columna '{col}'")
 
-    # RSI
-    df['rsi'] = ta.momentum.RSIIndicator(close=df['close'], window=14).rsi()
-
-    # MACD
-    macd = ta.trend.MACD(close=df['close'], window_slow=26, window_fast=12, window_sign=9)
-    df['macd'] = macd.macd()
-    df['macd_signal'] = macd.macd_signal()
-    df['macd_diff'] = macd.macd_diff()
-
-    # Estocástico
-    stoch = ta.momentum.StochasticOscillator(
-        high=df['high'], low=df['low'], close=df['close'], window=14, smooth_window=3
-    )
-    df['stoch_k'] = stoch.stoch()
-    df['stoch_d'] = stoch.stoch_signal()
-
-    # EMAs
-    df['ema_50'] = df['close'].ewm(span=50, adjust=False).mean()
-    df['ema_200'] = df['close'].ewm(span=200, adjust=False).mean()
+    # Reutilizar el cálculo si ya se procesaron exactamente estas velas
+    key = _df_signature(df)
+    cached = _indicator_cache.get(key)
+    if cached is not None:
+        _indicator_cache.move_to_end(key)
+        return cached.copy()
+
+    df = df.copy()
+
+    # Todos los indicadores en una sola pasada (kernel Numba)
+    # Se conserva float32 si los precios vienen así (mitad de ancho de banda de memoria)
+    dtype = np.float32 if df['close'].dtype == np.float32 else np.float64
+    close = df['close'].to_numpy(dtype=dtype)
+    high = df['high'].to_numpy(dtype=dtype)
+    low = df['low'].to_numpy(dtype=dtype)
+    volume = df['volume'].to_numpy(dtype=dtype)
+    outputs = _compute_indicators(close, high, low, volume, *kernel_params())
+    for col, values in indicator_columns(*outputs).items():
+        df[col] = values
+
+    if key is not None:
+        _indicator_cache[key] = df.copy()
+        if len(_indicator_cache) > _INDICATOR_CACHE_SIZE:
+            _indicator_cache.popitem(last=False)
 
     return df
 
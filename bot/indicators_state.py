@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Indicadores incrementales para el bot en vivo.
+En cada ciclo sólo cambia la última vela: en lugar de recalcular toda la ventana con
+add_indicators, se guarda por par el estado de las recurrencias (EMAs, medias de
+Wilder, sumas móviles de SMA, ventanas del estocástico) y se actualiza en O(1) por vela.
+Mismas fórmulas que indicators._compute_indicators.
+"""
+import math
+from collections import deque
+from bot import config, indicators
+from bot.candles import Candles
+from bot.utils import logger
+
+_states = {} # pair -> {'state', 'committed', 'candles'}
+
+class IndicatorState:
+    """
+    Estado de las recurrencias de un par: escalares en __slots__ (sin dict por vela) y
+    ventanas deque acotadas para SMA, volumen y estocástico.
+    """
+    __slots__ = ('n', 'time', 'prev_close', 'periods', 'alphas', 'up_avg', 'dn_avg',
+                 'e_fast', 'e_slow', 'e_sign', 'e_s', 'e_l', 'e_f',
+                 'highs', 'lows', 'ks', 'slow_closes', 'trend_closes', 'volumes',
+                 'slow_sum', 'trend_sum', 'vol_sum')
+
+    def __init__(self):
+        """Estado vacío con los periodos actuales de config."""
+        (rsi_n, macd_fast, macd_slow, macd_sign, stoch_n, stoch_smooth,
+         ema_short, ema_long, ema_fast, sma_slow, sma_trend, vol_ma) = indicators.kernel_params()
+        self.n = 0
+        self.time = None
+        self.prev_close = 0.0
+        self.periods = (rsi_n, macd_slow, macd_sign, stoch_n, stoch_smooth, sma_slow, sma_trend, vol_ma)
+        self.alphas = (1.0 / rsi_n, 2.0 / (macd_fast + 1.0), 2.0 / (macd_slow + 1.0), 2.0 / (macd_sign + 1.0),
+                       2.0 / (ema_short + 1.0), 2.0 / (ema_long + 1.0), 2.0 / (ema_fast + 1.0))
+        self.up_avg = self.dn_avg = 0.0
+        self.e_fast = self.e_slow = self.e_sign = self.e_s = self.e_l = self.e_f = 0.0
+        self.highs = deque(maxlen=stoch_n)
+        self.lows = deque(maxlen=stoch_n)
+        self.ks = deque(maxlen=stoch_smooth)
+        self.slow_closes = deque(maxlen=sma_slow)
+        self.trend_closes = deque(maxlen=sma_trend)
+        self.volumes = deque(maxlen=vol_ma)
+        self.slow_sum = self.trend_sum = self.vol_sum = 0.0
+
+    def copy(self):
+        """Copia para deshacer la vela abierta: escalares tal cual, deques copiadas (más barato que deepcopy)."""
+        other = IndicatorState.__new__(IndicatorState)
+        for name in self.__slots__:
+            value = getattr(self, name)
+            setattr(other, name, value.copy() if isinstance(value, deque) else value)
+        return other
+
+def new_state():
+    """Estado vacío de las recurrencias con los periodos actuales de config."""
+    return IndicatorState()
+
+def _step(st, close, high, low, volume):
+    """Aplica una vela al estado y retorna las salidas del kernel para esa vela."""
+    rsi_n, macd_slow, macd_sign, stoch_n, stoch_smooth, sma_slow, sma_trend, vol_ma = st.periods
+    a_rsi, a_fast, a_slow, a_sign, a_s, a_l, a_f = st.alphas
+    i = st.n
+    nan = math.nan
+
+    if i == 0:
+        st.e_fast = st.e_slow = st.e_s = st.e_l = st.e_f = close
+    else:
+        diff = close - st.prev_close
+        up = diff if diff > 0.0 else 0.0
+        dn = -diff if diff < 0.0 else 0.0
+        st.up_avg = (1.0 - a_rsi) * st.up_avg + a_rsi * up
+        st.dn_avg = (1.0 - a_rsi) * st.dn_avg + a_rsi * dn
+        st.e_fast = (1.0 - a_fast) * st.e_fast + a_fast * close
+        st.e_slow = (1.0 - a_slow) * st.e_slow + a_slow * close
+        st.e_s = (1.0 - a_s) * st.e_s + a_s * close
+        st.e_l = (1.0 - a_l) * st.e_l + a_l * close
+        st.e_f = (1.0 - a_f) * st.e_f + a_f * close
+
+    rsi = nan
+    if i >= rsi_n - 1:
+        rsi = 100.0 if st.dn_avg == 0.0 else 100.0 - 100.0 / (1.0 + st.up_avg / st.dn_avg)
+
+    macd = macd_signal = nan
+    if i >= macd_slow - 1:
+        macd = st.e_fast - st.e_slow
+        st.e_sign = macd if i == macd_slow - 1 else (1.0 - a_sign) * st.e_sign + a_sign * macd
+        if i >= macd_slow + macd_sign - 2:
+            macd_signal = st.e_sign
+
+    st.highs.append(high)
+    st.lows.append(low)
+    stoch_k = stoch_d = nan
+    if i >= stoch_n - 1:
+        lo = min(st.lows)
+        hi = max(st.highs)
+        stoch_k = 100.0 * (close - lo) / (hi - lo) if hi != lo else nan
+        st.ks.append(stoch_k)
+        if i >= stoch_n + stoch_smooth - 2:
+            stoch_d = sum(st.ks) / stoch_smooth
+
+    # Sumas móviles: restar el valor que sale de la ventana (deque llena) antes de añadir
+    if len(st.slow_closes) == sma_slow:
+        st.slow_sum -= st.slow_closes[0]
+    st.slow_closes.append(close)
+    st.slow_sum += close
+    if len(st.trend_closes) == sma_trend:
+        st.trend_sum -= st.trend_closes[0]
+    st.trend_closes.append(close)
+    st.trend_sum += close
+    if len(st.volumes) == vol_ma:
+        st.vol_sum -= st.volumes[0]
+    st.volumes.append(volume)
+    st.vol_sum += volume
+    sma_sl = st.slow_sum / sma_slow if i >= sma_slow - 1 else nan
+    sma_tr = st.trend_sum / sma_trend if i >= sma_trend - 1 else nan
+    vol_m = st.vol_sum / vol_ma if i >= vol_ma - 1 else nan
+
+    st.prev_close = close
+    st.n = i + 1
+    return rsi, macd, macd_signal, stoch_k, stoch_d, st.e_s, st.e_l, st.e_f, sma_sl, sma_tr, vol_m
+
+def add_indicators_incremental(entry, time, row):
+    """
+    Actualiza el estado con una vela y retorna sus columnas de indicadores (dict).
+    Si la vela tiene el mismo timestamp que la anterior (vela aún abierta que Kraken
+    actualiza), se recalcula desde el estado previo a esa vela.
+    """
+    if entry['state'].time == time:
+        entry['state'] = entry['committed'].copy()
+    else:
+        entry['committed'] = entry['state'].copy()
+    outputs = _step(entry['state'], float(row['close']), float(row['high']),
+                    float(row['low']), float(row['volume']))
+    entry['state'].time = time
+    return indicators.indicator_columns(*outputs)
+
+def _seed(df):
+    """Arranque en frío: pasada vectorizada completa + estado reconstruido sobre la ventana."""
+    frame = indicators.add_indicators(df)
+    state = new_state()
+    committed = state
+    columns = [df[col].to_numpy(dtype=float) for col in ('close', 'high', 'low', 'volume')]
+    for close, high, low, volume in zip(*columns):
+        committed = state.copy() if state.n == len(df) - 1 else committed
+        _step(state, close, high, low, volume)
+    state.time = df.index[-1]
+    # Buffer del tamaño máximo del historial cacheado: la ventana que crece vela a vela cabe sin resembrar
+    capacity = max(config.OHLC_CACHE_MAX_ROWS, len(df))
+    return {'state': state, 'committed': committed, 'candles': Candles.from_frame(frame, capacity)}
+
+def _push_candle(candles, time, values):
+    """Añade la vela a candles, o sustituye la última si es la misma vela abierta."""
+    row = [values.get(name, math.nan) for name in candles.columns]
+    if candles.last_time == time:
+        candles.replace_last(row)
+    else:
+        candles.append(row, time)
+
+def candles(pair):
+    """Velas con indicadores del par como Candles (SoA) para las funciones de señal; None sin estado."""
+    entry = _states.get(pair)
+    return entry['candles'] if entry is not None else None
+
+def frame(pair, n=None):
+    """Últimas n velas con indicadores del par como DataFrame (se construye en cada llamada); None sin estado."""
+    entry = _states.get(pair)
+    return entry['candles'].to_frame(n) if entry is not None else None
+
+def update_indicators(pair, df):
+    """
+    Equivalente incremental de indicators.add_indicators(df) para el ciclo en vivo:
+    sólo procesa las velas de df posteriores (o igual) a la última ya vista y las escribe
+    en el buffer Candles del par, sin copiar la ventana. Retorna ese Candles; frame(pair)
+    da el DataFrame a quien lo necesite.
+    """
+    entry = _states.get(pair)
+    if entry is None or df.empty or df.index[-1] < entry['state'].time or df.index[0] > entry['state'].time:
+        # Primer ciclo, datos reiniciados o hueco respecto a la última vela vista: recalcular todo
+        entry = _seed(df)
+        _states[pair] = entry
+        return entry['candles']
+
+    new_rows = df.loc[df.index >= entry['state'].time]
+    for time, row in new_rows.iterrows():
+        values = {**row.to_dict(), **add_indicators_incremental(entry, time, row)}
+        _push_candle(entry['candles'], time, values)
+    logger.debug("Indicadores incrementales: %d vela(s) procesada(s) para %s", len(new_rows), pair)
+    return entry['candles']
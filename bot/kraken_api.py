@@ -1,14 +1,69 @@
 # -*- coding: utf-8 -*-
 import krakenex
 from pykrakenapi import KrakenAPI # Otra opción popular
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
 from bot import config
-from bot.utils import logger, exponential_backoff_retry
+from bot.utils import logger, retry
+from bot.ratelimit import TokenBucket
+import numpy as np
 import pandas as pd
+import socket
+import logging
+import ssl
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import orjson
+except ImportError: # Sin orjson krakenex usa el json de la stdlib
+    orjson = None
 
 # --- Inicialización del Cliente API ---
-# Usando krakenex
-k_conn = krakenex.API(config.KRAKEN_API_KEY, config.KRAKEN_API_SECRET)
+class _TLSAdapter(HTTPAdapter):
+    """
+    HTTPAdapter con pool de conexiones y contexto TLS explícito (SNI + verificación).
+    Activa TCP keep-alive para que la conexión sobreviva entre ciclos de un minuto
+    (NAT/firewalls cortan antes las conexiones TCP inactivas).
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['ssl_context'] = ssl.create_default_context()
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        return super().init_poolmanager(*args, **kwargs)
+
+def _configure_session(session):
+    """
+    Reutiliza conexiones HTTPS con Kraken (keep-alive) en lugar de negociar TLS en cada
+    llamada. Sin reintentos a nivel HTTP: los reintentos los gestiona el bot.
+    """
+    adapter = _TLSAdapter(pool_connections=config.KRAKEN_POOL_CONNECTIONS,
+                          pool_maxsize=config.KRAKEN_POOL_MAXSIZE, max_retries=0)
+    session.mount('https://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    if not config.KRAKEN_ACCEPT_GZIP:
+        # Respuestas sin comprimir: los bytes van directos a orjson sin pasar por zlib
+        session.headers.update({'Accept-Encoding': 'identity'})
+    return session
+
+class _OrjsonKrakenAPI(krakenex.API):
+    """krakenex.API que decodifica las respuestas con orjson (respuestas OHLC de varios MB)."""
+    def _query(self, urlpath, data, headers=None, timeout=None):
+        url = self.uri + urlpath
+        # Desde 2024-01-31 los endpoints públicos solo aceptan GET (igual que krakenex)
+        if '/public/' in urlpath:
+            self.response = self.session.get(url, params=data or {}, headers=headers or {}, timeout=timeout)
+        else:
+            self.response = self.session.post(url, data=data or {}, headers=headers or {}, timeout=timeout)
+
+        if self.response.status_code not in (200, 201, 202):
+            self.response.raise_for_status()
+
+        return orjson.loads(self.response.content)
+
+# Usando krakenex (con orjson si está instalado)
+_KrakenAPI = _OrjsonKrakenAPI if orjson is not None else krakenex.API
+k_conn = _KrakenAPI(config.KRAKEN_API_KEY, config.KRAKEN_API_SECRET)
+_configure_session(k_conn.session)
 
 # O usando pykrakenapi (puede requerir instalación: pip install pykrakenapi)
 # api = KrakenAPI(k_conn)
@@ -16,89 +71,344 @@ k_conn = krakenex.API(config.KRAKEN_API_KEY, config.KRAKEN_API_SECRET)
 # Nota: La elección de la librería depende de las preferencias y funcionalidades.
 # krakenex es más ligero, pykrakenapi ofrece DataFrames directamente.
 
+# --- Limitación de llamadas en cliente ---
+# Todas las llamadas pasan por un token bucket que reproduce el contador de Kraken,
+# así el bot no llega a provocar bloqueos por 'Rate limit exceeded'.
+_rate_limiter = TokenBucket.for_tier(config.KRAKEN_TIER)
+_ENDPOINT_COST = {'TradesHistory': 2, 'Ledgers': 2, 'QueryLedgers': 2,
+                  'AddOrder': 0, 'CancelOrder': 0} # Las órdenes no cuentan en el contador REST
+_RATE_LIMIT_ERRORS = ('EAPI:Rate limit exceeded', 'EGeneral:Too many requests')
+
+def _throttled_query(query, method, data=None):
+    _rate_limiter.acquire(_ENDPOINT_COST.get(method, 1))
+    response = query(method, data)
+    if any(err in _RATE_LIMIT_ERRORS for err in response.get('error', [])):
+        logger.warning("Rate limit de Kraken en '%s'. Pausando llamadas %ss.", method, config.RATE_LIMIT_COOLDOWN)
+        _rate_limiter.cooldown(config.RATE_LIMIT_COOLDOWN)
+    return response
+
+def query_public(method, data=None):
+    """k_conn.query_public con limitación de llamadas."""
+    return _throttled_query(k_conn.query_public, method, data)
+
+def query_private(method, data=None):
+    """k_conn.query_private con limitación de llamadas."""
+    return _throttled_query(k_conn.query_private, method, data)
+
 def check_connection():
     """Verifica la conexión con la API de Kraken."""
     try:
         # Intenta obtener la hora del servidor como prueba de conexión
-        response = k_conn.query_public('Time')
+        response = query_public('Time')
         if response.get('error'):
-            logger.error(f"Error al conectar con Kraken API: {response['error']}")
+            logger.error("Error al conectar con Kraken API: %s", response['error'])
             return False
         logger.info("Conexión con Kraken API exitosa.")
         return True
     except Exception as e:
-        logger.error(f"Excepción al conectar con Kraken API: {e}", exc_info=True)
+        logger.error("Excepción al conectar con Kraken API: %s", e, exc_info=True)
         return False
 
-@exponential_backoff_retry
-def get_historical_data(pair, interval, since=None):
+# --- Alias de pares ---
+# Kraken acepta 'XBTUSD' o 'XBT/USD' pero responde con el nombre canónico ('XXBTZUSD').
+# El mapa se obtiene una vez de AssetPairs y las consultas usan ya el nombre canónico.
+_PAIR_ALIAS = {} # altname/wsname/canónico -> nombre canónico de Kraken
+_pair_alias_lock = threading.Lock()
+_pair_alias_loaded = False
+
+def load_pair_aliases():
+    """Consulta AssetPairs (una sola vez por proceso) y rellena _PAIR_ALIAS."""
+    global _pair_alias_loaded
+    with _pair_alias_lock:
+        if _pair_alias_loaded:
+            return
+        _pair_alias_loaded = True # Un fallo no se reintenta: se usa el nombre tal cual
+        try:
+            response = query_public('AssetPairs')
+            if response.get('error'):
+                logger.warning("No se pudieron obtener los alias de pares: %s", response['error'])
+                return
+            for canonical, info in response.get('result', {}).items():
+                _PAIR_ALIAS[canonical] = canonical
+                for alias in (info.get('altname'), info.get('wsname')):
+                    if alias:
+                        _PAIR_ALIAS[alias] = canonical
+        except Exception as e:
+            logger.warning("No se pudieron obtener los alias de pares: %s", e)
+
+def canonical_pair(pair):
+    """Nombre canónico de Kraken para 'pair' (ej. XBT/USD -> XXBTZUSD), o 'pair' si no se conoce."""
+    if not _pair_alias_loaded:
+        load_pair_aliases()
+    return _PAIR_ALIAS.get(pair, pair)
+
+_OHLC_COLUMNS = ('open', 'high', 'low', 'close', 'vwap', 'volume')
+
+def _parse_ohlc_rows(rows):
     """
-    Obtiene datos OHLC históricos de Kraken.
-    ¡Placeholder! Necesita implementar paginación real y manejo de errores/formato.
+    Convierte las filas OHLC de Kraken [time, open, high, low, close, vwap, volume, count]
+    en arrays NumPy: una sola conversión a array de objetos y un astype por bloque de
+    columnas (sin pd.to_numeric ni bucles Python por fila/columna).
+    Los precios/volumen usan config.OHLC_DTYPE (float32 por defecto).
+    """
+    raw = np.asarray(rows, dtype=object)
+    times = raw[:, 0].astype(np.int64)
+    values = raw[:, 1:1 + len(_OHLC_COLUMNS)].T.astype(config.OHLC_DTYPE, order='C')
+    counts = raw[:, 7].astype(np.int64)
+    return times, values, counts
+
+def _ohlc_frame(times, values, counts):
+    """
+    Construye el DataFrame OHLC a partir de los arrays ya convertidos: el índice es una
+    vista datetime64[s] de los timestamps y las columnas no se copian (arrays recién creados).
     """
-    logger.debug(f"Solicitando datos históricos para {pair}, intervalo {interval}, since {since}")
-    params = {'pair': pair, 'interval': interval}
+    columns = {col: values[k] for k, col in enumerate(_OHLC_COLUMNS)}
+    columns['count'] = counts
+    index = pd.DatetimeIndex(times.view('datetime64[s]'), name='time')
+    df = pd.DataFrame(columns, index=index, copy=False)
+    if len(times):
+        df.attrs['last_ts'] = int(times[-1]) # Última vela como int: comparaciones sin Timestamp
+    return df
+
+def _fetch_ohlc_page(pair, interval, since=None):
+    """Descarga una página OHLC y la devuelve como arrays: ((times, values, counts), last)."""
+    canonical = canonical_pair(pair)
+    params = {'pair': canonical, 'interval': interval}
     if since:
         params['since'] = since
 
-    try:
-        # Usando krakenex directamente
-        response = k_conn.query_public('OHLC', params)
+    # Usando krakenex directamente
+    response = query_public('OHLC', params)
 
-        if response.get('error'):
-            logger.error(f"Error API al obtener OHLC: {response['error']}")
-            # Manejar errores específicos de Kraken aquí (ej. 'EQuery:Unknown asset pair')
-            return None
+    if response.get('error'):
+        logger.error("Error API al obtener OHLC: %s", response['error'])
+        # Manejar errores específicos de Kraken aquí (ej. 'EQuery:Unknown asset pair')
+        return None, None
 
-        result = response.get('result', {})
-        data = result.get(pair) # Kraken puede devolver el par con formato diferente (ej. XXBTZUSD)
-        last_timestamp = result.get('last') # Timestamp de la última vela devuelta, útil para paginación
+    result = response.get('result', {})
+    last_timestamp = result.pop('last', None) # Timestamp de la última vela devuelta, útil para paginación
+    data = result.get(canonical) # Clave canónica (ej. XXBTZUSD) resuelta de antemano
 
+    if not data:
+        # Alias no resuelto (AssetPairs no disponible): sin 'last' sólo queda la entrada del par
+        if result and canonical not in result:
+            found_pair, data = next(iter(result.items()))
+            logger.warning("Formato de par devuelto por API '%s' difiere de solicitado '%s'. Usando datos de '%s'.",
+                           found_pair, pair, found_pair)
         if not data:
-             # Intentar encontrar el par correcto si el formato difiere
-            found_pair = None
-            for key in result.keys():
-                if key != 'last':
-                    found_pair = key
-                    data = result[key]
-                    logger.warning(f"Formato de par devuelto por API '{found_pair}' difiere de solicitado '{pair}'. Usando datos de '{found_pair}'.")
-                    break
-            if not data:
-                logger.warning(f"No se recibieron datos OHLC para {pair}. Respuesta: {response}")
-                return None, None
-
-        # Convertir a DataFrame de Pandas
+            logger.warning("No se recibieron datos OHLC para %s. Respuesta: %s", pair, response)
+            return None, last_timestamp
+
+    return _parse_ohlc_rows(data), last_timestamp
+
+# --- Llamadas concurrentes ---
+# Las llamadas a Kraken son I/O de red (liberan el GIL): se solapan en un pool de hilos
+# en vez de encadenar round-trips. El token bucket sigue limitando el ritmo global.
+_io_executor = ThreadPoolExecutor(max_workers=config.KRAKEN_IO_WORKERS, thread_name_prefix='kraken-io')
+# (pair, interval) -> (last, instante de cierre de la vela en curso al recibirlo): pedir
+# otra vez since=last antes de ese instante no puede traer ninguna vela cerrada nueva
+_LAST_CLOSED = {}
+
+def fetch_concurrently(*calls):
+    """
+    Ejecuta varias llamadas (func, *args) en paralelo y retorna sus resultados en el
+    mismo orden. Las excepciones se propagan al leer el resultado correspondiente.
+    Ej: fetch_concurrently((get_historical_data, pair, 1), (get_account_balance,))
+    """
+    futures = [_io_executor.submit(func, *args) for func, *args in calls]
+    return [future.result() for future in futures]
+
+@retry()
+def get_historical_data(pair, interval, since=None, max_pages=1):
+    """
+    Obtiene datos OHLC históricos de Kraken.
+    Con max_pages > 1 se pagina con el cursor 'last'. Cada página se convierte a
+    arrays al llegar y se concatenan una sola vez al final.
+    """
+    interval = int(interval) # config.TIMEFRAME es un str ('1')
+    key = (pair, interval)
+    last_closed = _LAST_CLOSED.get(key)
+    if since is not None and last_closed and last_closed[0] == since and time.time() < last_closed[1]:
+        return None, None # Misma consulta dentro de la misma vela: respuesta vacía sin ir a la red
+
+    logger.debug("Solicitando datos históricos para %s, intervalo %s, since %s", pair, interval, since)
+    candle_seconds = interval * 60
+    next_close = (time.time() // candle_seconds + 1) * candle_seconds
+
+    try:
+        pages = []
+        last_timestamp = since
+        for _ in range(max_pages):
+            page, next_since = _fetch_ohlc_page(pair, interval, last_timestamp)
+            if page is None:
+                break
+            pages.append(page)
+            if not next_since or next_since == last_timestamp:
+                break
+            last_timestamp = next_since
+
+        if not pages:
+            if since is not None:
+                _LAST_CLOSED[key] = (since, next_close)
+            return None, None
+
+        if len(pages) == 1:
+            times, values, counts = pages[0]
+        else:
+            times = np.concatenate([p[0] for p in pages])
+            values = np.concatenate([p[1] for p in pages], axis=1)
+            counts = np.concatenate([p[2] for p in pages])
+            # Las páginas se solapan (Kraken repite la vela en curso): se queda la versión más reciente
+            times, unique_idx = np.unique(times[::-1], return_index=True)
+            keep = len(counts) - 1 - unique_idx
+            values, counts = values[:, keep], counts[keep]
+
         # Columnas: time, open, high, low, close, vwap, volume, count
-        df = pd.DataFrame(data, columns=['time', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count'])
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        df.set_index('time', inplace=True)
-        # Convertir columnas numéricas
-        for col in ['open', 'high', 'low', 'close', 'vwap', 'volume']:
-            df[col] = pd.to_numeric(df[col])
-
-        logger.info(f"Recibidos {len(df)} velas históricas para {pair} hasta {df.index.max()}")
+        df = _ohlc_frame(times, values, counts)
+
+        if logger.isEnabledFor(logging.INFO):
+            # df.index.max() recorre el índice: sólo si el mensaje se va a emitir
+            logger.info("Recibidos %d velas históricas para %s hasta %s", len(df), pair, df.index.max())
+        if last_timestamp is not None:
+            _LAST_CLOSED[key] = (last_timestamp, next_close)
         return df, last_timestamp
 
     except Exception as e:
-        logger.error(f"Excepción al obtener datos históricos: {e}", exc_info=True)
-        # Re-lanzar la excepción para que exponential_backoff_retry funcione
+        logger.error("Excepción al obtener datos históricos: %s", e, exc_info=True)
+        # Re-lanzar la excepción para que @retry reintente
         raise e
 
+# --- Cachés de corta duración ---
+# Kraken cobra cada consulta en su contador de llamadas; el dashboard y el bot piden
+# balance/ticker con mucha frecuencia, así que se reutiliza la respuesta durante un TTL corto.
+_cache_lock = threading.Lock()
+
+def _new_cache_entry():
+    return {'value': None, 'expires': 0.0, 'lock': threading.Lock()}
+
+_balance_cache = _new_cache_entry()
+_ticker_cache = {} # pair -> entrada de caché
+
+def _get_cached(entry, ttl, fetch):
+    """Devuelve entry['value'] si no ha expirado; si no, llama a fetch() y lo guarda."""
+    with entry['lock']: # Evita que varios hilos refresquen la misma entrada a la vez
+        if entry['value'] is not None and time.monotonic() < entry['expires']:
+            return dict(entry['value'])
+        value = fetch()
+        if value is not None:
+            entry['value'] = value
+            entry['expires'] = time.monotonic() + ttl
+        return dict(value) if value is not None else None
+
 # --- Funciones Placeholder Adicionales (Implementación Real Necesaria) ---
 
 def get_account_balance():
-    """Obtiene el balance de la cuenta."""
+    """Obtiene el balance de la cuenta (cacheado config.BALANCE_CACHE_TTL segundos)."""
+    return _get_cached(_balance_cache, config.BALANCE_CACHE_TTL, _fetch_account_balance)
+
+def _fetch_account_balance():
     logger.info("Obteniendo balance de cuenta (Placeholder)")
     # Aquí iría la llamada a k_conn.query_private('Balance')
     # Ejemplo de respuesta simulada:
     return {'USD': 10000.0, 'XBT': 0.5} # Retornar dict con balances relevantes
 
+def _match_pair_key(pair, result):
+    """Encuentra la clave de la respuesta de Kraken que corresponde a 'pair' (ej. XBT/USD -> XXBTZUSD)."""
+    if pair in result:
+        return pair
+    canonical = _PAIR_ALIAS.get(pair)
+    if canonical in result:
+        return canonical
+    base, _, quote = pair.upper().partition('/')
+    for candidate in (base + quote, f"X{base}Z{quote}", f"X{base}{quote}"):
+        if candidate in result:
+            return candidate
+    if len(result) == 1:
+        return next(iter(result))
+    return None
+
+def get_tickers(pairs):
+    """
+    Obtiene el ticker de varios pares con UNA sola llamada ('Ticker' acepta una lista separada por comas).
+    Retorna dict {pair: {'last_price', 'ask', 'bid'}} con los pares solicitados que se encontraron.
+    """
+    if not pairs:
+        return {}
+    logger.debug("Obteniendo ticker para %s", pairs)
+    response = query_public('Ticker', {'pair': ','.join(pairs)})
+    if response.get('error'):
+        logger.error("Error API al obtener Ticker: %s", response['error'])
+        return {}
+
+    result = response.get('result', {})
+    tickers = {}
+    for pair in pairs:
+        key = _match_pair_key(pair, result)
+        if key is None:
+            logger.warning("No se recibió ticker para %s.", pair)
+            continue
+        data = result[key]
+        # 'a' = ask [precio, ...], 'b' = bid [precio, ...], 'c' = último trade [precio, volumen]
+        tickers[pair] = {
+            'last_price': float(data['c'][0]),
+            'ask': float(data['a'][0]),
+            'bid': float(data['b'][0])
+        }
+    return tickers
+
+class _TickerBatch:
+    """Lote de pares pendientes de una misma llamada a get_tickers."""
+    def __init__(self):
+        self.pairs = set()
+        self.results = {}
+        self.error = None
+        self.done = threading.Event()
+
+class _TickerBatcher:
+    """
+    Agrupa las peticiones de ticker que llegan dentro de una ventana corta (estilo DataLoader):
+    el primer hilo espera 'window' segundos, lanza una única llamada con todos los pares
+    acumulados y reparte el resultado al resto.
+    """
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._open_batch = None
+
+    def get(self, pair):
+        with self._lock:
+            batch = self._open_batch
+            is_leader = batch is None
+            if is_leader:
+                batch = self._open_batch = _TickerBatch()
+            batch.pairs.add(pair)
+
+        if is_leader:
+            time.sleep(self.window)
+            with self._lock:
+                self._open_batch = None # Las nuevas peticiones van a otro lote
+            try:
+                batch.results = get_tickers(sorted(batch.pairs))
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results.get(pair)
+
+_ticker_batcher = _TickerBatcher(config.TICKER_BATCH_WINDOW)
+
 def get_ticker_info(pair):
-    """Obtiene la información de ticker actual para un par."""
-    logger.debug(f"Obteniendo ticker para {pair} (Placeholder)")
-    # Aquí iría la llamada a k_conn.query_public('Ticker', {'pair': pair})
-    # Ejemplo:
-    return {'last_price': 40000.0, 'ask': 40001.0, 'bid': 39999.0}
+    """Obtiene la información de ticker actual para un par (cacheado config.TICKER_CACHE_TTL segundos)."""
+    with _cache_lock:
+        entry = _ticker_cache.get(pair)
+        if entry is None:
+            entry = _ticker_cache[pair] = _new_cache_entry()
+    return _get_cached(entry, config.TICKER_CACHE_TTL, lambda: _ticker_batcher.get(pair))
 
 def place_order(pair, direction, order_type, volume, price=None, stop_price=None, take_profit_price=None):
     """
@@ -107,8 +417,8 @@ def place_order(pair, direction, order_type, volume, price=None, stop_price=None
     separadas para SL/TP si no hay OCO nativo, y gestionar IDs de órdenes.
     """
 
-    logger.info(f"Intentando colocar orden: {direction} {volume} {pair} @ {price or 'Market'} "
-                f"(SL={stop_price}, TP={take_profit_price})")
+    logger.info("Intentando colocar orden: %s %s %s @ %s (SL=%s, TP=%s)",
+                direction, volume, pair, price or 'Market', stop_price, take_profit_price)
 
     try:
         # 1. Construir el diccionario de parámetros para k_conn.query_private('AddOrder', params)
@@ -127,15 +437,15 @@ def place_order(pair, direction, order_type, volume, price=None, stop_price=None
         #Para asegurar compatibilidad, implementaremos SL/TP como ordenes separadas.
 
         # 3. Enviar orden principal.
-        response = k_conn.query_private('AddOrder', params)
+        response = query_private('AddOrder', params)
 
         if response.get('error'):
-            logger.error(f"Error al colocar orden principal: {response['error']}")
+            logger.error("Error al colocar orden principal: %s", response['error'])
             return None
 
         # 4. Si la orden principal es exitosa (obtener txid), enviar órdenes separadas para SL y TP
         txid = response['result']['txid'][0]  # Obtener el ID de la transacción de la orden principal
-        logger.info(f"Orden principal colocada con txid: {txid}")
+        logger.info("Orden principal colocada con txid: %s", txid)
 
         # Funciones auxiliares para colocar SL/TP
         def place_sl_tp_order(order_type, price):
@@ -147,12 +457,12 @@ def place_order(pair, direction, order_type, volume, price=None, stop_price=None
                 'volume': str(volume),
                 'close[ordertype]': 'market' #Cerrar al precio de mercado
             }
-            sl_tp_response = k_conn.query_private('AddOrder', sl_tp_params)
+            sl_tp_response = query_private('AddOrder', sl_tp_params)
             if sl_tp_response.get('error'):
-                logger.error(f"Error al colocar orden {order_type}: {sl_tp_response['error']}")
+                logger.error("Error al colocar orden %s: %s", order_type, sl_tp_response['error'])
                 return None
             sl_tp_txid = sl_tp_response['result']['txid'][0]
-            logger.info(f"Orden {order_type} colocada con txid: {sl_tp_txid}")
+            logger.info("Orden %s colocada con txid: %s", order_type, sl_tp_txid)
             return sl_tp_txid
 
         sl_txid = None
@@ -173,12 +483,12 @@ def place_order(pair, direction, order_type, volume, price=None, stop_price=None
         if tp_txid:
             order_ids['take_profit'] = tp_txid
 
-        logger.info(f"IDs de órdenes registradas: {order_ids}")
+        logger.info("IDs de órdenes registradas: %s", order_ids)
 
         return order_ids #Retornar dict con todos los IDs
 
     except Exception as e:
-        logger.error(f"Excepción al colocar orden: {e}", exc_info=True)
+        logger.error("Excepción al colocar orden: %s", e, exc_info=True)
         return None
 
     # # Ejemplo de retorno simulado (txid de la orden principal)
@@ -188,7 +498,7 @@ def place_order(pair, direction, order_type, volume, price=None, stop_price=None
 
 def cancel_order(txid):
     """Cancela una orden abierta."""
-    logger.info(f"Cancelando orden {txid} (Placeholder)")
+    logger.info("Cancelando orden %s (Placeholder)", txid)
     # Aquí iría la llamada a k_conn.query_private('CancelOrder', {'txid': txid})
     # Retornar True si fue exitoso, False si no.
     return True
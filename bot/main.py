@@ -1,14 +1,14 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import time
-import schedule # Librería para tareas programadas (pip install schedule)
-from bot import config, kraken_api, indicators, strategies, risk_manager, backtester
+from bot import config, kraken_api, ohlc_cache, indicators_state, strategies, risk_manager, backtester
 from bot.utils import logger, generate_insights_text # Importa generate_insights_text
 from gpt_analyzer import analyze_symbol # Importa analyze_symbol
 
 # --- Estado del Bot ---
 current_position = None # Almacena info de la posición actual: {'id', 'pair', 'direction', 'size', 'entry_price', 'sl', 'tp1', 'tp2', 'entry_time'}
 active_orders = {}    # Almacena IDs de órdenes activas: {'order_id': 'type'} (ej: 'sl', 'tp1')
-last_candle_time = None # Para evitar procesar la misma vela múltiples veces
+last_candle_time = None # Timestamp (int, segundos) de la última vela procesada, para no repetirla
 
 def check_and_trade():
     """Función principal que se ejecuta periódicamente."""
@@ -24,26 +24,35 @@ def check_and_trade():
         # o usar otro endpoint de Kraken API si existe.
         # ¡ESTA PARTE ES CRÍTICA Y COMPLEJA EN LA REALIDAD!
         num_candles_needed = max(config.SMA_TREND_PERIOD, config.BREAKOUT_LOOKBACK_PERIOD) + 5
-        df_recent, _ = kraken_api.get_historical_data(config.TRADING_PAIR, config.TIMEFRAME) # Simplificado!
+        # OHLC, ticker y balance en paralelo: el ciclo tarda un round-trip en vez de tres
+        (df_recent, _), ticker, balance = kraken_api.fetch_concurrently(
+            (ohlc_cache.get_history, config.TRADING_PAIR, config.TIMEFRAME), # Sólo descarga velas nuevas
+            (kraken_api.get_ticker_info, config.TRADING_PAIR),
+            (kraken_api.get_account_balance,),
+        )
 
         if df_recent is None or df_recent.empty:
             logger.warning("No se obtuvieron datos recientes.")
             return
 
         # Verificar si hay una nueva vela
-        latest_time = df_recent.index[-1]
-        if last_candle_time is not None and latest_time <= last_candle_time:
+        # Comparación int contra int (attrs['last_ts']), sin construir Timestamps
+        latest_ts = df_recent.attrs.get('last_ts')
+        if latest_ts is None:
+            latest_ts = int(df_recent.index[-1].timestamp())
+        if last_candle_time is not None and latest_ts <= last_candle_time:
              logger.debug("Sin nueva vela para procesar.")
              return
-        last_candle_time = latest_time
-        logger.info(f"Procesando nueva vela: {latest_time}")
+        last_candle_time = latest_ts
+        latest_time = df_recent.index[-1]
+        logger.info("Procesando nueva vela: %s", latest_time)
 
-        # Calcular indicadores
-        df_recent = indicators.add_indicators(df_recent)
-        if df_recent is None: return
+        # Calcular indicadores (incremental: sólo las velas nuevas actualizan el estado)
+        candles = indicators_state.update_indicators(config.TRADING_PAIR, df_recent)
+        if candles is None: return
 
     except Exception as e:
-        logger.error(f"Error al obtener/procesar datos: {e}", exc_info=True)
+        logger.error("Error al obtener/procesar datos: %s", e, exc_info=True)
         return
 
     # --- 2. Gestionar Posición Abierta (Si existe) ---
@@ -54,7 +63,8 @@ def check_and_trade():
         # C. Aplicar Trailing Stop
         #    (Estas lógicas necesitan implementación detallada consultando precios actuales
         #     y modificando órdenes SL vía API)
-        logger.debug(f"Posición abierta detectada: {current_position['direction']} {current_position['size']} {current_position['pair']}")
+        logger.debug("Posición abierta detectada: %s %s %s",
+                     current_position['direction'], current_position['size'], current_position['pair'])
         # Placeholder para lógica de gestión
         pass # Implementar gestión de posición activa
 
@@ -65,9 +75,11 @@ def check_and_trade():
         # if not filtro_noticias() or not filtro_horario(): is_safe_to_trade = False
 
         if is_safe_to_trade:
-            # Evaluar estrategias
-            signal_status_rev, signal_details_rev = strategies.check_reversal_signal(df_recent)
-            signal_status_brk, signal_details_brk = strategies.check_breakout_signal(df_recent)
+            # Evaluar estrategias sobre las columnas SoA del par
+            signal_status_rev, signal_details_rev = strategies.check_reversal_signal(candles)
+            # Niveles del lookback actualizados en O(1) con las velas nuevas
+            breakout = strategies.update_breakout_levels(config.TRADING_PAIR, df_recent)
+            signal_status_brk, signal_details_brk = strategies.check_breakout_signal(candles, breakout)
 
             signal_to_execute = None
             if signal_status_rev == strategies.SIGNAL_GREEN:
@@ -77,7 +89,7 @@ def check_and_trade():
                 signal_to_execute = signal_details_brk
 
             if signal_to_execute:
-                logger.info(f"¡Señal Verde encontrada! {signal_to_execute['details']}")
+                logger.info("¡Señal Verde encontrada! %s", signal_to_execute['details'])
                 try:
                     # Calcular tamaño
                     entry_p = signal_to_execute['entry_price'] # Precio de entrada propuesto
@@ -86,15 +98,18 @@ def check_and_trade():
                     tp2_p = signal_to_execute.get('take_profit_2')
 
                     # Podríamos ajustar entry_p al precio actual de mercado o ask/bid
-                    ticker = kraken_api.get_ticker_info(config.TRADING_PAIR)
-                    actual_entry_price = ticker['ask'] if signal_to_execute['direction'] == 'LONG' else ticker['bid']
-                    # Recalcular TPs basados en el precio de entrada real
-                    risk_real = abs(actual_entry_price - sl_p)
-                    tp1_p_real = actual_entry_price + config.TP_RR_RATIO_1 * risk_real if signal_to_execute['direction'] == 'LONG' else actual_entry_price - config.TP_RR_RATIO_1 * risk_real
-                    tp2_p_real = actual_entry_price + config.TP_RR_RATIO_2 * risk_real if signal_to_execute['direction'] == 'LONG' and tp2_p else (actual_entry_price - config.TP_RR_RATIO_2 * risk_real if signal_to_execute['direction'] != 'LONG' and tp2_p else None)
+                    # (ticker ya obtenido al inicio del ciclo junto con el OHLC)
+                    is_long = signal_to_execute['direction'] == 'LONG'
+                    actual_entry_price = ticker['ask'] if is_long else ticker['bid']
+                    # Recalcular TPs basados en el precio de entrada real (sign: +1 LONG, -1 SHORT)
+                    sign = 1.0 if is_long else -1.0
+                    risk_real = sign * abs(actual_entry_price - sl_p)
+                    tp1_p_real = actual_entry_price + config.TP_RR_RATIO_1 * risk_real
+                    tp2_p_real = actual_entry_price + config.TP_RR_RATIO_2 * risk_real if tp2_p else None
 
 
-                    size = risk_manager.calculate_position_size(actual_entry_price, sl_p)
+                    capital = (balance or {}).get(risk_manager.QUOTE_CURRENCY) or None
+                    size = risk_manager.calculate_position_size(actual_entry_price, sl_p, capital=capital)
 
                     if size > 0:
                         # Colocar Orden Bracket (Entrada + SL + TP)
@@ -111,7 +126,8 @@ def check_and_trade():
                         )
 
                         if order_id:
-                            logger.info(f"Orden de entrada {signal_to_execute['strategy']} {signal_to_execute['direction']} enviada. Size={size:.8f}. OrderID={order_id}")
+                            logger.info("Orden de entrada %s %s enviada. Size=%.8f. OrderID=%s",
+                                        signal_to_execute['strategy'], signal_to_execute['direction'], size, order_id)
                             # Actualizar estado interno (asumiendo que la orden se ejecutará pronto)
                             # ¡En un bot real, se debe esperar confirmación de ejecución!
                             current_position = {
@@ -134,13 +150,13 @@ def check_and_trade():
                          logger.warning("Tamaño de posición calculado es 0. No se abre trade.")
 
                 except Exception as e:
-                    logger.error(f"Error al intentar ejecutar la señal: {e}", exc_info=True)
+                    logger.error("Error al intentar ejecutar la señal: %s", e, exc_info=True)
 
         else:
              logger.info("Filtros activos (Noticias/Horario/Correlación). No se buscan entradas.")
 
     # Obtener insights técnicos
-    insights_text = generate_insights_text(df_recent)
+    insights_text = generate_insights_text(indicators_state.frame(config.TRADING_PAIR, 1))
 
     # Analizar el símbolo con GPT
     gpt_result = analyze_symbol(config.TRADING_PAIR, insights_text)
@@ -148,13 +164,13 @@ def check_and_trade():
     # Tomar decisiones basadas en los insights técnicos y el resultado de GPT
     if gpt_result["direction"] == "bullish" and gpt_result["confidence"] > config.CONFIDENCE_THRESHOLD:
         # ... (lógica para comprar)
-        logger.info(f"GPT es alcista con confianza {gpt_result['confidence']:.2f}. Implementar lógica de compra.")
+        logger.info("GPT es alcista con confianza %.2f. Implementar lógica de compra.", gpt_result['confidence'])
     elif gpt_result["direction"] == "bearish" and gpt_result["confidence"] > config.CONFIDENCE_THRESHOLD:
         # ... (lógica para vender)
-        logger.info(f"GPT es bajista con confianza {gpt_result['confidence']:.2f}. Implementar lógica de venta.")
+        logger.info("GPT es bajista con confianza %.2f. Implementar lógica de venta.", gpt_result['confidence'])
     else:
         # ... (lógica para no operar)
-        logger.info(f"GPT es neutral o tiene baja confianza ({gpt_result['confidence']:.2f}). No se opera.")
+        logger.info("GPT es neutral o tiene baja confianza (%.2f). No se opera.", gpt_result['confidence'])
 
 
 def run_bot():
@@ -163,18 +179,29 @@ def run_bot():
     if not kraken_api.check_connection():
         logger.critical("No se pudo conectar a Kraken API. Saliendo.")
         return
+    kraken_api.load_pair_aliases() # Nombres canónicos de los pares resueltos una vez al arrancar
 
     # --- Programar la ejecución periódica ---
     # Ejecutar cada minuto (ajustar según timeframe y estrategia)
-    schedule.every(1).minute.at(":01").do(check_and_trade) # Ejecutar 1 seg después del inicio del minuto
-    logger.info(f"Bot programado para ejecutarse cada minuto (Timeframe: {config.TIMEFRAME}m)")
-
+    logger.info("Bot programado para ejecutarse cada minuto (Timeframe: %sm)", config.TIMEFRAME)
+    asyncio.run(main_loop())
+
+def _seconds_to_next_run(now=None):
+    """Segundos hasta 1 seg después del inicio del próximo minuto."""
+    now = time.time() if now is None else now
+    return 60 - (now % 60) + 1
+
+async def main_loop():
+    """
+    Bucle del bot: duerme exactamente hasta el próximo minuto (sin despertar cada
+    segundo a sondear) y ejecuta check_and_trade en un hilo para no bloquear el loop.
+    """
     # Ejecutar la primera vez inmediatamente
-    check_and_trade()
+    await asyncio.to_thread(check_and_trade)
 
     while True:
-        schedule.run_pending()
-        time.sleep(1)
+        await asyncio.sleep(_seconds_to_next_run())
+        await asyncio.to_thread(check_and_trade)
 
 if __name__ == "__main__":
     # Opción para correr backtest en lugar del bot en vivo
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Caché local del historial OHLC por (par, intervalo) en Parquet.
+Sólo se piden a Kraken las velas posteriores a la última guardada, y no se hace
+ninguna llamada mientras la última vela no haya cerrado.
+"""
+import os
+import threading
+import time
+import pandas as pd
+from bot import config, kraken_api
+from bot.utils import logger
+
+_memory_cache = {} # (pair, interval) -> DataFrame; evita releer el Parquet en cada ciclo
+_cache_lock = threading.Lock()
+
+def _cache_path(pair, interval):
+    return os.path.join(config.OHLC_CACHE_DIR, f"{pair.replace('/', '')}_{interval}.parquet")
+
+def load_history(pair, interval):
+    """Historial cacheado (memoria o disco) o None si no existe."""
+    key = (pair, interval)
+    df = _memory_cache.get(key)
+    if df is not None:
+        return df
+    path = _cache_path(pair, interval)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception as e: # Fichero corrupto o sin motor Parquet: se descarga de nuevo
+        logger.warning("No se pudo leer la caché OHLC %s: %s", path, e)
+        return None
+    _memory_cache[key] = df
+    return df
+
+def _save_history(pair, interval, df):
+    path = _cache_path(pair, interval)
+    try:
+        os.makedirs(config.OHLC_CACHE_DIR, exist_ok=True)
+        df.to_parquet(path, compression='zstd')
+    except Exception as e: # Sin pyarrow/fastparquet la caché queda sólo en memoria
+        logger.warning("No se pudo guardar la caché OHLC %s: %s", path, e)
+
+def get_history(pair, interval):
+    """
+    Devuelve (df, last) como kraken_api.get_historical_data, pero reutilizando el
+    historial cacheado: sólo descarga el delta desde la última vela guardada.
+    """
+    key = (pair, interval)
+    candle_seconds = int(interval) * 60 # config.TIMEFRAME es un str ('1'); el fichero usa el valor original
+    with _cache_lock:
+        cached = load_history(pair, interval)
+        if cached is None or cached.empty:
+            df, last = kraken_api.get_historical_data(pair, interval)
+            if df is None or df.empty:
+                return df, last
+        else:
+            last_ts = cached.attrs.get('last_ts') or int(cached.index[-1].timestamp())
+            # Caché negativa: la última vela sigue abierta, todavía no hay vela nueva que pedir
+            if time.time() < last_ts + candle_seconds:
+                return cached, last_ts
+            # Volver a pedir la última vela guardada: pudo guardarse aún incompleta
+            new_df, last = kraken_api.get_historical_data(pair, interval, since=last_ts - 1)
+            if new_df is None or new_df.empty:
+                return cached, last_ts
+            if new_df.index[0] > cached.index[-1] + pd.Timedelta(seconds=candle_seconds):
+                # Kraken sólo devuelve las últimas 720 velas: tras una parada larga el delta no
+                # empalma con la caché y concatenar dejaría un hueco en medio de la serie
+                logger.warning("Hueco en la caché OHLC de %s (%s -> %s): se descarta la caché",
+                               pair, cached.index[-1], new_df.index[0])
+                df = new_df
+            else:
+                df = pd.concat([cached, new_df])
+                df = df[~df.index.duplicated(keep='last')].sort_index()
+
+        df = df.iloc[-config.OHLC_CACHE_MAX_ROWS:]
+        df.attrs['last_ts'] = int(df.index[-1].timestamp())
+        _memory_cache[key] = df
+        _save_history(pair, interval, df)
+        return df, last
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+# Contador de llamadas de Kraken por nivel de cuenta: (máximo, decaimiento por segundo)
+KRAKEN_TIERS = {
+    'starter': (15, 1 / 3),
+    'intermediate': (20, 0.5),
+    'pro': (20, 1.0),
+}
+
+class TokenBucket:
+    """
+    Token bucket que reproduce el contador de llamadas de Kraken:
+    'capacity' tokens como máximo y 'refill_rate' tokens recuperados por segundo.
+    Es seguro para uso desde varios hilos.
+    """
+    def __init__(self, capacity, refill_rate):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_tier(cls, tier):
+        """Crea el bucket correspondiente al nivel de cuenta de Kraken ('starter', 'intermediate', 'pro')."""
+        capacity, refill_rate = KRAKEN_TIERS.get(tier, KRAKEN_TIERS['starter'])
+        return cls(capacity, refill_rate)
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.refill_rate)
+        self._last = now
+
+    def acquire(self, cost=1):
+        """Bloquea hasta disponer de 'cost' tokens y los consume."""
+        if cost <= 0:
+            return
+        cost = min(cost, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= cost:
+                    self._tokens -= cost
+                    return
+                wait = max(self._blocked_until - now, (cost - self._tokens) / self.refill_rate)
+            time.sleep(wait)
+
+    def cooldown(self, seconds):
+        """Bloquea nuevas llamadas durante 'seconds' (tras un error de rate limit de Kraken)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
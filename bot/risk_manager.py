@@ -1,12 +1,66 @@
 # Actualización completa de bot/risk_manager.py con las funciones placeholder completas
 
-import math
 import os
+from functools import lru_cache
+import numpy as np
 from bot import config
 from bot.utils import logger
+from bot._njit import njit
 from bot import kraken_api
 from gpt_analyzer import analyze_symbol
 
+# Divisa de cotización del par (ej: 'USD' en 'XBT/USD'), calculada una vez al importar
+QUOTE_CURRENCY = config.TRADING_PAIR.split('/')[1]
+
+# Constantes de redondeo y mínimos precalculadas al importar
+_RISK_PER_TRADE = config.RISK_PER_TRADE
+_ORDER_DECIMALS = getattr(config, "ORDER_DECIMALS", 8)
+_SIZE_SCALE = 10 ** _ORDER_DECIMALS
+_MIN_ORDER_SIZE = getattr(config, "MIN_ORDER_SIZE", 0.0001)
+_VOL_THRESHOLD = getattr(config, "VOLATILITY_THRESHOLD_FACTOR", 1.5)
+_MAX_DRAWDOWN = getattr(config, "MAX_DRAWDOWN", 0.2)
+_MAX_RISK = getattr(config, "MAX_RISK_PER_TRADE", 0.02)
+SENTIMENT_SIGN = {"bullish": 1.0, "bearish": -1.0} # Cualquier otra dirección: factor 1 (neutral)
+_INTERVAL_SECONDS = int(config.TIMEFRAME) * 60 # Duración de una vela: vida útil del sentimiento GPT cacheado
+
+def _get_capital():
+    """Capital disponible en la divisa de cotización (balance cacheado por kraken_api)."""
+    balance = kraken_api.get_account_balance() or {}
+    return balance.get(QUOTE_CURRENCY, 0)
+
+def _raw_size_factor(entry_price, stop_loss_price, capital):
+    """Unidades por unidad de riesgo: capital / distancia al stop (None si la distancia es cero)."""
+    distance_to_stop = abs(entry_price - stop_loss_price)
+    if distance_to_stop == 0:
+        logger.warning("Distancia al stop es cero. No se puede calcular tamaño.")
+        return None
+    return capital / distance_to_stop
+
+def _round_size(size_factor, risk_percentage):
+    """Tamaño truncado a ORDER_DECIMALS; 0 si queda por debajo del mínimo de orden."""
+    # int() trunca igual que math.floor para tamaños positivos
+    size = int(size_factor * risk_percentage * _SIZE_SCALE) / _SIZE_SCALE
+    if size < _MIN_ORDER_SIZE:
+        logger.warning("Tamaño calculado %s < mínimo %s. No se operará.", size, _MIN_ORDER_SIZE)
+        return 0
+    return size
+
+@njit(cache=True)
+def _size_kernel(entry_price, stop_loss_price, capital, risk_percentage, size_scale, min_size):
+    """Tamaño truncado a size_scale (0 si los parámetros no son válidos o queda bajo el mínimo)."""
+    distance_to_stop = abs(entry_price - stop_loss_price)
+    if distance_to_stop == 0.0 or capital <= 0.0 or risk_percentage <= 0.0:
+        return 0.0
+    size = int(capital / distance_to_stop * risk_percentage * size_scale) / size_scale
+    return size if size >= min_size else 0.0
+
+def position_size(entry_price, stop_loss_price, capital, risk_percentage=_RISK_PER_TRADE):
+    """
+    Mismo tamaño que calculate_position_size para capital conocido, compilado con Numba
+    y sin logs: para bucles que dimensionan muchas señales (backtester).
+    """
+    return _size_kernel(entry_price, stop_loss_price, capital, risk_percentage, _SIZE_SCALE, _MIN_ORDER_SIZE)
+
 def calculate_position_size(entry_price, stop_loss_price, capital=None, risk_percentage=None):
     """
     Calcula el tamaño de la posición basado en el riesgo por operación.
@@ -14,16 +68,14 @@ def calculate_position_size(entry_price, stop_loss_price, capital=None, risk_per
     """
     # 1) Obtener capital si no se especifica
     if capital is None:
-        balance = kraken_api.get_account_balance()
-        base_currency = config.TRADING_PAIR.split('/')[1]  # Ej: 'USD'
-        capital = balance.get(base_currency, 0)
+        capital = _get_capital()
         if capital <= 0:
             logger.error("No se pudo obtener capital válido de la cuenta.")
             return 0
 
     # 2) Obtener porcentaje de riesgo si no se especifica
     if risk_percentage is None:
-        risk_percentage = config.RISK_PER_TRADE
+        risk_percentage = _RISK_PER_TRADE
 
     # 3) Validar parámetros
     if entry_price is None or stop_loss_price is None or capital <= 0 or risk_percentage <= 0:
@@ -31,26 +83,36 @@ def calculate_position_size(entry_price, stop_loss_price, capital=None, risk_per
         return 0
 
     # 4) Cálculo base
-    risk_amount = capital * risk_percentage
-    distance_to_stop = abs(entry_price - stop_loss_price)
-    if distance_to_stop == 0:
-        logger.warning("Distancia al stop es cero. No se puede calcular tamaño.")
+    size_factor = _raw_size_factor(entry_price, stop_loss_price, capital)
+    if size_factor is None:
         return 0
 
-    raw_size = risk_amount / distance_to_stop
-    precision = getattr(config, "ORDER_DECIMALS", 8)
-    size = math.floor(raw_size * (10 ** precision)) / (10 ** precision)
-
-    # 5) Verificar tamaño mínimo
-    min_order_size = getattr(config, "MIN_ORDER_SIZE", 0.0001)
-    if size < min_order_size:
-        logger.warning(f"Tamaño calculado {size} < mínimo {min_order_size}. No se operará.")
+    # 5) Truncar y verificar tamaño mínimo
+    size = _round_size(size_factor, risk_percentage)
+    if size == 0:
         return 0
 
-    logger.info(f"Tamaño Posición: Capital={capital:.2f}, Riesgo={risk_percentage:.2%}, "
-                f"Entry={entry_price:.2f}, SL={stop_loss_price:.2f} -> Size={size:.8f}")
+    logger.info("Tamaño Posición: Capital=%.2f, Riesgo=%.2f%%, Entry=%.2f, SL=%.2f -> Size=%.8f",
+                capital, risk_percentage * 100, entry_price, stop_loss_price, size)
     return size
 
+@lru_cache(maxsize=256)
+def _sentiment(symbol, candle_bucket):
+    """
+    Sentimiento GPT de symbol cacheado por vela: dentro de la misma vela (mismo
+    candle_bucket) la respuesta no puede cambiar, así que no se repite la consulta.
+    """
+    return analyze_symbol(symbol)
+
+def candle_bucket(df_history):
+    """Índice de la vela actual (timestamp de la última vela // duración de la vela)."""
+    last_ts = df_history.attrs.get('last_ts') or int(df_history.index[-1].timestamp())
+    return last_ts // _INTERVAL_SECONDS
+
+def cached_sentiment(symbol, df_history):
+    """Sentimiento GPT de symbol para la última vela de df_history (una consulta por par y vela)."""
+    return _sentiment(symbol, candle_bucket(df_history))
+
 def adjust_risk_for_volatility(current_risk_percentage, atr_value, avg_atr_value):
     """
     Ajusta el riesgo basado en ATR:
@@ -59,8 +121,8 @@ def adjust_risk_for_volatility(current_risk_percentage, atr_value, avg_atr_value
     factor = getattr(config, "VOLATILITY_THRESHOLD_FACTOR", 1.5)
     if atr_value > avg_atr_value * factor:
         new_risk = current_risk_percentage / 2
-        logger.warning(f"Alta volatilidad (ATR {atr_value:.4f} > {avg_atr_value*factor:.4f}), "
-                       f"reduciendo riesgo a {new_risk:.2%}")
+        logger.warning("Alta volatilidad (ATR %.4f > %.4f), reduciendo riesgo a %.2f%%",
+                       atr_value, avg_atr_value * factor, new_risk * 100)
         return new_risk
     return current_risk_percentage
 
@@ -75,53 +137,83 @@ def adjust_risk_for_drawdown(current_risk_percentage, current_drawdown, max_draw
     # factor de escala: 1 - (drawdown / threshold)
     factor = 1 - (current_drawdown / max_drawdown_threshold)
     new_risk = current_risk_percentage * factor
-    logger.info(f"Drawdown {current_drawdown:.2%} < umbral {max_drawdown_threshold:.2%}, "
-                f"riesgo ajustado a {new_risk:.2%}")
+    logger.info("Drawdown %.2f%% < umbral %.2f%%, riesgo ajustado a %.2f%%",
+                current_drawdown * 100, max_drawdown_threshold * 100, new_risk * 100)
     return new_risk
 
-def adjust_risk_for_gpt_sentiment(current_risk_percentage, symbol):
+def adjust_risk_for_gpt_sentiment(current_risk_percentage, symbol, bucket=None):
     """
     Ajusta el riesgo basado en sentimiento de GPT:
       + aumenta si bullish, - reduce si bearish.
+    Con 'bucket' (ver candle_bucket) se reutiliza la respuesta cacheada de esa vela.
     """
-    result = analyze_symbol(symbol)
+    result = _sentiment(symbol, bucket) if bucket is not None else analyze_symbol(symbol)
     direction = result.get("direction", "neutral").lower()
     confidence = result.get("confidence", 50) / 100
     if direction == "bearish":
         new_risk = max(0, current_risk_percentage * (1 - confidence))
-        logger.info(f"Sentimiento GPT bearish ({confidence:.0%}), riesgo {new_risk:.2%}")
+        logger.info("Sentimiento GPT bearish (%.0f%%), riesgo %.2f%%", confidence * 100, new_risk * 100)
         return new_risk
     elif direction == "bullish":
         max_risk = getattr(config, "MAX_RISK_PER_TRADE", 0.02)
         new_risk = min(max_risk, current_risk_percentage * (1 + confidence))
-        logger.info(f"Sentimiento GPT bullish ({confidence:.0%}), riesgo {new_risk:.2%}")
+        logger.info("Sentimiento GPT bullish (%.0f%%), riesgo %.2f%%", confidence * 100, new_risk * 100)
         return new_risk
     return current_risk_percentage
 
+def adjusted_risk(atr_value, avg_atr_value, current_drawdown, sentiment):
+    """
+    Volatilidad, drawdown y sentimiento GPT en una sola pasada de factores multiplicativos
+    (mismo resultado que encadenar los adjust_risk_for_*):
+      - volatilidad: x0.5 si ATR > media * VOLATILITY_THRESHOLD_FACTOR
+      - drawdown: x(1 - dd / MAX_DRAWDOWN), 0 a partir del umbral
+      - sentimiento: x(1 ± confianza) según bullish/bearish; sólo el alcista se limita a
+        MAX_RISK_PER_TRADE, como en adjust_risk_for_gpt_sentiment
+    """
+    vol_factor = 0.5 if atr_value > avg_atr_value * _VOL_THRESHOLD else 1.0
+    dd_factor = max(0.0, 1.0 - current_drawdown / _MAX_DRAWDOWN)
+    confidence = sentiment.get("confidence", 50) / 100
+    sign = SENTIMENT_SIGN.get(sentiment.get("direction", "neutral").lower(), 0.0)
+    sent_factor = 1.0 + confidence * sign
+    risk = max(0.0, _RISK_PER_TRADE * vol_factor * dd_factor * sent_factor)
+    if sign > 0:
+        risk = min(_MAX_RISK, risk)
+    logger.debug("Riesgo ajustado: vol x%s, drawdown x%.4f, sentimiento x%.4f -> %.2f%%",
+                 vol_factor, dd_factor, sent_factor, risk * 100)
+    return risk
+
 def calculate_adaptive_position_size(entry_price, stop_loss_price, df_history, capital=None):
     """
     Calcula tamaño adaptativo considerando volatilidad, drawdown y GPT.
     """
-    # Tamaño base
-    size = calculate_position_size(entry_price, stop_loss_price, capital)
-    if size == 0:
+    # Capital y factor capital/distancia una sola vez: el tamaño base y el final sólo
+    # difieren en el porcentaje de riesgo
+    if capital is None:
+        capital = _get_capital()
+    if entry_price is None or stop_loss_price is None or capital <= 0:
+        logger.error("Parámetros inválidos para calcular tamaño de posición.")
+        return 0
+    size_factor = _raw_size_factor(entry_price, stop_loss_price, capital)
+    if size_factor is None:
         return 0
 
-    # ATR y drawdown histórico
-    atr_value = df_history['atr'].iloc[-1]
-    avg_atr_value = df_history['atr'].mean()
-    current_drawdown = df_history['drawdown'].iloc[-1]  # Asumir columna 'drawdown'
-    max_dd = getattr(config, "MAX_DRAWDOWN", 0.2)
-
-    # Ajustes de riesgo
-    risk_per_trade = config.RISK_PER_TRADE
-    risk = adjust_risk_for_volatility(risk_per_trade, atr_value, avg_atr_value)
-    risk = adjust_risk_for_drawdown(risk, current_drawdown, max_dd)
-    risk = adjust_risk_for_gpt_sentiment(risk, config.TRADING_PAIR)
-
-    # Recalcular tamaño con nuevo riesgo
-    adaptive_size = calculate_position_size(entry_price, stop_loss_price, capital, risk)
-    logger.info(f"Tamaño adaptativo final: {adaptive_size:.8f}")
+    # Tamaño base (descartar antes de consultar a GPT)
+    if _round_size(size_factor, _RISK_PER_TRADE) == 0:
+        return 0
+
+    # ATR y drawdown histórico (directamente sobre los arrays numpy, sin Series intermedias)
+    atr = df_history['atr'].to_numpy()
+    atr_value = atr[-1]
+    avg_atr_value = np.nanmean(atr) # Igual que Series.mean(): ignora NaN iniciales
+    current_drawdown = df_history['drawdown'].to_numpy()[-1]  # Asumir columna 'drawdown'
+
+    # Ajustes de riesgo fusionados (sentimiento GPT cacheado por vela)
+    sentiment = cached_sentiment(config.TRADING_PAIR, df_history)
+    risk = adjusted_risk(atr_value, avg_atr_value, current_drawdown, sentiment)
+
+    # Tamaño con el riesgo ajustado, sobre el mismo factor
+    adaptive_size = _round_size(size_factor, risk) if risk > 0 else 0
+    logger.info("Tamaño adaptativo final: %.8f", adaptive_size)
     return adaptive_size
 
 # Fin de risk_manager.py
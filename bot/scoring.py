@@ -1,58 +1,52 @@
-import pandas as pd
 from bot import config
 from bot.utils import logger
-from bot import strategies
+from bot import risk_manager
+
+# --- 1. Factores y Ponderaciones ---
+# Pesos leídos una vez al importar (sin búsquedas de atributos en config por llamada)
+_RSI_W = config.RSI_WEIGHT
+_MACD_W = config.MACD_WEIGHT
+_SENT_W = config.GPT_SENTIMENT_WEIGHT
+# Escalas plegadas con los pesos: (rsi - 50) / 50 * w == rsi * (0.02 * w) - w; macd / 10 * w == macd * (0.1 * w)
+_RSI_SCALE = 0.02 * _RSI_W
+_RSI_BIAS = -_RSI_W
+_MACD_SCALE = 0.1 * _MACD_W
+
+def _gpt_sentiment(symbol, df_with_indicators):
+    """
+    Sentimiento GPT de symbol en la escala -1 a 1 (confianza con el signo de la dirección).
+    Usa la caché por (símbolo, vela) de risk_manager: puntuar varias veces la misma vela no
+    repite la consulta a GPT y dos pares de la misma vela no comparten respuesta.
+    """
+    result = risk_manager.cached_sentiment(symbol, df_with_indicators)
+    direction = result.get("direction", "neutral").lower()
+    return risk_manager.SENTIMENT_SIGN.get(direction, 0.0) * result.get("confidence", 50) / 100
 
-def calculate_weighted_score(df_with_indicators):
+def calculate_weighted_score(df_with_indicators, symbol=None):
     """
     Calcula una puntuación ponderada basada en diferentes factores.
+    symbol: par del sentimiento GPT (por defecto config.TRADING_PAIR).
     """
-    try:
-        last = df_with_indicators.iloc[-1]
-    except IndexError:
+    if df_with_indicators.empty:
         logger.warning("No hay datos suficientes para calcular la puntuación.")
         return 0, {}
 
-    # --- 1. Definir Factores y Ponderaciones ---
-    factors = {
-        "rsi": {"weight": config.RSI_WEIGHT, "value": last['RSI']},
-        "macd": {"weight": config.MACD_WEIGHT, "value": last['MACD']},
-        "gpt_sentiment": {"weight": config.GPT_SENTIMENT_WEIGHT, "value": strategies.get_gpt_sentiment(df_with_indicators)}
-        # Añade más factores aquí
-    }
-
-    # --- 2. Escala de Puntuación para Cada Factor ---
-    # (Ejemplo: escala lineal para RSI, MACD y GPT Sentiment)
-    def scale_rsi(rsi_value):
-        # Escala RSI de 0 a 100 a -1 a 1
-        return (rsi_value - 50) / 50
-
-    def scale_macd(macd_value):
-        # Escala MACD (asumiendo que los valores positivos son alcistas y negativos bajistas)
-        return macd_value / 10  # Ajusta el divisor según la escala típica de MACD
+    # Sólo la última vela de cada columna (sin construir la Series de df.iloc[-1]), como float nativo
+    rsi_value = float(df_with_indicators['RSI'].to_numpy()[-1])
+    macd_value = float(df_with_indicators['MACD'].to_numpy()[-1])
+    # Sin peso para GPT no se consulta (el factor sería 0 de todos modos)
+    sentiment_score = _gpt_sentiment(symbol or config.TRADING_PAIR, df_with_indicators) if _SENT_W else 0.0
 
-    def scale_gpt_sentiment(sentiment_score):
-        # GPT Sentiment ya está en una escala de -1 a 1 (asumiendo)
-        return sentiment_score
+    # --- 2. Escala de Puntuación para Cada Factor (multiplicaciones por constantes, sin divisiones) ---
+    # RSI de 0 a 100 a -1 a 1; MACD / 10 (ajustar el divisor según la escala típica de MACD);
+    # GPT Sentiment ya está en una escala de -1 a 1 (asumiendo)
+    rsi_score = rsi_value * _RSI_SCALE + _RSI_BIAS
+    macd_score = macd_value * _MACD_SCALE
+    sentiment_weighted = sentiment_score * _SENT_W
 
     # --- 3. Calcular Puntuaciones Ponderadas ---
-    weighted_scores = {}
-    total_score = 0
-
-    for factor_name, factor_data in factors.items():
-        weight = factor_data["weight"]
-        value = factor_data["value"]
-        score = 0
-
-        if factor_name == "rsi":
-            score = scale_rsi(value) * weight
-        elif factor_name == "macd":
-            score = scale_macd(value) * weight
-        elif factor_name == "gpt_sentiment":
-            score = scale_gpt_sentiment(value) * weight
-
-        weighted_scores[factor_name] = score
-        total_score += score
+    total_score = rsi_score + macd_score + sentiment_weighted
+    weighted_scores = {"rsi": rsi_score, "macd": macd_score, "gpt_sentiment": sentiment_weighted} # Añade más factores aquí
 
-    logger.info(f"Puntuaciones ponderadas: {weighted_scores}, Puntuación total: {total_score}")
-    return total_score, weighted_scores
\ No newline at end of file
+    logger.info("Puntuaciones ponderadas: %s, Puntuación total: %s", weighted_scores, total_score)
+    return total_score, weighted_scores
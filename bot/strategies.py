@@ -1,94 +1,519 @@
 # -*- coding: utf-8 -*-
+import logging
+import multiprocessing
 from bot import config
 from bot.utils import logger
+from bot._njit import njit, prange, NUMBA_AVAILABLE
+from bot.candles import Candles
+import numpy as np
 import pandas as pd
-from typing import Dict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import repeat
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None # Sin bottleneck se usan las ventanas móviles de pandas
 
 # Constantes para el Semáforo
 SIGNAL_GREEN = "VERDE"
 SIGNAL_RED = "ROJO"
 SIGNAL_NONE = "NINGUNA"
+# (Estado_Semáforo, Detalles_Señal): texto si no hay operación, dict con entrada/SL/TP si la hay
+Signal = Tuple[str, Union[str, Dict]]
 
-def check_reversal_signal(df_with_indicators):
+def required_candles() -> int:
     """
-    Evalúa la última vela del DataFrame para una señal de Reversión.
-    Basado en Conceptos Trading.pdf y Guía Completa.pdf.
-    Retorna: (Estado_Semáforo, Detalles_Señal), ej: (SIGNAL_GREEN, "Reversión Alcista - Vela Envolvente + RSI < 30 + Vol Alto")
+    Número máximo de velas que leen las funciones de señal (guardas de longitud + lookback).
+    Pasar más historial no cambia el resultado: permite usar ventanas acotadas.
     """
-    if df_with_indicators is None or len(df_with_indicators) < max(config.EMA_FAST_PERIOD, config.SMA_SLOW_PERIOD, config.SMA_TREND_PERIOD, 5):
-        return SIGNAL_NONE, "Datos insuficientes"
+    return max(config.EMA_FAST_PERIOD, config.SMA_SLOW_PERIOD, config.SMA_TREND_PERIOD, 5,
+               config.BREAKOUT_LOOKBACK_PERIOD + 1)
 
-    # Usar las últimas 2 velas para comparación
-    try:
-        prev = df_with_indicators.iloc[-2]
-        last = df_with_indicators.iloc[-1]
-    except IndexError:
-        return SIGNAL_NONE, "Insuficientes velas recientes"
+def _shift(values):
+    """Valores de la vela anterior (NaN en la primera)."""
+    return np.concatenate((np.full(1, np.nan, dtype=values.dtype), values[:-1]))
 
-    # --- Evaluar Condiciones para Reversión Alcista ---
-    # (La lógica para Reversión Bajista sería simétrica)
-    score = 0
-    details = []
+def breakout_levels(highs, lows, volumes):
+    """
+    Precalcula en O(N) (bottleneck.move_max/move_min/move_mean) los niveles de rotura de
+    todas las velas: la entrada t contiene máximo, mínimo y volumen medio de las
+    BREAKOUT_LOOKBACK_PERIOD velas anteriores a t (las que usa check_breakout_signal).
+    Retorna dict de arrays {'high', 'low', 'volume_mean'}.
+    """
+    window = config.BREAKOUT_LOOKBACK_PERIOD
+    volumes = np.asarray(volumes, dtype=np.float64)
+    if bn is not None:
+        rolling_high = bn.move_max(highs, window)
+        rolling_low = bn.move_min(lows, window)
+        rolling_volume = bn.move_mean(volumes, window)
+    else:
+        rolling_high = pd.Series(highs).rolling(window).max().to_numpy()
+        rolling_low = pd.Series(lows).rolling(window).min().to_numpy()
+        rolling_volume = pd.Series(volumes).rolling(window).mean().to_numpy()
 
-    # 1. Contexto de Caída y Sobreextensión: Precio bajo MAs? (Simplificado)
-    is_extended_down = (last['close'] < prev['EMA_fast']) and (last['close'] < prev['SMA_slow'])
-    if is_extended_down:
-        score += 1
-        details.append("Precio bajo MAs")
-        # Podría mejorarse midiendo distancia % a las MAs
+    # La ventana termina en la vela anterior a t
+    return {'high': _shift(rolling_high), 'low': _shift(rolling_low), 'volume_mean': _shift(rolling_volume)}
 
-    # 2. Nivel de Soporte Clave: (Difícil de automatizar sin análisis previo)
-    # Placeholder: Se podría añadir lógica si se precalculan soportes. Por ahora, omitido para puntuación.
+class BreakoutState:
+    """
+    Niveles de rotura en streaming para un par: máximo/mínimo del lookback con deques
+    monótonas y volumen medio con suma móvil, actualizados en O(1) amortizado por vela.
+    La ventana contiene las BREAKOUT_LOOKBACK_PERIOD velas anteriores a la última del df.
+    """
+    __slots__ = ('window', 'highs', 'lows', 'volumes', 'vol_sum', 'n', 'last_ts')
+
+    def __init__(self, window):
+        self.window = window
+        self.highs = deque() # (n, high) con high decreciente: highs[0] es el máximo
+        self.lows = deque()  # (n, low) con low creciente: lows[0] es el mínimo
+        self.volumes = deque(maxlen=window)
+        self.vol_sum = 0.0
+        self.n = 0
+        self.last_ts = None # Timestamp de la última vela añadida a la ventana
+
+    def push(self, high, low, volume):
+        """Añade una vela cerrada y expulsa la que sale del lookback."""
+        n = self.n
+        while self.highs and high >= self.highs[-1][1]:
+            self.highs.pop()
+        self.highs.append((n, high))
+        while self.lows and low <= self.lows[-1][1]:
+            self.lows.pop()
+        self.lows.append((n, low))
+        while self.highs[0][0] <= n - self.window:
+            self.highs.popleft()
+        while self.lows[0][0] <= n - self.window:
+            self.lows.popleft()
+        if len(self.volumes) == self.window:
+            self.vol_sum -= self.volumes[0]
+        self.volumes.append(volume)
+        self.vol_sum += volume
+        self.n = n + 1
+        if self.n % self.window == 0 or self.vol_sum != self.vol_sum:
+            # Resumar la ventana (O(1) amortizado): sin deriva de redondeo en un bot de larga
+            # duración y sin arrastrar un volumen NaN que ya salió del lookback
+            self.vol_sum = sum(self.volumes)
+
+    def levels(self):
+        """Niveles actuales en el formato de breakout_levels/check_breakout_signal."""
+        if self.n < self.window:
+            return {'high': np.nan, 'low': np.nan, 'volume_mean': np.nan}
+        return {'high': self.highs[0][1], 'low': self.lows[0][1], 'volume_mean': self.vol_sum / self.window}
+
+_breakout_states: Dict[str, BreakoutState] = {} # pair -> BreakoutState
+
+def update_breakout_levels(pair, df):
+    """
+    Niveles de rotura de la última vela de df (los mismos que calcula check_breakout_signal
+    sin 'levels'), actualizando el estado del par sólo con las velas nuevas.
+    Si hay un hueco respecto a la última vela vista se reconstruye la ventana desde df.
+    """
+    window = config.BREAKOUT_LOOKBACK_PERIOD
+    state = _breakout_states.get(pair)
+    end = len(df) - 1 # La última vela (en curso) no entra en su propio lookback
+    start = None
+    if state is not None and state.last_ts is not None:
+        start = df.index.searchsorted(state.last_ts, side='right')
+        if start == 0 or start > end or df.index[start - 1] != state.last_ts or end - start > window:
+            start = None # Hueco, datos reiniciados o anteriores a la ventana
+    if start is None:
+        state = _breakout_states[pair] = BreakoutState(window)
+        start = max(0, end - window)
+
+    if start < end:
+        block = df.iloc[start:end][['high', 'low', 'volume']].to_numpy(np.float64)
+        for high, low, volume in block.tolist():
+            state.push(high, low, volume)
+        state.last_ts = df.index[end - 1]
+    return state.levels()
+
+_column_positions: Dict[Tuple, Optional[np.ndarray]] = {} # (columnas del df, columnas pedidas) -> posiciones (get_indexer es caro por llamada)
+
+def _tail_block(df, columns, n):
+    """
+    Últimas n velas de 'columns' como un único ndarray float64 (filas = velas).
+    Sustituye los df.iloc[-1]/iloc[-2] (una Series por fila) de las funciones de señal:
+    convierte la cola entera y selecciona las columnas por posición, sin construir el
+    DataFrame intermedio de df[columnas]. Acepta también Candles (SoA del ciclo en vivo) y
+    polars.DataFrame (columnar, la selección y la conversión de la cola no pasan por el
+    BlockManager de pandas).
+    """
+    if isinstance(df, Candles):
+        return df.tail_block(columns, n)
+    if type(df).__module__.startswith('polars'):
+        return df.tail(n).select(list(columns)).to_numpy().astype(np.float64, copy=False)
+    key = (tuple(df.columns), columns)
+    positions = _column_positions.get(key)
+    if positions is None:
+        positions = df.columns.get_indexer(list(columns)) if df.columns.is_unique else None
+        if positions is not None and (positions < 0).any():
+            positions = None # Falta alguna columna: la selección por nombre lanza el KeyError habitual
+        _column_positions[key] = positions
+    tail = df.iloc[-n:]
+    if positions is not None:
+        try:
+            return tail.to_numpy(np.float64)[:, positions]
+        except (TypeError, ValueError):
+            pass # Columnas no numéricas en df: seleccionar antes de convertir
+    return tail[list(columns)].to_numpy(np.float64)
+
+def _lookback_levels(block):
+    """Máximo, mínimo y volumen medio del lookback de rotura (todas las filas del bloque salvo la última)."""
+    lookback = block[:-1]
+    return {'high': float(np.nanmax(lookback[:, _B_HIGH])), 'low': float(np.nanmin(lookback[:, _B_LOW])),
+            'volume_mean': float(np.nanmean(lookback[:, _B_VOLUME]))}
+
+# --- Kernels de puntuación (Numba) ---
+# Las condiciones de cada señal son aritmética escalar sobre la(s) última(s) vela(s):
+# se evalúan compiladas y devuelven (score, flags); flags indica qué detalles añadir.
+_REVERSAL_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'EMA_fast', 'SMA_slow',
+                     'Volume_MA', 'RSI', 'STOCHk', 'STOCHd')
+_OPEN, _HIGH, _LOW, _CLOSE, _VOLUME, _EMA_FAST, _SMA_SLOW, _VOLUME_MA, _RSI, _STOCHK, _STOCHD = range(11)
+# Bits de criterio (cada uno suma 1 al score) y bits que sólo detallan el texto
+_REV_EXTENDED, _REV_CANDLE, _REV_VOLUME, _REV_OSCILLATOR, _REV_ENGULFING, _REV_LOWER_WICK, \
+    _REV_RSI, _REV_STOCH, _REV_DIVERGENCE = (1 << k for k in range(9))
+_REVERSAL_CRITERIA = (_REV_EXTENDED, _REV_CANDLE, _REV_VOLUME, _REV_OSCILLATOR) # Orden de los detalles
+_REVERSAL_MARKS = (_REV_ENGULFING, _REV_LOWER_WICK, _REV_RSI, _REV_STOCH, _REV_DIVERGENCE)
+
+@njit(cache=True)
+def _reversal_score(prev, last, rsi_oversold, stoch_oversold):
+    """
+    Criterios de Reversión Alcista sobre las dos últimas velas (filas en orden _REVERSAL_COLUMNS).
+    Sin ramas por criterio: cada condición es un booleano, score es su suma y flags sus bits.
+    """
+    # 1. Contexto de Caída y Sobreextensión: Precio bajo MAs? (Simplificado)
+    is_extended_down = (last[_CLOSE] < prev[_EMA_FAST]) & (last[_CLOSE] < prev[_SMA_SLOW])
 
     # 3. Vela de Giro Alcista: Envolvente o Martillo con mecha inferior
-    is_bullish_candle = last['close'] > last['open']
-    is_prev_bearish = prev['close'] < prev['open']
-    is_engulfing = is_bullish_candle and is_prev_bearish and \
-                   last['close'] > prev['open'] and last['open'] < prev['close'] # [source: 414, 830]
-
+    is_bullish_candle = last[_CLOSE] > last[_OPEN]
+    is_prev_bearish = prev[_CLOSE] < prev[_OPEN]
+    is_engulfing = is_bullish_candle & is_prev_bearish & \
+                   (last[_CLOSE] > prev[_OPEN]) & (last[_OPEN] < prev[_CLOSE]) # [source: 414, 830]
     # Mecha inferior significativa (ej. > 30% del rango total)
-    total_range = last['high'] - last['low']
-    lower_wick = min(last['open'], last['close']) - last['low']
-    has_lower_wick = total_range > 0 and (lower_wick / total_range) > 0.3 # [source: 411, 812]
-
-    is_reversal_candle = is_bullish_candle and (is_engulfing or has_lower_wick)
-    if is_reversal_candle:
-        score += 1
-        details.append(f"{'Envolvente' if is_engulfing else ''}{'+' if is_engulfing and has_lower_wick else ''}{'Mecha Inferior' if has_lower_wick else ''}")
+    # (sin división: wick/range > 0.3 <=> 10*wick > 3*range con range > 0)
+    o, c, l = last[_OPEN], last[_CLOSE], last[_LOW]
+    total_range = last[_HIGH] - l
+    lower_wick = (c if c < o else o) - l
+    has_lower_wick = (total_range > 0.0) & (lower_wick * 10.0 > total_range * 3.0) # [source: 411, 812]
+    is_reversal_candle = is_bullish_candle & (is_engulfing | has_lower_wick)
 
-    # 4. Volumen Alto en Vela de Giro: Comparado con la media
-    is_volume_high = last['volume'] > last['Volume_MA'] * 1.1 # > 110% de la media [source: 427, 813]
-    if is_volume_high:
-        score += 1
-        details.append("Volumen Alto")
+    # 4. Volumen Alto en Vela de Giro: > 110% de la media [source: 427, 813]
+    is_volume_high = last[_VOLUME] > last[_VOLUME_MA] * 1.1
 
     # 5. Indicadores en Sobreventa / Divergencia
-    is_rsi_oversold = last['RSI'] < config.RSI_OVERSOLD # [source: 446]
-    is_stoch_oversold = last['STOCHk'] < config.STOCH_OVERSOLD and last['STOCHd'] < config.STOCH_OVERSOLD # [source: 459]
+    is_rsi_oversold = last[_RSI] < rsi_oversold # [source: 446]
+    is_stoch_oversold = (last[_STOCHK] < stoch_oversold) & (last[_STOCHD] < stoch_oversold) # [source: 459]
+    # Divergencia Alcista RSI Simple: Precio hizo nuevo mínimo, RSI no [source: 442, 814]
+    has_rsi_divergence = (last[_LOW] < prev[_LOW]) & (last[_RSI] > prev[_RSI])
+    is_oscillator = is_rsi_oversold | is_stoch_oversold | has_rsi_divergence
+
+    score = int(is_extended_down) + int(is_reversal_candle) + int(is_volume_high) + int(is_oscillator)
+    flags = (is_extended_down * _REV_EXTENDED | is_reversal_candle * _REV_CANDLE |
+             is_volume_high * _REV_VOLUME | is_oscillator * _REV_OSCILLATOR |
+             is_engulfing * _REV_ENGULFING | has_lower_wick * _REV_LOWER_WICK |
+             is_rsi_oversold * _REV_RSI | is_stoch_oversold * _REV_STOCH | has_rsi_divergence * _REV_DIVERGENCE)
+    return score, flags
+
+def _reversal_details(flags: int) -> List[str]:
+    """Textos de detalle de la Reversión Alcista a partir de los flags de _reversal_score."""
+    is_engulfing = bool(flags & _REV_ENGULFING)
+    has_lower_wick = bool(flags & _REV_LOWER_WICK)
+    labels = (
+        "Precio bajo MAs",
+        f"{'Envolvente' if is_engulfing else ''}{'+' if is_engulfing and has_lower_wick else ''}{'Mecha Inferior' if has_lower_wick else ''}",
+        "Volumen Alto",
+        f"{'RSI<30 ' if flags & _REV_RSI else ''}{'Stoch<20 ' if flags & _REV_STOCH else ''}{'DivRSI ' if flags & _REV_DIVERGENCE else ''}",
+    )
+    return [label for label, bit in zip(labels, _REVERSAL_CRITERIA) if flags & bit]
+
+_BREAKOUT_COLUMNS = ('high', 'low', 'close', 'volume', 'RSI', 'SMA_trend')
+_B_HIGH, _B_LOW, _B_CLOSE, _B_VOLUME, _B_RSI, _B_SMA_TREND = range(6)
+_BRK_BREAKOUT, _BRK_DRY_VOLUME, _BRK_VOLUME, _BRK_UPTREND, _BRK_RSI_OK = (1 << k for k in range(5))
+_BREAKOUT_CRITERIA = (_BRK_BREAKOUT, _BRK_DRY_VOLUME, _BRK_VOLUME, _BRK_UPTREND, _BRK_RSI_OK)
+
+@njit(cache=True)
+def _breakout_score(consolidation_high, avg_lookback_volume, last_close, last_volume,
+                    last_rsi, last_sma_trend, volume_factor):
+    """Criterios de Rotura Alcista sobre la última vela y los niveles del lookback (sin ramas)."""
+    is_breakout_candle = last_close > consolidation_high # 2. Ruptura Clara del Nivel
+    volume_contracting = True # 3. Volumen Seco en Consolidación: placeholder, siempre suma
+    is_volume_high = last_volume > avg_lookback_volume * volume_factor # 4. Volumen Alto en la Ruptura [source: 562, 819]
+    is_uptrend = last_close > last_sma_trend # 5. Alineación con Tendencia Principal [source: 565]
+    is_rsi_ok = last_rsi < 85 # 6. Confirmaciones Adicionales (simplificado: RSI no > 85)
+
+    score = int(is_breakout_candle) + int(volume_contracting) + int(is_volume_high) + int(is_uptrend) + int(is_rsi_ok)
+    flags = (is_breakout_candle * _BRK_BREAKOUT | volume_contracting * _BRK_DRY_VOLUME |
+             is_volume_high * _BRK_VOLUME | is_uptrend * _BRK_UPTREND | is_rsi_ok * _BRK_RSI_OK)
+    return score, flags
+
+@njit(cache=True)
+def _reversal_short_score(prev, last, rsi_overbought, stoch_overbought):
+    """
+    Criterios de Reversión BAJISTA (simétricos a _reversal_score), con los mismos bits de
+    flags; la mecha superior usa _REV_LOWER_WICK.
+    """
+    # 1. Contexto de Subida y Sobrecompra: Precio sobre MAs?
+    is_extended_up = (last[_CLOSE] > prev[_EMA_FAST]) & (last[_CLOSE] > prev[_SMA_SLOW])
 
-    # Divergencia Alcista RSI Simple: Precio hizo nuevo mínimo, RSI no
-    made_lower_low = last['low'] < prev['low']
-    rsi_higher_low = last['RSI'] > prev['RSI']
-    has_rsi_divergence = made_lower_low and rsi_higher_low # [source: 442, 814]
+    # 3. Vela de Giro Bajista: Envolvente o Estrella Fugaz con mecha superior
+    is_bearish_candle = last[_CLOSE] < last[_OPEN]
+    is_prev_bullish = prev[_CLOSE] > prev[_OPEN]
+    is_engulfing = is_bearish_candle & is_prev_bullish & \
+                   (last[_CLOSE] < prev[_OPEN]) & (last[_OPEN] > prev[_CLOSE])
+    # Mecha superior significativa (sin división: wick/range > 0.3 <=> 10*wick > 3*range)
+    o, c, h = last[_OPEN], last[_CLOSE], last[_HIGH]
+    total_range = h - last[_LOW]
+    upper_wick = h - (c if c > o else o)
+    has_upper_wick = (total_range > 0.0) & (upper_wick * 10.0 > total_range * 3.0)
+    is_reversal_candle = is_bearish_candle & (is_engulfing | has_upper_wick)
+
+    # 4. Volumen Alto en Vela de Giro
+    is_volume_high = last[_VOLUME] > last[_VOLUME_MA] * 1.1
+
+    # 5. Indicadores en Sobrecompra / Divergencia Bajista RSI Simple (nuevo máximo, RSI no)
+    is_rsi_overbought = last[_RSI] > rsi_overbought
+    is_stoch_overbought = (last[_STOCHK] > stoch_overbought) & (last[_STOCHD] > stoch_overbought)
+    has_rsi_divergence = (last[_HIGH] > prev[_HIGH]) & (last[_RSI] < prev[_RSI])
+    is_oscillator = is_rsi_overbought | is_stoch_overbought | has_rsi_divergence
+
+    score = int(is_extended_up) + int(is_reversal_candle) + int(is_volume_high) + int(is_oscillator)
+    flags = (is_extended_up * _REV_EXTENDED | is_reversal_candle * _REV_CANDLE |
+             is_volume_high * _REV_VOLUME | is_oscillator * _REV_OSCILLATOR |
+             is_engulfing * _REV_ENGULFING | has_upper_wick * _REV_LOWER_WICK |
+             is_rsi_overbought * _REV_RSI | is_stoch_overbought * _REV_STOCH | has_rsi_divergence * _REV_DIVERGENCE)
+    return score, flags
+
+@njit(cache=True)
+def _breakout_short_score(consolidation_low, avg_lookback_volume, last_close, last_volume,
+                          last_rsi, last_sma_trend, volume_factor):
+    """Criterios de Rotura BAJISTA (simétricos a _breakout_score); la tendencia bajista usa _BRK_UPTREND."""
+    is_breakdown_candle = last_close < consolidation_low # 2. Ruptura Clara del Nivel
+    volume_contracting = True # 3. Volumen Seco en Consolidación: placeholder, siempre suma
+    is_volume_high = last_volume > avg_lookback_volume * volume_factor # 4. Volumen Alto en la Ruptura
+    is_downtrend = last_close < last_sma_trend # 5. Alineación con Tendencia Principal (SMA_trend)
+    is_rsi_ok = last_rsi > 20 # 6. Confirmaciones Adicionales: RSI no esté muy bajo
+
+    score = int(is_breakdown_candle) + int(volume_contracting) + int(is_volume_high) + int(is_downtrend) + int(is_rsi_ok)
+    flags = (is_breakdown_candle * _BRK_BREAKOUT | volume_contracting * _BRK_DRY_VOLUME |
+             is_volume_high * _BRK_VOLUME | is_downtrend * _BRK_UPTREND | is_rsi_ok * _BRK_RSI_OK)
+    return score, flags
+
+def _specialize_breakout_kernel(kernel, volume_factor: float):
+    """
+    kernel (_breakout_score o _breakout_short_score) con volume_factor fijo: con Numba se
+    compila un kernel propio en el que el factor es un literal (LLVM lo propaga a la
+    comparación de volumen); sin Numba, un partial del kernel genérico.
+    """
+    if not NUMBA_AVAILABLE:
+        return partial(kernel, volume_factor=volume_factor)
+
+    @njit
+    def specialized(level, avg_lookback_volume, last_close, last_volume, last_rsi, last_sma_trend):
+        return kernel(level, avg_lookback_volume, last_close, last_volume, last_rsi, last_sma_trend, volume_factor)
+    return specialized
+
+@lru_cache(maxsize=None)
+def make_breakout_scorers(volume_factor: float) -> Tuple:
+    """
+    (_breakout_score, _breakout_short_score) especializados para un BREAKOUT_VOLUME_FACTOR
+    fijo, sin el argumento volume_factor. Cacheado: cada factor se compila una sola vez.
+    """
+    return (_specialize_breakout_kernel(_breakout_score, volume_factor),
+            _specialize_breakout_kernel(_breakout_short_score, volume_factor))
+
+def _breakout_details(flags: int, consolidation_high: float) -> List[str]:
+    """Textos de detalle de la Rotura Alcista a partir de los flags de _breakout_score."""
+    labels = (
+        f"Ruptura de {consolidation_high:.2f}",
+        "Volumen Seco (Placeholder)", # (Requiere una definición más robusta de "volumen seco")
+        f"Volumen Ruptura Alto (>{config.BREAKOUT_VOLUME_FACTOR:.1f}x)",
+        "Tendencia Principal Alcista",
+        "RSI no extremo",
+    )
+    return [label for label, bit in zip(labels, _BREAKOUT_CRITERIA) if flags & bit]
+
+def _reversal_short_details(flags: int) -> List[str]:
+    """Textos de detalle de la Reversión Bajista (mismos bits que la alcista, mecha superior en _REV_LOWER_WICK)."""
+    is_engulfing = bool(flags & _REV_ENGULFING)
+    has_upper_wick = bool(flags & _REV_LOWER_WICK)
+    labels = (
+        "Precio sobre MAs (SHORT)",
+        f"Vela Bajista{'Envolvente' if is_engulfing else ''}{'+' if is_engulfing and has_upper_wick else ''}{'Mecha Superior' if has_upper_wick else ''} (SHORT)",
+        "Volumen Alto (SHORT)",
+        f"{'RSI>70 ' if flags & _REV_RSI else ''}{'Stoch>80 ' if flags & _REV_STOCH else ''}{'DivRSI ' if flags & _REV_DIVERGENCE else ''} (SHORT)",
+    )
+    return [label for label, bit in zip(labels, _REVERSAL_CRITERIA) if flags & bit]
+
+def _breakout_short_details(flags: int, consolidation_low: float) -> List[str]:
+    """Textos de detalle de la Rotura Bajista (mismos bits que la alcista, tendencia bajista en _BRK_UPTREND)."""
+    labels = (
+        f"Ruptura BAJISTA de {consolidation_low:.2f}",
+        "Volumen Seco (Placeholder, SHORT)",
+        f"Volumen Ruptura Alto (>{config.BREAKOUT_VOLUME_FACTOR:.1f}x) (SHORT)",
+        "Tendencia Principal Bajista (SHORT)",
+        "RSI no extremo (SHORT)",
+    )
+    return [label for label, bit in zip(labels, _BREAKOUT_CRITERIA) if flags & bit]
 
-    if is_rsi_oversold or is_stoch_oversold or has_rsi_divergence:
-        score += 1
-        details.append(f"{'RSI<30 ' if is_rsi_oversold else ''}{'Stoch<20 ' if is_stoch_oversold else ''}{'DivRSI ' if has_rsi_divergence else ''}")
+def _divergence_masks(low, rsi):
+    """Mínimo más bajo y RSI más alto que la vela anterior, por vela (la primera sin anterior: False)."""
+    made_lower_low = np.zeros(len(low), dtype=bool)
+    rsi_higher_low = np.zeros(len(rsi), dtype=bool)
+    np.less(low[1:], low[:-1], out=made_lower_low[1:])
+    np.greater(rsi[1:], rsi[:-1], out=rsi_higher_low[1:])
+    return made_lower_low, rsi_higher_low
+
+def compute_divergence_masks(df_with_indicators):
+    """
+    Máscaras de la divergencia alcista RSI simple para todas las velas en una pasada:
+    (made_lower_low, rsi_higher_low), arrays bool de longitud N.
+    """
+    return _divergence_masks(df_with_indicators['low'].to_numpy(np.float64),
+                             df_with_indicators['RSI'].to_numpy(np.float64))
+
+def check_reversal_signal_vectorized(df_with_indicators):
+    """
+    Versión vectorizada de los criterios de check_reversal_signal para todas las velas a la
+    vez (backtesting): una conversión a NumPy y comparaciones por columna completa.
+    Retorna (scores, flags): arrays int8 / int64 de longitud N; la entrada t evalúa la vela t
+    frente a la t-1, igual que check_reversal_signal sobre un df que termina en t.
+    """
+    # Predicados en float32 (la mitad de ancho de banda y el doble de carriles SIMD); los
+    # precios de entrada/SL/TP los lee check_reversal_signal en float64. Sólo puede diferir
+    # de la evaluación float64 en empates por debajo de la precisión float32.
+    o, h, l, c, v, ema_fast, sma_slow, volume_ma, rsi, stoch_k, stoch_d = \
+        df_with_indicators[list(_REVERSAL_COLUMNS)].to_numpy(np.float32).T
+    prev_o, prev_c = _shift(o), _shift(c)
+
+    is_extended_down = (c < _shift(ema_fast)) & (c < _shift(sma_slow))
+    is_bullish_candle = c > o
+    is_engulfing = is_bullish_candle & (prev_c < prev_o) & (c > prev_o) & (o < prev_c)
+    total_range = h - l
+    has_lower_wick = (total_range > 0) & ((np.minimum(o, c) - l) * 10.0 > total_range * 3.0)
+    is_reversal_candle = is_bullish_candle & (is_engulfing | has_lower_wick)
+    is_volume_high = v > volume_ma * 1.1
+    is_rsi_oversold = rsi < config.RSI_OVERSOLD
+    is_stoch_oversold = (stoch_k < config.STOCH_OVERSOLD) & (stoch_d < config.STOCH_OVERSOLD)
+    made_lower_low, rsi_higher_low = _divergence_masks(l, rsi)
+    has_rsi_divergence = made_lower_low & rsi_higher_low
+    is_oscillator = is_rsi_oversold | is_stoch_oversold | has_rsi_divergence
+
+    criteria = (is_extended_down, is_reversal_candle, is_volume_high, is_oscillator)
+    scores = np.add.reduce(np.stack(criteria), axis=0, dtype=np.int8) # Suma sin saltos de la matriz de criterios
+    flags = np.zeros(len(c), dtype=np.int64)
+    for flag, bit in zip(criteria + (is_engulfing, has_lower_wick, is_rsi_oversold, is_stoch_oversold, has_rsi_divergence),
+                         _REVERSAL_CRITERIA + _REVERSAL_MARKS):
+        flags |= flag * bit
+    return scores, flags
+
+def check_breakout_signal_vectorized(df_with_indicators, levels):
+    """
+    Versión vectorizada de los criterios de check_breakout_signal para todas las velas a la
+    vez (backtesting), con los niveles por vela de breakout_levels.
+    Retorna (scores, flags): arrays int8 / int64 de longitud N; la entrada t evalúa la vela t
+    frente a levels[t], igual que check_breakout_signal sobre un df que termina en t.
+    """
+    # Predicados en float32, como check_reversal_signal_vectorized
+    _, _, close, volume, rsi, sma_trend = df_with_indicators[list(_BREAKOUT_COLUMNS)].to_numpy(np.float32).T
+    is_breakout_candle = close > np.asarray(levels['high'], dtype=np.float32)
+    volume_contracting = np.ones(len(close), dtype=bool) # Placeholder, siempre suma
+    is_volume_high = volume > np.asarray(levels['volume_mean'], dtype=np.float32) * config.BREAKOUT_VOLUME_FACTOR
+    is_uptrend = close > sma_trend
+    is_rsi_ok = rsi < 85
+
+    criteria = (is_breakout_candle, volume_contracting, is_volume_high, is_uptrend, is_rsi_ok)
+    scores = np.add.reduce(np.stack(criteria), axis=0, dtype=np.int8) # Suma sin saltos de la matriz de criterios
+    flags = np.zeros(len(close), dtype=np.int64)
+    for flag, bit in zip(criteria, _BREAKOUT_CRITERIA):
+        flags |= flag * bit
+    return scores, flags
+
+def green_candidates(reversal_scored, breakout_scored):
+    """
+    Velas en las que check_reversal_signal o check_breakout_signal pueden dar SIGNAL_GREEN,
+    a partir de los (scores, flags) vectorizados. En el resto no hace falta evaluarlas.
+    """
+    threshold = config.REVERSAL_CONFIDENCE_THRESHOLD
+    reversal_scores, _ = reversal_scored
+    breakout_scores, breakout_flags = breakout_scored
+    return (reversal_scores >= threshold) | (((breakout_flags & _BRK_BREAKOUT) != 0) & (breakout_scores >= threshold))
+
+class SignalParams(NamedTuple):
+    """
+    Constantes de config que usan las funciones de señal, leídas una vez (sin búsquedas de
+    atributos en config por llamada) y explícitas para poder enviarlas a otro proceso.
+    """
+    rsi_oversold: float
+    stoch_oversold: float
+    confidence_threshold: int
+    tp_rr_ratio_1: float
+    tp_rr_ratio_2: float
+    partial_tp: bool
+    rsi_overbought: float
+    stoch_overbought: float
+    breakout_volume_factor: float
+    breakout_rows: int # BREAKOUT_LOOKBACK_PERIOD + 1
+    reversal_rows: int # Velas mínimas para las señales de reversión
+
+# Kernels de rotura especializados para el factor de volumen de _params (ver refresh_params)
+_breakout_scorer: Callable = _breakout_score
+_breakout_short_scorer: Callable = _breakout_short_score
+
+def refresh_params() -> SignalParams:
+    """
+    Relee config en _params y los kernels de rotura especializados (llamar si config cambia
+    en tiempo de ejecución) y retorna _params.
+    """
+    global _params
+    _params = SignalParams(config.RSI_OVERSOLD, config.STOCH_OVERSOLD, config.REVERSAL_CONFIDENCE_THRESHOLD,
+                           config.TP_RR_RATIO_1, config.TP_RR_RATIO_2, config.ENABLE_PARTIAL_TP,
+                           config.RSI_OVERBOUGHT, config.STOCH_OVERBOUGHT, config.BREAKOUT_VOLUME_FACTOR,
+                           config.BREAKOUT_LOOKBACK_PERIOD + 1,
+                           max(config.EMA_FAST_PERIOD, config.SMA_SLOW_PERIOD, config.SMA_TREND_PERIOD, 5))
+    global _breakout_scorer, _breakout_short_scorer
+    _breakout_scorer, _breakout_short_scorer = make_breakout_scorers(_params.breakout_volume_factor)
+    return _params
+
+_params: SignalParams = refresh_params()
+
+def _has_reversal_data(df_with_indicators: Optional[pd.DataFrame]) -> bool:
+    return df_with_indicators is not None and len(df_with_indicators) >= _params.reversal_rows
+
+def _reversal_kernel(block: np.ndarray, params: SignalParams,
+                     scored: Optional[Tuple] = None) -> Tuple[int, int, float, float, float, Optional[float]]:
+    """
+    Núcleo puro de check_reversal_signal: sin logging ni lecturas de config, apto para
+    ProcessPoolExecutor. block: últimas 2 velas (filas en orden _REVERSAL_COLUMNS).
+    Retorna (score, flags, entry_price, stop_loss, take_profit_1, take_profit_2).
+    """
+    prev, last = block
+    if scored is None:
+        score, flags = _reversal_score(prev, last, params.rsi_oversold, params.stoch_oversold)
+    else:
+        score, flags = scored
+    stop_loss_price = float(last[_LOW]) * (1 - 0.001) # Un poco por debajo del mínimo [source: 520]
+    entry_price = float(last[_CLOSE]) # Asumiendo entrada al cierre
+    # TP basado en R:R
+    risk_per_unit = entry_price - stop_loss_price
+    take_profit_price_1 = entry_price + params.tp_rr_ratio_1 * risk_per_unit
+    take_profit_price_2 = entry_price + params.tp_rr_ratio_2 * risk_per_unit if params.partial_tp else None
+    return int(score), int(flags), entry_price, stop_loss_price, take_profit_price_1, take_profit_price_2
+
+def _reversal_signal(result: Tuple[int, int, float, float, float, Optional[float]], params: SignalParams) -> Signal:
+    """Traduce la salida de _reversal_kernel a (Estado_Semáforo, Detalles_Señal) y la registra en el log."""
+    score, flags, entry_price, stop_loss_price, take_profit_price_1, take_profit_price_2 = result
 
     # --- Decisión del Semáforo ---
-    if score >= config.REVERSAL_CONFIDENCE_THRESHOLD:
+    if score >= params.confidence_threshold:
         signal_type = SIGNAL_GREEN
-        signal_details = f"Reversión Alcista ({score}/5): {', '.join(details)}"
+        signal_details = f"Reversión Alcista ({score}/5): {', '.join(_reversal_details(flags))}"
         logger.info(signal_details)
-        # Aquí también necesitaríamos calcular SL y TP propuestos
-        stop_loss_price = last['low'] * (1 - 0.001) # Un poco por debajo del mínimo [source: 520]
-        entry_price = last['close'] # Asumiendo entrada al cierre
-        # TP basado en R:R
-        risk_per_unit = entry_price - stop_loss_price
-        if risk_per_unit <= 0: return SIGNAL_NONE, "Distancia de stop inválida"
-        take_profit_price_1 = entry_price + config.TP_RR_RATIO_1 * risk_per_unit
-        take_profit_price_2 = entry_price + config.TP_RR_RATIO_2 * risk_per_unit if config.ENABLE_PARTIAL_TP else None
-        
+        if entry_price - stop_loss_price <= 0: return SIGNAL_NONE, "Distancia de stop inválida"
+
         return signal_type, {
             "strategy": "Reversal",
             "direction": "LONG",
@@ -100,86 +525,117 @@ def check_reversal_signal(df_with_indicators):
         }
     elif score > 0: # Si hay alguna condición pero no suficiente
          # Podríamos loggear como señal débil o ROJA, pero no operarla
-         logger.debug(f"Señal Reversión Débil ({score}/5) ignorada: {', '.join(details)}")
+         if logger.isEnabledFor(logging.DEBUG): # join de detalles sólo si se emite
+             logger.debug("Señal Reversión Débil (%d/5) ignorada: %s", score, ', '.join(_reversal_details(flags)))
          return SIGNAL_RED, f"Reversión Alcista Débil ({score}/5)"
     else:
         return SIGNAL_NONE, "Sin señal de reversión"
 
+def check_reversal_signal(df_with_indicators: Optional[pd.DataFrame], scored: Optional[Tuple] = None) -> Signal:
+    """
+    Evalúa la última vela del DataFrame para una señal de Reversión.
+    Basado en Conceptos Trading.pdf y Guía Completa.pdf.
+    scored: (score, flags) precalculados de la última vela (ver check_reversal_signal_vectorized)
+    para no reevaluar los criterios en cada llamada.
+    Retorna: (Estado_Semáforo, Detalles_Señal), ej: (SIGNAL_GREEN, "Reversión Alcista - Vela Envolvente + RSI < 30 + Vol Alto")
+    """
+    if not _has_reversal_data(df_with_indicators):
+        return SIGNAL_NONE, "Datos insuficientes"
 
-def check_breakout_signal(df_with_indicators):
+    # Usar las últimas 2 velas para comparación (un único bloque float64, sin Series por fila)
+    # (La lógica para Reversión Bajista sería simétrica)
+    params = _params
+    block = _tail_block(df_with_indicators, _REVERSAL_COLUMNS, 2)
+    return _reversal_signal(_reversal_kernel(block, params, scored), params)
+
+@njit(parallel=True, cache=True)
+def _reversal_scores_batch(blocks, rsi_oversold, stoch_oversold):
+    """_reversal_score de varios símbolos en paralelo (prange): blocks es (símbolos, 2 velas, columnas)."""
+    n = blocks.shape[0]
+    scores = np.empty(n, dtype=np.int64)
+    flags = np.empty(n, dtype=np.int64)
+    for i in prange(n):
+        score, flag = _reversal_score(blocks[i, 0], blocks[i, 1], rsi_oversold, stoch_oversold)
+        scores[i] = score
+        flags[i] = flag
+    return scores, flags
+
+def scan_reversal_signals(symbol_frames: Dict[str, Optional[pd.DataFrame]], max_workers: Optional[int] = None) -> Dict[str, Signal]:
+    """
+    check_reversal_signal para varios símbolos a la vez. Con Numba los criterios de todos
+    los símbolos se evalúan en una sola llamada paralela (prange, sin GIL); sin Numba, en un
+    ProcessPoolExecutor (sólo compensa el arranque de los procesos con muchos símbolos).
+    La traducción a semáforo y el logging se hacen en este proceso.
+    symbol_frames: {símbolo: df con indicadores}. Retorna {símbolo: (Estado_Semáforo, Detalles_Señal)}.
+    """
+    params = _params
+    symbols = [symbol for symbol, df in symbol_frames.items() if _has_reversal_data(df)]
+    blocks = [_tail_block(symbol_frames[symbol], _REVERSAL_COLUMNS, 2) for symbol in symbols]
+    results = {}
+    if blocks and NUMBA_AVAILABLE:
+        scores, flags = _reversal_scores_batch(np.stack(blocks), params.rsi_oversold, params.stoch_oversold)
+        for symbol, block, score, flag in zip(symbols, blocks, scores, flags):
+            results[symbol] = _reversal_signal(_reversal_kernel(block, params, (score, flag)), params)
+    elif blocks:
+        # spawn: un fork heredaría los hilos de Numba y del QueueListener del logging (bloqueos)
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            for symbol, result in zip(symbols, pool.map(_reversal_kernel, blocks, repeat(params))):
+                results[symbol] = _reversal_signal(result, params)
+    return {symbol: results.get(symbol, (SIGNAL_NONE, "Datos insuficientes")) for symbol in symbol_frames}
+
+
+def check_breakout_signal(df_with_indicators: Optional[pd.DataFrame], levels: Optional[Dict[str, float]] = None) -> Signal:
     """
     Evalúa la última vela para una señal de Rotura Alcista.
     Basado en Conceptos Trading.pdf y Guía Completa.pdf.
+    levels: niveles precalculados de la última vela (ver breakout_levels) para no
+    recalcular las ventanas del lookback en cada llamada.
     Retorna: (Estado_Semáforo, Detalles_Señal)
     """
-    if df_with_indicators is None or len(df_with_indicators) < config.BREAKOUT_LOOKBACK_PERIOD + 1:
+    if df_with_indicators is None or len(df_with_indicators) < _params.breakout_rows:
         return SIGNAL_NONE, "Datos insuficientes para breakout"
+    return _breakout_signal(lambda n: _tail_block(df_with_indicators, _BREAKOUT_COLUMNS, n), levels)
 
-    try:
-        lookback_candles = df_with_indicators.iloc[-(config.BREAKOUT_LOOKBACK_PERIOD + 1):-1]
-        last = df_with_indicators.iloc[-1]
-    except IndexError:
-        return SIGNAL_NONE, "Insuficientes velas recientes para breakout"
+def _breakout_signal(tail, levels):
+    """
+    Núcleo de check_breakout_signal. tail(n): últimas n velas en orden _BREAKOUT_COLUMNS
+    (sólo se piden las del lookback si hacen falta).
+    """
+    params = _params
+    # Predicado barato primero: sin cierre por encima del máximo de la vela anterior (que forma
+    # parte del lookback) no puede haber rotura y la señal es siempre NONE.
+    prev, last = tail(2).tolist() # floats nativos
+    _, _, last_close, last_volume, last_rsi, last_sma_trend = last
+    if last_close <= (prev[_B_HIGH] if levels is None else levels['high']):
+        return SIGNAL_NONE, "Sin señal de rotura"
+    if levels is None:
+        levels = _lookback_levels(tail(params.breakout_rows))
 
     # --- Evaluar Condiciones para Rotura Alcista ---
-    score = 0
-    details = []
-
-    # 1. Identificar Consolidación y Nivel de Ruptura
-    consolidation_high = lookback_candles['high'].max() # Máximo del rango reciente [source: 184]
-    # (Podría mejorarse detectando patrones específicos como triángulos)
-
-    # 2. Ruptura Clara del Nivel
-    is_breakout_candle = last['close'] > consolidation_high
-    if is_breakout_candle:
-        score += 1
-        details.append(f"Ruptura de {consolidation_high:.2f}")
-
-    # 3. Volumen Seco en Consolidación (Simplificado: volumen promedio reciente bajo?)
-    # (Esta parte requiere una definición más robusta de "volumen seco")
-    # Placeholder: Asumimos que si rompe, es suficiente por ahora
-    volume_contracting = True # Placeholder
-    if volume_contracting:
-        score += 1
-        details.append("Volumen Seco (Placeholder)")
-
-    # 4. Volumen Alto en la Ruptura
-    avg_lookback_volume = lookback_candles['volume'].mean()
-    is_breakout_volume_high = last['volume'] > avg_lookback_volume * config.BREAKOUT_VOLUME_FACTOR # [source: 562, 819]
-    if is_breakout_volume_high:
-        score += 1
-        details.append(f"Volumen Ruptura Alto (>{config.BREAKOUT_VOLUME_FACTOR:.1f}x)")
-
-    # 5. Alineación con Tendencia Principal (SMA_trend)
-    is_uptrend = last['close'] > last['SMA_trend'] # [source: 565]
-    if is_uptrend:
-        score += 1
-        details.append("Tendencia Principal Alcista")
-
-    # 6. Confirmaciones Adicionales (RSI no extremo, sin divergencia bajista)
-    # (Simplificado: solo chequear que RSI no esté > 85)
-    is_rsi_ok = last['RSI'] < 85
-    if is_rsi_ok:
-        score += 1
-        details.append("RSI no extremo")
+    consolidation_high = float(levels['high']) # Máximo del rango reciente [source: 184]
+    if last_close <= consolidation_high: # Sin vela de rotura no hace falta puntuar el resto
+        return SIGNAL_NONE, "Sin señal de rotura"
+    score, flags = _breakout_scorer(consolidation_high, float(levels['volume_mean']), last_close,
+                                    last_volume, last_rsi, last_sma_trend)
+    is_breakout_candle = bool(flags & _BRK_BREAKOUT)
 
     # --- Decisión del Semáforo ---
     # Umbral más alto para breakouts? Podría ser config.BREAKOUT_CONFIDENCE_THRESHOLD
-    breakout_threshold = config.REVERSAL_CONFIDENCE_THRESHOLD # Usamos el mismo por ahora
+    breakout_threshold = params.confidence_threshold # Usamos el mismo por ahora
     if is_breakout_candle and score >= breakout_threshold: # Requiere al menos la ruptura + N criterios
         signal_type = SIGNAL_GREEN
-        signal_details = f"Rotura Alcista ({score}/6): {', '.join(details)}"
+        signal_details = f"Rotura Alcista ({score}/6): {', '.join(_breakout_details(flags, consolidation_high))}"
         logger.info(signal_details)
 
         # Calcular SL y TP
         stop_loss_price = consolidation_high * (1 - 0.001) # Justo debajo del nivel roto [source: 582]
-        entry_price = last['close']
+        entry_price = last_close
         risk_per_unit = entry_price - stop_loss_price
         if risk_per_unit <= 0: return SIGNAL_NONE, "Distancia de stop inválida"
 
         # TP por R:R o Proyección (usamos R:R por simplicidad)
-        take_profit_price_1 = entry_price + config.TP_RR_RATIO_1 * risk_per_unit
-        take_profit_price_2 = entry_price + config.TP_RR_RATIO_2 * risk_per_unit if config.ENABLE_PARTIAL_TP else None
+        take_profit_price_1 = entry_price + params.tp_rr_ratio_1 * risk_per_unit
+        take_profit_price_2 = entry_price + params.tp_rr_ratio_2 * risk_per_unit if params.partial_tp else None
 
         return signal_type, {
             "strategy": "Breakout",
@@ -191,86 +647,44 @@ def check_breakout_signal(df_with_indicators):
             "take_profit_2": take_profit_price_2
         }
     elif is_breakout_candle and score > 0:
-        logger.debug(f"Señal Rotura Débil ({score}/6) ignorada: {', '.join(details)}")
+        if logger.isEnabledFor(logging.DEBUG): # join de detalles sólo si se emite
+            logger.debug("Señal Rotura Débil (%d/6) ignorada: %s", score, ', '.join(_breakout_details(flags, consolidation_high)))
         return SIGNAL_RED, f"Rotura Alcista Débil ({score}/6)"
     else:
         return SIGNAL_NONE, "Sin señal de rotura"
 
-def check_reversal_signal_short(df_with_indicators):
+def check_reversal_signal_short(df_with_indicators: Optional[pd.DataFrame]) -> Signal:
     """
     Evalúa la última vela del DataFrame para una señal de Reversión BAJISTA.
     (Simétrico a check_reversal_signal)
     """
-    if df_with_indicators is None or len(df_with_indicators) < max(config.EMA_FAST_PERIOD, config.SMA_SLOW_PERIOD, config.SMA_TREND_PERIOD, 5):
+    if not _has_reversal_data(df_with_indicators):
         return SIGNAL_NONE, "Datos insuficientes (SHORT Reversal)"
+    return _reversal_short_signal(_tail_block(df_with_indicators, _REVERSAL_COLUMNS, 2))
 
-    try:
-        prev = df_with_indicators.iloc[-2]
-        last = df_with_indicators.iloc[-1]
-    except IndexError:
-        return SIGNAL_NONE, "Insuficientes velas recientes (SHORT Reversal)"
-
-    # --- Evaluar Condiciones para Reversión BAJISTA ---
-    score = 0
-    details = []
-
-    # 1. Contexto de Subida y Sobrecompra: Precio sobre MAs?
-    is_extended_up = (last['close'] > prev['EMA_fast']) and (last['close'] > prev['SMA_slow'])
-    if is_extended_up:
-        score += 1
-        details.append("Precio sobre MAs (SHORT)")
-
-    # 2. Nivel de Resistencia Clave: (Placeholder)
-    # ...
-
-    # 3. Vela de Giro Bajista: Envolvente o Estrella Fugaz con mecha superior
-    is_bearish_candle = last['close'] < last['open']
-    is_prev_bullish = prev['close'] > prev['open']
-    is_engulfing = is_bearish_candle and is_prev_bullish and \
-                   last['close'] < prev['open'] and last['open'] > prev['close']
-
-    # Mecha superior significativa
-    total_range = last['high'] - last['low']
-    upper_wick = last['high'] - max(last['open'], last['close'])
-    has_upper_wick = total_range > 0 and (upper_wick / total_range) > 0.3
-
-    is_reversal_candle = is_bearish_candle and (is_engulfing or has_upper_wick)
-    if is_reversal_candle:
-        score += 1
-        details.append(f"Vela Bajista{'Envolvente' if is_engulfing else ''}{'+' if is_engulfing and has_upper_wick else ''}{'Mecha Superior' if has_upper_wick else ''} (SHORT)")
+def _reversal_short_signal(block):
+    """Núcleo de check_reversal_signal_short sobre las 2 últimas velas (orden _REVERSAL_COLUMNS)."""
+    params = _params
+    prev, last = block
 
-    # 4. Volumen Alto en Vela de Giro
-    is_volume_high = last['volume'] > last['Volume_MA'] * 1.1
-    if is_volume_high:
-        score += 1
-        details.append("Volumen Alto (SHORT)")
-
-    # 5. Indicadores en Sobrecompra / Divergencia
-    is_rsi_overbought = last['RSI'] > config.RSI_OVERBOUGHT
-    is_stoch_overbought = last['STOCHk'] > config.STOCH_OVERBOUGHT and last['STOCHd'] > config.STOCH_OVERBOUGHT
-
-    # Divergencia Bajista RSI Simple: Precio hizo nuevo máximo, RSI no
-    made_higher_high = last['high'] > prev['high']
-    rsi_lower_high = last['RSI'] < prev['RSI']
-    has_rsi_divergence = made_higher_high and rsi_lower_high
-
-    if is_rsi_overbought or is_stoch_overbought or has_rsi_divergence:
-        score += 1
-        details.append(f"{'RSI>70 ' if is_rsi_overbought else ''}{'Stoch>80 ' if is_stoch_overbought else ''}{'DivRSI ' if has_rsi_divergence else ''} (SHORT)")
+    # --- Evaluar Condiciones para Reversión BAJISTA (kernel compilado) ---
+    # (2. Nivel de Resistencia Clave: placeholder, no puntúa)
+    score, flags = _reversal_short_score(prev, last, params.rsi_overbought, params.stoch_overbought)
+    score, flags = int(score), int(flags) # Sin Numba el kernel devuelve enteros NumPy
 
     # --- Decisión del Semáforo ---
-    if score >= config.REVERSAL_CONFIDENCE_THRESHOLD:
+    if score >= params.confidence_threshold:
         signal_type = SIGNAL_GREEN
-        signal_details = f"Reversión Bajista ({score}/5): {', '.join(details)}"
+        signal_details = f"Reversión Bajista ({score}/5): {', '.join(_reversal_short_details(flags))}"
         logger.info(signal_details)
 
         # Calcular SL y TP (Invertido para SHORT)
-        stop_loss_price = last['high'] * (1 + 0.001)  # Un poco por encima del máximo
-        entry_price = last['close']
+        stop_loss_price = float(last[_HIGH]) * (1 + 0.001)  # Un poco por encima del máximo
+        entry_price = float(last[_CLOSE])
         risk_per_unit = stop_loss_price - entry_price
         if risk_per_unit <= 0: return SIGNAL_NONE, "Distancia de stop inválida (SHORT)"
-        take_profit_price_1 = entry_price - config.TP_RR_RATIO_1 * risk_per_unit
-        take_profit_price_2 = entry_price - config.TP_RR_RATIO_2 * risk_per_unit if config.ENABLE_PARTIAL_TP else None
+        take_profit_price_1 = entry_price - params.tp_rr_ratio_1 * risk_per_unit
+        take_profit_price_2 = entry_price - params.tp_rr_ratio_2 * risk_per_unit if params.partial_tp else None
 
         return signal_type, {
             "strategy": "Reversal",
@@ -282,80 +696,57 @@ def check_reversal_signal_short(df_with_indicators):
             "take_profit_2": take_profit_price_2
         }
     elif score > 0:
-        logger.debug(f"Señal Reversión Débil BAJISTA ({score}/5) ignorada: {', '.join(details)}")
+        if logger.isEnabledFor(logging.DEBUG): # join de detalles sólo si se emite
+            logger.debug("Señal Reversión Débil BAJISTA (%d/5) ignorada: %s", score, ', '.join(_reversal_short_details(flags)))
         return SIGNAL_RED, f"Reversión Bajista Débil ({score}/5)"
     else:
         return SIGNAL_NONE, "Sin señal de reversión bajista"
 
 
-def check_breakout_signal_short(df_with_indicators):
+def check_breakout_signal_short(df_with_indicators: Optional[pd.DataFrame], levels: Optional[Dict[str, float]] = None) -> Signal:
     """
     Evalúa la última vela para una señal de Rotura BAJISTA.
     (Simétrico a check_breakout_signal)
     """
-    if df_with_indicators is None or len(df_with_indicators) < config.BREAKOUT_LOOKBACK_PERIOD + 1:
+    if df_with_indicators is None or len(df_with_indicators) < _params.breakout_rows:
         return SIGNAL_NONE, "Datos insuficientes para breakout (SHORT)"
-
-    try:
-        lookback_candles = df_with_indicators.iloc[-(config.BREAKOUT_LOOKBACK_PERIOD + 1):-1]
-        last = df_with_indicators.iloc[-1]
-    except IndexError:
-        return SIGNAL_NONE, "Insuficientes velas recientes para breakout (SHORT)"
+    return _breakout_short_signal(lambda n: _tail_block(df_with_indicators, _BREAKOUT_COLUMNS, n), levels)
+
+def _breakout_short_signal(tail, levels):
+    """Núcleo de check_breakout_signal_short (tail como en _breakout_signal)."""
+    params = _params
+    # Predicado barato primero: sin cierre por debajo del mínimo de la vela anterior no hay ruptura
+    prev, last = tail(2).tolist() # floats nativos
+    if last[_B_CLOSE] >= (prev[_B_LOW] if levels is None else levels['low']):
+        return SIGNAL_NONE, "Sin señal de rotura bajista"
+    if levels is None:
+        levels = _lookback_levels(tail(params.breakout_rows))
 
     # --- Evaluar Condiciones para Rotura BAJISTA ---
-    score = 0
-    details = []
-
-    # 1. Identificar Consolidación y Nivel de Ruptura
-    consolidation_low = lookback_candles['low'].min()  # Mínimo del rango reciente
-
-    # 2. Ruptura Clara del Nivel
-    is_breakdown_candle = last['close'] < consolidation_low
-    if is_breakdown_candle:
-        score += 1
-        details.append(f"Ruptura BAJISTA de {consolidation_low:.2f}")
-
-    # 3. Volumen Seco en Consolidación (Placeholder)
-    volume_contracting = True  # Placeholder
-    if volume_contracting:
-        score += 1
-        details.append("Volumen Seco (Placeholder, SHORT)")
-
-    # 4. Volumen Alto en la Ruptura
-    avg_lookback_volume = lookback_candles['volume'].mean()
-    is_breakout_volume_high = last['volume'] > avg_lookback_volume * config.BREAKOUT_VOLUME_FACTOR
-    if is_breakout_volume_high:
-        score += 1
-        details.append(f"Volumen Ruptura Alto (>{config.BREAKOUT_VOLUME_FACTOR:.1f}x) (SHORT)")
-
-    # 5. Alineación con Tendencia Principal (SMA_trend)
-    is_downtrend = last['close'] < last['SMA_trend']
-    if is_downtrend:
-        score += 1
-        details.append("Tendencia Principal Bajista (SHORT)")
-
-    # 6. Confirmaciones Adicionales (RSI no extremo, sin divergencia alcista)
-    is_rsi_ok = last['RSI'] > 20  # RSI no esté muy bajo
-    if is_rsi_ok:
-        score += 1
-        details.append("RSI no extremo (SHORT)")
+    consolidation_low = float(levels['low'])  # Mínimo del rango reciente
+    _, _, last_close, last_volume, last_rsi, last_sma_trend = last
+    if last_close >= consolidation_low: # Sin vela de ruptura no hace falta puntuar el resto
+        return SIGNAL_NONE, "Sin señal de rotura bajista"
+    score, flags = _breakout_short_scorer(consolidation_low, float(levels['volume_mean']), last_close,
+                                          last_volume, last_rsi, last_sma_trend)
+    is_breakdown_candle = bool(flags & _BRK_BREAKOUT)
 
     # --- Decisión del Semáforo ---
-    breakout_threshold = config.REVERSAL_CONFIDENCE_THRESHOLD  # Usamos el mismo por ahora
+    breakout_threshold = params.confidence_threshold  # Usamos el mismo por ahora
     if is_breakdown_candle and score >= breakout_threshold:
         signal_type = SIGNAL_GREEN
-        signal_details = f"Rotura Bajista ({score}/6): {', '.join(details)}"
+        signal_details = f"Rotura Bajista ({score}/6): {', '.join(_breakout_short_details(flags, consolidation_low))}"
         logger.info(signal_details)
 
         # Calcular SL y TP (Invertido para SHORT)
         stop_loss_price = consolidation_low * (1 + 0.001)  # Justo encima del nivel roto
-        entry_price = last['close']
+        entry_price = last_close
         risk_per_unit = stop_loss_price - entry_price
         if risk_per_unit <= 0: return SIGNAL_NONE, "Distancia de stop inválida (SHORT)"
 
         # TP por R:R o Proyección (usamos R:R por simplicidad)
-        take_profit_price_1 = entry_price - config.TP_RR_RATIO_1 * risk_per_unit
-        take_profit_price_2 = entry_price - config.TP_RR_RATIO_2 * risk_per_unit if config.ENABLE_PARTIAL_TP else None
+        take_profit_price_1 = entry_price - params.tp_rr_ratio_1 * risk_per_unit
+        take_profit_price_2 = entry_price - params.tp_rr_ratio_2 * risk_per_unit if params.partial_tp else None
 
         return signal_type, {
             "strategy": "Breakout",
@@ -367,15 +758,64 @@ def check_breakout_signal_short(df_with_indicators):
             "take_profit_2": take_profit_price_2
         }
     elif is_breakdown_candle and score > 0:
-        logger.debug(f"Señal Rotura Débil BAJISTA ({score}/6) ignorada: {', '.join(details)}")
+        if logger.isEnabledFor(logging.DEBUG): # join de detalles sólo si se emite
+            logger.debug("Señal Rotura Débil BAJISTA (%d/6) ignorada: %s", score, ', '.join(_breakout_short_details(flags, consolidation_low)))
         return SIGNAL_RED, f"Rotura Bajista Débil ({score}/6)"
     else:
         return SIGNAL_NONE, "Sin señal de rotura bajista"
 
+# Columnas de las cuatro señales (las de rotura son un subconjunto salvo SMA_trend)
+_SIGNAL_COLUMNS = _REVERSAL_COLUMNS + ('SMA_trend',)
+_SIGNAL_BREAKOUT_POSITIONS = [_SIGNAL_COLUMNS.index(column) for column in _BREAKOUT_COLUMNS]
+
+def evaluate_all_signals(df_with_indicators: Optional[pd.DataFrame], levels: Optional[Dict[str, float]] = None) -> Dict[str, Signal]:
+    """
+    Las cuatro señales de la última vela con una sola extracción de la cola del df
+    (en lugar de una por check_*). levels: como en check_breakout_signal, para ambas roturas.
+    Retorna {'reversal', 'breakout', 'reversal_short', 'breakout_short'}: (Estado_Semáforo, Detalles_Señal),
+    los mismos resultados que las funciones check_* correspondientes.
+    """
+    lookback = _params.breakout_rows
+    signals: Dict[str, Signal] = {
+        'reversal': (SIGNAL_NONE, "Datos insuficientes"),
+        'breakout': (SIGNAL_NONE, "Datos insuficientes para breakout"),
+        'reversal_short': (SIGNAL_NONE, "Datos insuficientes (SHORT Reversal)"),
+        'breakout_short': (SIGNAL_NONE, "Datos insuficientes para breakout (SHORT)"),
+    }
+    has_reversal_data = _has_reversal_data(df_with_indicators)
+    has_breakout_data = df_with_indicators is not None and len(df_with_indicators) >= lookback
+    if not (has_reversal_data or has_breakout_data):
+        return signals
+
+    block = _tail_block(df_with_indicators, _SIGNAL_COLUMNS, lookback)
+    if has_reversal_data:
+        reversal_block = block[-2:, :len(_REVERSAL_COLUMNS)]
+        params = _params
+        signals['reversal'] = _reversal_signal(_reversal_kernel(reversal_block, params), params)
+        signals['reversal_short'] = _reversal_short_signal(reversal_block)
+    if has_breakout_data:
+        breakout_block = block[:, _SIGNAL_BREAKOUT_POSITIONS]
+        breakout_tail = lambda n: breakout_block[-n:]
+        signals['breakout'] = _breakout_signal(breakout_tail, levels)
+        signals['breakout_short'] = _breakout_short_signal(breakout_tail, levels)
+    return signals
+
 """
 Módulo de estrategia para Premonition V3.
 decision_engine combina señales técnicas e IA (GPT) mediante una regla de puntuación.
 """
+# Pesos (configurables según tu doble IA / backtesting) y umbrales, fijos por módulo
+_DECISION_WEIGHTS = {
+    'rsi': 1.0,
+    'macd': 1.0,
+    'gpt': 2.0
+}
+_DECISION_RSI_W = _DECISION_WEIGHTS['rsi']
+_DECISION_MACD_W = _DECISION_WEIGHTS['macd']
+_DECISION_GPT_W = _DECISION_WEIGHTS['gpt']
+_THRESHOLD_BUY = 1.5
+_THRESHOLD_SELL = -1.5
+
 def decision_engine(symbol: str, df: pd.DataFrame, gpt_result: Dict) -> Dict:
     """
     Decide acción ('buy', 'sell', 'hold') basada en:
@@ -393,37 +833,17 @@ def decision_engine(symbol: str, df: pd.DataFrame, gpt_result: Dict) -> Dict:
         'details': { ... puntuación por factor ... }
       }
     """
-
-    # Pesos (configurables según tu doble IA / backtesting)
-    WEIGHTS = {
-        'rsi': 1.0,
-        'macd': 1.0,
-        'gpt': 2.0
-    }
-    THRESHOLD_BUY = 1.5
-    THRESHOLD_SELL = -1.5
-
-    # Últimos valores de indicadores
-    rsi = df['rsi'].iloc[-1]
-    macd_diff = df['macd_diff'].iloc[-1]
+    # Últimos valores de indicadores (lectura directa del array, sin Series intermedia de .iloc)
+    rsi = float(df['rsi'].to_numpy()[-1])
+    macd_diff = float(df['macd_diff'].to_numpy()[-1])
 
     # Score técnico: RSI
-    # RSI < 30 -> sobreventa -> +1 ; RSI > 70 -> sobrecompra -> -1 ; else 0
-    if rsi < 30:
-        score_rsi = 1
-    elif rsi > 70:
-        score_rsi = -1
-    else:
-        score_rsi = 0
+    # RSI < 30 -> sobreventa -> +1 ; RSI > 70 -> sobrecompra -> -1 ; else 0 (también con NaN)
+    score_rsi = int(rsi < 30) - int(rsi > 70)
 
     # Score técnico: MACD diff
     # macd_diff > 0 -> +1 ; macd_diff < 0 -> -1 ; else 0
-    if macd_diff > 0:
-        score_macd = 1
-    elif macd_diff < 0:
-        score_macd = -1
-    else:
-        score_macd = 0
+    score_macd = int(macd_diff > 0) - int(macd_diff < 0)
 
     # Score GPT
     direction = gpt_result.get('direction', 'neutral').lower()
@@ -437,15 +857,15 @@ def decision_engine(symbol: str, df: pd.DataFrame, gpt_result: Dict) -> Dict:
 
     # Composición total de la puntuación
     total_score = (
-        WEIGHTS['rsi'] * score_rsi +
-        WEIGHTS['macd'] * score_macd +
-        WEIGHTS['gpt'] * score_gpt
+        _DECISION_RSI_W * score_rsi +
+        _DECISION_MACD_W * score_macd +
+        _DECISION_GPT_W * score_gpt
     )
 
     # Decisión final
-    if total_score >= THRESHOLD_BUY:
+    if total_score >= _THRESHOLD_BUY:
         action = 'buy'
-    elif total_score <= THRESHOLD_SELL:
+    elif total_score <= _THRESHOLD_SELL:
         action = 'sell'
     else:
         action = 'hold'
@@ -1,21 +1,41 @@
 # -*- coding: utf-8 -*-
+import atexit
+import functools
 import logging
+import logging.handlers
+import queue
+import random
+import threading
 import time
 from bot import config
 
+_logging_lock = threading.Lock()
+
 def setup_logging():
-    """Configura el sistema de logging."""
+    """
+    Configura el sistema de logging una sola vez por proceso (llamadas o reimportaciones
+    posteriores no duplican handlers). Fichero y consola se escriben desde un QueueListener
+    en segundo plano: en el ciclo de trading logger.info sólo encola el registro.
+    """
     log_format = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
     log_level = getattr(logging, config.LOG_LEVEL.upper(), logging.INFO)
 
-    logging.basicConfig(
-        level=log_level,
-        format=log_format,
-        handlers=[
-            logging.FileHandler("trading_bot.log"), # Escribir a archivo
-            logging.StreamHandler()                # Escribir a consola
-        ]
-    )
+    with _logging_lock:
+        root = logging.getLogger()
+        if not root.handlers: # Como basicConfig: no tocar un logging ya configurado
+            formatter = logging.Formatter(log_format)
+            handlers = [
+                logging.FileHandler("trading_bot.log"), # Escribir a archivo
+                logging.StreamHandler()                # Escribir a consola
+            ]
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            log_queue = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            atexit.register(listener.stop) # Vaciar la cola al salir
+            root.addHandler(logging.handlers.QueueHandler(log_queue))
+            root.setLevel(log_level)
     # Silenciar logs muy verbosos de librerías externas si es necesario
     # logging.getLogger("requests").setLevel(logging.WARNING)
     # logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -24,28 +44,103 @@ def setup_logging():
 
 logger = setup_logging()
 
-def exponential_backoff_retry(func, *args, **kwargs):
+class CircuitOpenError(RuntimeError):
+    """El circuit breaker está abierto: se rechaza la llamada sin tocar la red."""
+
+# Estado del circuit breaker de cada función con reintentos (una caída de OpenAI no
+# bloquea Kraken): nombre -> {'open_until', 'failures'}
+_breakers = {}
+_breaker_lock = threading.Lock()
+
+def _breaker(name):
+    with _breaker_lock:
+        return _breakers.setdefault(name, {'open_until': 0.0, 'failures': 0})
+
+def _record_failure(name):
+    """
+    Cuenta una llamada fallida de `name` (ya agotados sus reintentos); abre el circuito al
+    alcanzar el umbral de llamadas fallidas consecutivas. Retorna True si se abrió.
     """
-    Decorador o función helper para reintentar una función con backoff exponencial.
+    breaker = _breaker(name)
+    with _breaker_lock:
+        breaker['failures'] += 1
+        if breaker['failures'] >= config.CIRCUIT_BREAKER_THRESHOLD:
+            breaker['open_until'] = time.monotonic() + config.CIRCUIT_BREAKER_COOLDOWN
+            breaker['failures'] = 0
+            return True
+    return False
+
+def _record_success(name):
+    """Una llamada de `name` con éxito reinicia su cuenta de fallos."""
+    breaker = _breaker(name)
+    with _breaker_lock:
+        breaker['failures'] = 0
+
+def _check_circuit(name):
+    """Lanza CircuitOpenError si el circuit breaker de `name` está abierto."""
+    remaining = _breaker(name)['open_until'] - time.monotonic()
+    if remaining > 0:
+        raise CircuitOpenError(f"Circuito abierto: {name} rechazada durante {remaining:.0f}s más")
+
+def _retry_delay(name, error, attempt, attempts, base_delay, max_delay):
+    """
+    Registra el fallo número `attempt` de `name` (llamar dentro del except).
+    Retorna la espera antes del siguiente intento, o None si no quedan intentos
+    (la llamada cuenta entonces como un fallo para el circuit breaker).
+    """
+    if attempt >= attempts:
+        logger.error("Error en %s tras %d intentos: %s", name, attempt, error, exc_info=True)
+        if _record_failure(name):
+            logger.error("Circuit breaker abierto para %s tras %d llamadas fallidas consecutivas",
+                         name, config.CIRCUIT_BREAKER_THRESHOLD)
+        return None
+    delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+    logger.warning("Intento %d/%d fallido para %s: %s. Reintentando en %.2fs...", attempt, attempts, name, error, delay)
+    return delay
+
+def retry(max_attempts=None, initial_delay=None, max_delay=None):
+    """
+    Decorador que reintenta la función con backoff exponencial.
     Útil para llamadas a API que pueden fallar temporalmente.
+    Espera un tiempo aleatorio en [0, min(tope, base * 2**intento)] (full jitter) para que
+    varios procesos no reintenten sincronizados, y tras CIRCUIT_BREAKER_THRESHOLD llamadas
+    fallidas consecutivas (cada una con todos sus reintentos agotados) rechaza las llamadas
+    a esa función con CircuitOpenError durante CIRCUIT_BREAKER_COOLDOWN s.
+    Los valores por defecto (MAX_API_RETRIES, API_RETRY_DELAY, API_RETRY_MAX_DELAY) se leen
+    de config al decorar, no en cada llamada. Uso: @retry() o @retry(max_attempts=3).
+    """
+    attempts = config.MAX_API_RETRIES if max_attempts is None else max_attempts
+    base_delay = config.API_RETRY_DELAY if initial_delay is None else initial_delay
+    delay_cap = config.API_RETRY_MAX_DELAY if max_delay is None else max_delay
+
+    def decorator(func):
+        name = func.__qualname__ # Las lambdas de cada llamador tienen su propio circuito
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _check_circuit(name)
+            for attempt in range(1, attempts + 1):
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    delay = _retry_delay(name, e, attempt, attempts, base_delay, delay_cap)
+                    if delay is None:
+                        raise # Propagar el error final
+                    time.sleep(delay)
+                else:
+                    _record_success(name)
+                    return result # Éxito
+            # Esta línea no debería alcanzarse si max_attempts > 0
+            return None
+        return wrapper
+    return decorator
+
+def exponential_backoff_retry(func, *args, **kwargs):
+    """
+    Función helper: func(*args, **kwargs) con los reintentos de retry(). Para llamadas
+    puntuales (p. ej. lambdas); las funciones de la API se decoran con @retry().
     """
-    retries = 0
-    delay = config.API_RETRY_DELAY
-    while retries < config.MAX_API_RETRIES:
-        try:
-            result = func(*args, **kwargs)
-            return result # Éxito
-        except Exception as e:
-            retries += 1
-            if retries >= config.MAX_API_RETRIES:
-                logger.error(f"Error en {func.__name__} tras {retries} intentos: {e}", exc_info=True)
-                raise # Propagar el error final
-            else:
-                logger.warning(f"Intento {retries}/{config.MAX_API_RETRIES} fallido para {func.__name__}: {e}. Reintentando en {delay}s...")
-                time.sleep(delay)
-                delay *= 2 # Backoff exponencial
-    # Esta línea no debería alcanzarse si MAX_API_RETRIES > 0
-    return None
+    return retry()(func)(*args, **kwargs)
 
 def generate_insights_text(df_with_indicators):
     """
@@ -0,0 +1,75 @@
+# Carga y validación de settings.json sin dependencias de GUI (CLI, tests, bot)
+import json
+import os
+from functools import lru_cache
+try:
+    import orjson # Parser JSON en C, bastante más rápido que el json de la stdlib
+except ImportError:
+    orjson = None
+try:
+    import fastjsonschema # Compila el esquema a una función Python especializada
+except ImportError:
+    fastjsonschema = None
+config = 'config/settings.json'
+
+@lru_cache(maxsize=1)
+def _leer_configuracion(path, mtime_ns):
+    """settings.json parseado; mtime_ns forma parte de la clave para releerlo sólo si cambia."""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def cargar_configuracion(config=config):
+    # Sin cambios en el fichero se devuelve el mismo dict ya parseado (no modificarlo)
+    try:
+        return _leer_configuracion(config, os.stat(config).st_mtime_ns)
+    except Exception as e:
+        print(f"Error cargando configuración: {e}")
+        return None
+
+_MODULOS_REQUERIDOS = {
+    'api': ['exchange', 'api_key', 'api_secret', 'testnet'],
+    'exchange': ['name', 'api_key', 'api_secret', 'testnet', 'rate_limit'],
+    'trading': ['symbol', 'timeframe', 'historical_days', 'position_size', 'leverage', 'mode'],
+    'data_collection': ['symbols', 'timeframes', 'days_to_collect', 'batch_size']
+}
+
+# Mismas reglas como JSON Schema: módulos obligatorios y claves presentes y no vacías
+SCHEMA = {
+    "type": "object",
+    "required": list(_MODULOS_REQUERIDOS),
+    "properties": {
+        modulo: {
+            "type": "object",
+            "required": claves,
+            "properties": {clave: {"not": {"enum": [None, '', []]}} for clave in claves},
+        }
+        for modulo, claves in _MODULOS_REQUERIDOS.items()
+    },
+}
+_validador = fastjsonschema.compile(SCHEMA) if fastjsonschema is not None else None
+
+def validar_configuracion(config):
+    # Camino rápido: el validador compilado acepta la configuración correcta (el caso habitual);
+    # si la rechaza, el recorrido de abajo enumera todos los errores con los mensajes de siempre.
+    if _validador is not None:
+        try:
+            _validador(config)
+            return []
+        except fastjsonschema.JsonSchemaException:
+            pass
+
+    errores = []
+
+    for modulo, claves in _MODULOS_REQUERIDOS.items():
+        if modulo not in config:
+            errores.append(f"Falta módulo '{modulo}'")
+            continue
+
+        for clave in claves:
+            if clave not in config[modulo] or config[modulo][clave] in [None, '', []]:
+                errores.append(f"Configuración incorrecta en '{modulo}': Falta o vacío '{clave}'")
+
+    return errores
@@ -0,0 +1,35 @@
+# Arranque de la GUI con validación previa de settings.json
+from config.validator_core import cargar_configuracion, validar_configuracion
+
+def run(self):
+    # Qt sólo se importa al abrir la GUI
+    from PyQt5.QtWidgets import QMessageBox, QTimer # type: ignore
+
+    self.show()
+
+    self.config = cargar_configuracion()
+
+    if not self.config:
+        QMessageBox.critical(self, 'Error', 'No se pudo cargar la configuración. Verifica settings.json')
+        return
+
+    errores_config = validar_configuracion(self.config)
+
+    if errores_config:
+        mensaje_error = "Errores en configuración:\n" + "\n".join(errores_config)
+        QMessageBox.critical(self, 'Error en Configuración', mensaje_error)
+        return
+
+    # Configuración correcta; iniciar lógica habitual
+    if self.config.get('auto_start_collection', False):
+        self.start_collection_btn.setEnabled(False)
+        self.collect_data_btn.setEnabled(False)
+        self.stop_collection_btn.setEnabled(True)
+
+    # Actualización periódica cada 5 minutos
+    self.update_timer = QTimer(self)
+    self.update_timer.timeout.connect(self.update_data_table)
+    self.update_timer.start(300000)
+    self.update_data_table()
+    self.show()
+    
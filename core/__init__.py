@@ -1,11 +1,17 @@
 # core/__init__.py
-from core.bot import MultiSymbolTradingBot
-from core.data_fetcher import DataFetcher
-from core.pattern_analyzer import PatternAnalyzer
-from core.pattern_detector import PatternDetector
-from core.trade_executor import TradeExecutor
-from core.visualizer import Visualizer
-from core.data_collector import DataCollector
+# Importación perezosa (PEP 562): cada submódulo (TA-Lib, matplotlib...) se carga al
+# acceder por primera vez a su clase, no al hacer `import core`.
+import importlib
+
+_LAZY = {
+    'MultiSymbolTradingBot': 'core.bot',
+    'DataFetcher': 'core.data_fetcher',
+    'PatternAnalyzer': 'core.pattern_analyzer',
+    'PatternDetector': 'core.pattern_detector',
+    'TradeExecutor': 'core.trade_executor',
+    'Visualizer': 'core.visualizer',
+    'DataCollector': 'core.data_collector',
+}
 
 __all__ = [
     'MultiSymbolTradingBot',
@@ -13,6 +19,17 @@ __all__ = [
     'PatternAnalyzer',
     'PatternDetector',
     'TradeExecutor',
-    'Visualizer'
+    'Visualizer',
     'DataCollector'
 ]
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value # Siguientes accesos sin pasar por __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,160 @@
+# core/_sim_loops.py
+"""Bucles numéricos del backtester compilados con Numba (Python puro si no está instalado)"""
+import numpy as np # type: ignore
+
+try:
+    from numba import njit, prange, set_num_threads # type: ignore
+except ImportError:
+    prange = range
+
+    def njit(*args, **kwargs):
+        # Soporta tanto @njit como @njit(cache=True, ...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+    def set_num_threads(n):
+        # Sin Numba la rejilla se recorre en serie
+        pass
+
+@njit(cache=True)
+def scan_exits(entry, stop, tp, size, dir_sign, low, high):
+    """
+    Comprueba stop loss y take profit de las posiciones abiertas frente a una vela
+
+    Args:
+        entry, stop, tp, size: Arrays float64 con los campos de cada posición abierta
+        dir_sign: Array int8 con la dirección (+1 bullish, -1 bearish)
+        low: Mínimo de la vela
+        high: Máximo de la vela
+
+    Returns:
+        Tupla (closed_mask, exit_price, pl); el stop loss tiene prioridad sobre el take profit.
+        exit_price y pl sólo son válidos donde closed_mask es True
+    """
+    # Sin ramas: el precio que toca cada nivel se elige según la dirección y el signo invierte
+    # la comparación de las posiciones bearish (sign * (px - nivel) <= 0 equivale a low <= stop)
+    bullish = dir_sign > 0
+    px_sl = np.where(bullish, low, high)
+    px_tp = np.where(bullish, high, low)
+    sl_hit = dir_sign * (px_sl - stop) <= 0
+    tp_hit = dir_sign * (px_tp - tp) >= 0
+    exit_price = np.where(sl_hit, stop, tp)
+    pl = (exit_price - entry) * size * dir_sign
+    return sl_hit | tp_hit, exit_price, pl
+
+@njit(fastmath=True, cache=True)
+def summarize_pl(pl):
+    """
+    Agrega el P/L de un conjunto de trades (reducciones vectorizables por LLVM con fastmath)
+
+    Args:
+        pl: Array float64 con el beneficio/pérdida de cada trade
+
+    Returns:
+        Tupla (winning_trades, losing_trades, total_profit, total_loss); P/L cero cuenta como pérdida
+    """
+    gains = pl > 0
+    winning = np.count_nonzero(gains)
+    total_profit = np.where(gains, pl, 0.0).sum()
+    total_loss = -np.where(gains, 0.0, pl).sum()
+    return winning, pl.shape[0] - winning, total_profit, total_loss
+
+@njit(cache=True)
+def sim_kernel(high, low, close, lookback, sl_frac, tp_frac, risk_amount, min_notional,
+               signal_offsets, signal_signs):
+    """
+    Simulación completa de Backtester._simulate_trading sobre arrays, para un par (stop loss, take profit)
+
+    Args:
+        high, low, close: Arrays float64 de la serie
+        lookback: Velas previas de cada ventana de detección (no se opera antes)
+        sl_frac, tp_frac: Stop loss y take profit como fracción del precio de entrada
+        risk_amount: Importe arriesgado por operación (balance inicial * riesgo)
+        min_notional: Riesgo mínimo para abrir posiciones
+        signal_offsets: Array int64 (len(close) + 1): las señales de la vela i son
+            signal_signs[signal_offsets[i]:signal_offsets[i + 1]]
+        signal_signs: Array int8 con la dirección de cada señal (+1 bullish, -1 bearish)
+
+    Returns:
+        Tupla (total_trades, winning_trades, losing_trades, total_profit, total_loss) con las mismas
+        estadísticas que _simulate_trading (las de las posiciones cerradas al final del backtest)
+    """
+    m = signal_signs.shape[0]
+    entry = np.empty(m)
+    stop = np.empty(m)
+    tp = np.empty(m)
+    size = np.empty(m)
+    sign = np.empty(m, dtype=np.int8)
+    count = 0
+    total_trades = 0
+    can_trade = risk_amount >= min_notional and sl_frac > 0
+    n = close.shape[0]
+    for i in range(lookback, n):
+        # Salidas por stop loss / take profit, compactando las posiciones que siguen abiertas
+        if count > 0:
+            closed, _, _ = scan_exits(entry[:count], stop[:count], tp[:count], size[:count], sign[:count],
+                                      low[i], high[i])
+            kept = 0
+            for k in range(count):
+                if not closed[k]:
+                    entry[kept] = entry[k]
+                    stop[kept] = stop[k]
+                    tp[kept] = tp[k]
+                    size[kept] = size[k]
+                    sign[kept] = sign[k]
+                    kept += 1
+            count = kept
+        if not can_trade:
+            continue
+
+        # Entradas de las señales de la vela
+        price = close[i]
+        stop_amount = price * sl_frac
+        position_size = risk_amount / stop_amount if stop_amount > 0 else 0.0
+        for j in range(signal_offsets[i], signal_offsets[i + 1]):
+            s = signal_signs[j]
+            entry[count] = price
+            if s > 0:
+                stop[count] = price * (1 - sl_frac)
+                tp[count] = price * (1 + tp_frac)
+            else:
+                stop[count] = price * (1 + sl_frac)
+                tp[count] = price * (1 - tp_frac)
+            size[count] = position_size
+            sign[count] = s
+            count += 1
+            total_trades += 1
+
+    # Cerrar posiciones abiertas al precio de la última vela
+    if count == 0:
+        return total_trades, 0, 0, 0.0, 0.0
+    pls = (close[n - 1] - entry[:count]) * size[:count] * sign[:count]
+    winning, losing, total_profit, total_loss = summarize_pl(pls)
+    return total_trades, winning, losing, total_profit, total_loss
+
+@njit(parallel=True, cache=True)
+def grid_kernel(high, low, close, lookback, sl_fracs, tp_fracs, risk_amount, min_notional,
+                signal_offsets, signal_signs):
+    """
+    Ejecuta sim_kernel para cada par (sl_fracs[k], tp_fracs[k]) en paralelo; la serie y las señales
+    son de sólo lectura y se comparten entre hilos
+
+    Returns:
+        Arrays (total_trades, winning_trades, losing_trades, total_profit, total_loss) de len(sl_fracs)
+    """
+    g = sl_fracs.shape[0]
+    trades = np.zeros(g, dtype=np.int64)
+    winning = np.zeros(g, dtype=np.int64)
+    losing = np.zeros(g, dtype=np.int64)
+    profit = np.zeros(g)
+    loss = np.zeros(g)
+    for k in prange(g):
+        t, w, l, p, q = sim_kernel(high, low, close, lookback, sl_fracs[k], tp_fracs[k], risk_amount,
+                                   min_notional, signal_offsets, signal_signs)
+        trades[k] = t
+        winning[k] = w
+        losing[k] = l
+        profit[k] = p
+        loss[k] = q
+    return trades, winning, losing, profit, loss
@@ -1,18 +1,158 @@
 # core/backtester.py
 import logging
 import asyncio
+import hashlib
 import json
 import os
+import time
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
+import numpy as np # type: ignore
+
 from utils.database import PatternDatabase
 from core.data_fetcher import DataFetcher
 from core.pattern_detector import PatternDetector
+from core._sim_loops import scan_exits, summarize_pl, grid_kernel, set_num_threads
 from models.candle import Candle
 
 logger = logging.getLogger('backtester')
 
+LOOKBACK = 20  # Velas necesarias para análisis técnico
+
+# Velas cacheadas en disco: una fila por vela, cargable con np.load(mmap_mode='r')
+_CANDLE_DTYPE = np.dtype([('timestamp', np.int64), ('open', np.float64), ('high', np.float64),
+                          ('low', np.float64), ('close', np.float64), ('volume', np.float64)])
+_TIMEFRAME_SECONDS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+def _timeframe_seconds(timeframe: str) -> int:
+    """
+    Duración de una vela en segundos
+    
+    Args:
+        timeframe: Timeframe de las velas (ej: 15m, 1h, 1d)
+        
+    Returns:
+        Segundos por vela (0 si el timeframe no se reconoce)
+    """
+    try:
+        return int(timeframe[:-1]) * _TIMEFRAME_SECONDS[timeframe[-1]]
+    except (KeyError, ValueError):
+        return 0
+
+def _candles_to_soa(candles: List[Candle]):
+    """
+    Convierte la lista de velas en arrays por campo (estructura de arrays)
+    
+    Args:
+        candles: Lista de velas históricas
+        
+    Returns:
+        Tupla (timestamps, opens, highs, lows, closes) de arrays numpy contiguos
+    """
+    n = len(candles)
+    timestamps = np.fromiter((c.timestamp for c in candles), dtype=np.int64, count=n)
+    opens = np.fromiter((c.open for c in candles), dtype=float, count=n)
+    highs = np.fromiter((c.high for c in candles), dtype=float, count=n)
+    lows = np.fromiter((c.low for c in candles), dtype=float, count=n)
+    closes = np.fromiter((c.close for c in candles), dtype=float, count=n)
+    return timestamps, opens, highs, lows, closes
+
+class _PositionBook:
+    """
+    Posiciones abiertas en arrays paralelos (SoA): el escaneo de salidas sólo recorre los campos
+    numéricos contiguos; los metadatos de cada trade van aparte y el dict se crea al cerrar
+    """
+    
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self.entry = np.empty(capacity)
+        self.stop = np.empty(capacity)
+        self.tp = np.empty(capacity)
+        self.size = np.empty(capacity)
+        self.sign = np.empty(capacity, dtype=np.int8)
+        self.meta = []
+    
+    def __len__(self):
+        return self.count
+    
+    def views(self):
+        """Vistas (entry, stop, tp, size, sign) de las posiciones abiertas"""
+        n = self.count
+        return self.entry[:n], self.stop[:n], self.tp[:n], self.size[:n], self.sign[:n]
+    
+    def add(self, meta: Dict[str, Any], entry: float, stop: float, tp: float, size: float, sign: int):
+        """
+        Añade una posición abierta
+        
+        Args:
+            meta: Campos no numéricos del trade (id, patrón, dirección, entry_time)
+            entry: Precio de entrada
+            stop: Nivel de stop loss
+            tp: Nivel de take profit
+            size: Tamaño de la posición
+            sign: Dirección (+1 bullish, -1 bearish)
+        """
+        n = self.count
+        if n == len(self.entry):
+            # Crecimiento por duplicación: coste amortizado constante por posición
+            for name in ('entry', 'stop', 'tp', 'size', 'sign'):
+                setattr(self, name, np.resize(getattr(self, name), 2 * n))
+        self.entry[n] = entry
+        self.stop[n] = stop
+        self.tp[n] = tp
+        self.size[n] = size
+        self.sign[n] = sign
+        self.meta.append(meta)
+        self.count = n + 1
+    
+    def close_mask(self, mask, exit_prices, pls, exit_time: int) -> List[Dict[str, Any]]:
+        """
+        Cierra las posiciones marcadas en mask y las saca del libro
+        
+        Args:
+            mask: Array booleano (una entrada por posición abierta)
+            exit_prices: Precios de salida
+            pls: Beneficio/pérdida de cada posición
+            exit_time: Timestamp de cierre
+            
+        Returns:
+            Lista de trades cerrados, en el orden en que se abrieron
+        """
+        n = self.count
+        closed = []
+        for k in np.flatnonzero(mask):
+            meta = self.meta[k]
+            entry_price = float(self.entry[k])
+            size = float(self.size[k])
+            pl = float(pls[k])
+            closed.append({
+                'id': meta['id'],
+                'pattern_id': meta['pattern_id'],
+                'pattern_name': meta['pattern_name'],
+                'entry_price': entry_price,
+                'entry_time': meta['entry_time'],
+                'direction': meta['direction'],
+                'size': size,
+                'stop_loss': float(self.stop[k]),
+                'take_profit': float(self.tp[k]),
+                'status': 'closed',
+                'exit_price': float(exit_prices[k]),
+                'exit_time': exit_time,
+                'profit_loss': pl,
+                'profit_loss_pct': (pl / (entry_price * size)) * 100
+            })
+        
+        # Compactar las posiciones que siguen abiertas al principio de los arrays
+        keep = ~mask
+        m = int(keep.sum())
+        for name in ('entry', 'stop', 'tp', 'size', 'sign'):
+            values = getattr(self, name)
+            values[:m] = values[:n][keep]
+        self.meta = [meta for meta, k in zip(self.meta, keep) if k]
+        self.count = m
+        return closed
+
 class Backtester:
     """Backtester para estrategias de trading"""
     
@@ -36,10 +176,18 @@ class Backtester:
         self.risk_per_trade = backtest_config.get('risk_per_trade', 0.02)  # 2% por defecto
         self.take_profit_pct = backtest_config.get('take_profit_pct', 2.0)
         self.stop_loss_pct = backtest_config.get('stop_loss_pct', 1.0)
+        self._tp_frac = self.take_profit_pct / 100
+        self._sl_frac = self.stop_loss_pct / 100
+        self.min_success_rate = backtest_config.get('min_success_rate', 60)
+        self.min_notional = backtest_config.get('min_notional', 1e-8)  # Riesgo mínimo por operación
         
         # Período de backtest
         self.backtest_days = backtest_config.get('days', 90)  # 90 días por defecto
         
+        # Caché en disco de las velas históricas (válida durante una vela del timeframe)
+        self.use_cache = backtest_config.get('use_cache', True)
+        self.cache_dir = backtest_config.get('cache_dir', 'data/cache')
+        
         # Componentes
         self.data_fetcher = None
         self.pattern_detector = None
@@ -82,11 +230,7 @@ class Backtester:
         
         try:
             # Obtener datos históricos
-            candles = await self.data_fetcher.fetch_historical_data(
-                symbol=self.symbol,
-                timeframe=self.timeframe,
-                days=self.backtest_days
-            )
+            candles = await self._load_candles()
             
             if not candles:
                 logger.error(f"No se pudieron obtener datos históricos para {self.symbol}")
@@ -101,6 +245,52 @@ class Backtester:
             logger.error(f"Error en el backtest: {e}")
             return {"error": str(e)}
     
+    def _cache_path(self) -> str:
+        """Ruta del fichero de caché para (symbol, timeframe, days)"""
+        key = f"{self.symbol}:{self.timeframe}:{self.backtest_days}"
+        return os.path.join(self.cache_dir, f"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}.npy")
+    
+    async def _load_candles(self) -> List[Candle]:
+        """
+        Obtiene las velas del backtest, de la caché en disco si sigue vigente o del data fetcher
+        
+        Returns:
+            Lista de velas
+        """
+        path = self._cache_path()
+        max_age = _timeframe_seconds(self.timeframe)
+        
+        if self.use_cache and max_age and os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age:
+            try:
+                rows = np.load(path, mmap_mode='r')
+                logger.info(f"Velas de {self.symbol} ({self.timeframe}) cargadas de la caché: {len(rows)}")
+                return [Candle(*row) for row in rows.tolist()]
+            except Exception as e:
+                logger.warning(f"No se pudo leer la caché de velas {path}: {e}")
+        
+        candles = await self.data_fetcher.fetch_historical_data(
+            symbol=self.symbol,
+            timeframe=self.timeframe,
+            days=self.backtest_days
+        )
+        
+        if self.use_cache and max_age and candles:
+            try:
+                rows = np.empty(len(candles), dtype=_CANDLE_DTYPE)
+                for name in _CANDLE_DTYPE.names:
+                    rows[name] = [getattr(c, name) for c in candles]
+                os.makedirs(self.cache_dir, exist_ok=True)
+                
+                # Escritura atómica: otro proceso nunca lee un fichero a medias
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, rows)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.warning(f"No se pudo guardar la caché de velas {path}: {e}")
+        
+        return candles
+    
     async def _simulate_trading(self, candles: List[Candle]) -> Dict[str, Any]:
         """
         Simula operaciones de trading en datos históricos
@@ -114,7 +304,7 @@ class Backtester:
         # Inicializar variables de seguimiento
         balance = self.initial_capital
         trades = []
-        open_positions = []
+        open_positions = _PositionBook()
         
         # Estadísticas
         total_trades = 0
@@ -124,97 +314,113 @@ class Backtester:
         total_loss = 0.0
         
         # Recorrer velas (dejando suficientes para lookback)
-        lookback = 20  # Velas necesarias para análisis técnico
+        lookback = LOOKBACK
+        
+        # Los campos se leen una sola vez a arrays: el bucle indexa escalares y el detector
+        # recibe vistas de la ventana en lugar de reconstruir listas de Candle en cada vela
+        timestamps, opens, highs, lows, closes = _candles_to_soa(candles)
+        
+        # Niveles de stop loss / take profit de una entrada en cada vela (porcentajes fijos en todo el backtest)
+        stop_long = closes * (1 - self._sl_frac)
+        stop_short = closes * (1 + self._sl_frac)
+        tp_long = closes * (1 + self._tp_frac)
+        tp_short = closes * (1 - self._tp_frac)
+        
+        # Tamaño de posición por vela según el riesgo (el balance no cambia dentro del bucle)
+        stop_amounts = closes * self._sl_frac
+        with np.errstate(divide='ignore', invalid='ignore'):
+            position_sizes = np.where(stop_amounts > 0, (balance * self.risk_per_trade) / stop_amounts, 0.0)
+        
+        # El balance sólo cambia al cerrar el backtest: si no alcanza para arriesgar en una operación
+        # (o no hay stop loss con el que dimensionarla) no hace falta detectar patrones
+        can_trade = balance * self.risk_per_trade >= self.min_notional and self.stop_loss_pct > 0
+        
+        # Patrones de todas las ventanas [i - lookback, i] en una sola llamada al detector,
+        # filtrados ya por tasa de éxito
+        if can_trade:
+            all_patterns = await self.pattern_detector.detect_patterns_batched(
+                opens, highs, lows, closes, lookback, candles=candles, min_success_rate=self.min_success_rate
+            )
+        else:
+            logger.warning("Balance insuficiente o stop loss nulo: el backtest no abrirá posiciones")
+            all_patterns = [[] for _ in range(len(candles))]
         
         for i in range(lookback, len(candles)):
-            current_candle = candles[i]
-            lookback_candles = candles[i-lookback:i]
+            close = float(closes[i])
+            timestamp = int(timestamps[i])
             
             # Actualizar posiciones abiertas
-            await self._update_positions(open_positions, current_candle, trades)
-            
-            # Detectar patrones en las velas de lookback
-            detected_patterns = await self.pattern_detector.detect_patterns(lookback_candles + [current_candle])
+            await self._update_positions(open_positions, float(highs[i]), float(lows[i]), timestamp, trades)
             
-            # Si se detectaron patrones, evaluar entrada
-            for pattern in detected_patterns:
-                # Solo considerar patrones con buena tasa de éxito
-                if pattern.get('success_rate', 0) >= 60:
-                    # Calcular tamaño de posición basado en riesgo
-                    position_size = self._calculate_position_size(
-                        balance, 
-                        current_candle.close, 
-                        self.risk_per_trade, 
-                        self.stop_loss_pct
-                    )
+            # Si se detectaron patrones en la ventana que termina en esta vela, evaluar entrada
+            for pattern in all_patterns[i]:
+                # Crear nueva posición
+                direction = pattern.direction
+                if direction in ['bullish', 'bearish']:
+                    if direction == 'bullish':
+                        sign, stop_loss, take_profit = 1, stop_long[i], tp_long[i]
+                    else:
+                        sign, stop_loss, take_profit = -1, stop_short[i], tp_short[i]
+                    meta = {
+                        'id': f"trade_{total_trades + 1}",
+                        'pattern_id': pattern.id,
+                        'pattern_name': pattern.name,
+                        'entry_time': timestamp,
+                        'direction': direction
+                    }
                     
-                    # Crear nueva posición
-                    direction = pattern.get('direction', 'neutral')
-                    if direction in ['bullish', 'bearish']:
-                        position = {
-                            'id': f"trade_{total_trades + 1}",
-                            'pattern_id': pattern.get('id', ''),
-                            'pattern_name': pattern.get('name', ''),
-                            'entry_price': current_candle.close,
-                            'entry_time': current_candle.timestamp,
-                            'direction': direction,
-                            'size': position_size,
-                            'stop_loss': self._calculate_stop_loss(current_candle.close, direction, self.stop_loss_pct),
-                            'take_profit': self._calculate_take_profit(current_candle.close, direction, self.take_profit_pct),
-                            'status': 'open',
-                            'exit_price': None,
-                            'exit_time': None,
-                            'profit_loss': 0.0,
-                            'profit_loss_pct': 0.0
-                        }
-                        
-                        # Añadir a posiciones abiertas
-                        open_positions.append(position)
-                        total_trades += 1
+                    # Añadir a posiciones abiertas
+                    open_positions.add(meta, close, stop_loss, take_profit, position_sizes[i], sign)
+                    total_trades += 1
         
         # Cerrar posiciones abiertas al final del backtest
         if open_positions:
             last_candle = candles[-1]
-            for position in open_positions:
-                position['status'] = 'closed'
-                position['exit_price'] = last_candle.close
-                position['exit_time'] = last_candle.timestamp
-                
-                # Calcular P/L
-                pl = self._calculate_profit_loss(
-                    position['entry_price'],
-                    position['exit_price'],
-                    position['direction'],
-                    position['size']
-                )
-                
-                position['profit_loss'] = pl
-                position['profit_loss_pct'] = (pl / (position['entry_price'] * position['size'])) * 100
-                
-                # Actualizar balance
-                balance += pl
-                
-                # Actualizar estadísticas
-                if pl > 0:
-                    winning_trades += 1
-                    total_profit += pl
-                else:
-                    losing_trades += 1
-                    total_loss += abs(pl)
-                
-                # Añadir a trades completados
-                trades.append(position)
+            entry, _, _, size, sign = open_positions.views()
+            exit_prices = np.full(len(open_positions), last_candle.close)
+            
+            # Calcular P/L
+            pls = self._calculate_profit_loss(entry, exit_prices, sign, size)
             
-            # Limpiar posiciones abiertas
-            open_positions = []
+            trades.extend(open_positions.close_mask(np.ones(len(open_positions), dtype=bool), exit_prices,
+                                                    pls, last_candle.timestamp))
+            
+            # Actualizar balance y estadísticas
+            winning, losing, profit, loss = summarize_pl(pls)
+            winning_trades += int(winning)
+            losing_trades += int(losing)
+            total_profit += float(profit)
+            total_loss += float(loss)
+            balance += float(profit) - float(loss)
         
-        # Calcular estadísticas finales
+        # Preparar resultados
+        results = self._build_results(balance, total_trades, winning_trades, losing_trades,
+                                      total_profit, total_loss)
+        results['trades'] = trades
+        
+        return results
+    
+    def _build_results(self, balance: float, total_trades: int, winning_trades: int, losing_trades: int,
+                       total_profit: float, total_loss: float) -> Dict[str, Any]:
+        """
+        Calcula las estadísticas finales de una simulación
+        
+        Args:
+            balance: Balance final
+            total_trades: Operaciones abiertas
+            winning_trades: Operaciones ganadoras
+            losing_trades: Operaciones perdedoras
+            total_profit: Beneficio bruto
+            total_loss: Pérdida bruta (positiva)
+            
+        Returns:
+            Diccionario de resultados (sin la lista de trades)
+        """
         win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
         profit_factor = total_profit / total_loss if total_loss > 0 else float('inf')
         total_return = ((balance - self.initial_capital) / self.initial_capital) * 100
         
-        # Preparar resultados
-        results = {
+        return {
             'initial_capital': self.initial_capital,
             'final_balance': balance,
             'total_trades': total_trades,
@@ -222,144 +428,122 @@ class Backtester:
             'losing_trades': losing_trades,
             'win_rate': round(win_rate, 2),
             'profit_factor': round(profit_factor, 2),
-            'total_return': round(total_return, 2),
-            'trades': trades
+            'total_return': round(total_return, 2)
         }
-        
-        return results
     
-    async def _update_positions(self, positions: List[Dict[str, Any]], current_candle: Candle, 
-                              completed_trades: List[Dict[str, Any]]):
+    async def run_grid(self, stop_loss_pcts: List[float], take_profit_pcts: List[float],
+                       num_threads: Optional[int] = None) -> Dict[str, Any]:
         """
-        Actualiza el estado de las posiciones abiertas
+        Ejecuta el backtest para todas las combinaciones de stop loss y take profit
         
         Args:
-            positions: Lista de posiciones abiertas
-            current_candle: Vela actual
-            completed_trades: Lista de trades completados
+            stop_loss_pcts: Valores de stop loss a probar (0-100)
+            take_profit_pcts: Valores de take profit a probar (0-100)
+            num_threads: Hilos de Numba para recorrer la rejilla (por defecto, todos)
+            
+        Returns:
+            Diccionario con 'results': estadísticas de cada combinación, como run_backtest sin 'trades'
         """
-        positions_to_remove = []
-        
-        for position in positions:
-            # Comprobar si se alcanzó stop loss
-            if (position['direction'] == 'bullish' and current_candle.low <= position['stop_loss']) or \
-               (position['direction'] == 'bearish' and current_candle.high >= position['stop_loss']):
-                # Cerrar posición con stop loss
-                position['status'] = 'closed'
-                position['exit_price'] = position['stop_loss']
-                position['exit_time'] = current_candle.timestamp
-                
-                # Calcular P/L
-                pl = self._calculate_profit_loss(
-                    position['entry_price'],
-                    position['exit_price'],
-                    position['direction'],
-                    position['size']
-                )
-                
-                position['profit_loss'] = pl
-                position['profit_loss_pct'] = (pl / (position['entry_price'] * position['size'])) * 100
-                
-                # Añadir a trades completados
-                completed_trades.append(position)
-                positions_to_remove.append(position)
+        logger.info(f"Ejecutando rejilla de {len(stop_loss_pcts) * len(take_profit_pcts)} backtests "
+                    f"para {self.symbol} en {self.timeframe}")
+        
+        try:
+            # Obtener datos históricos
+            candles = await self._load_candles()
             
-            # Comprobar si se alcanzó take profit
-            elif (position['direction'] == 'bullish' and current_candle.high >= position['take_profit']) or \
-                 (position['direction'] == 'bearish' and current_candle.low <= position['take_profit']):
-                # Cerrar posición con take profit
-                position['status'] = 'closed'
-                position['exit_price'] = position['take_profit']
-                position['exit_time'] = current_candle.timestamp
-                
-                # Calcular P/L
-                pl = self._calculate_profit_loss(
-                    position['entry_price'],
-                    position['exit_price'],
-                    position['direction'],
-                    position['size']
-                )
-                
-                position['profit_loss'] = pl
-                position['profit_loss_pct'] = (pl / (position['entry_price'] * position['size'])) * 100
-                
-                # Añadir a trades completados
-                completed_trades.append(position)
-                positions_to_remove.append(position)
+            if not candles:
+                logger.error(f"No se pudieron obtener datos históricos para {self.symbol}")
+                return {"error": "No se pudieron obtener datos históricos"}
+            
+            if num_threads:
+                set_num_threads(num_threads)
+            
+            return {"results": await self._simulate_grid(candles, stop_loss_pcts, take_profit_pcts)}
         
-        # Eliminar posiciones cerradas
-        for position in positions_to_remove:
-            positions.remove(position)
+        except Exception as e:
+            logger.error(f"Error en la rejilla de backtests: {e}")
+            return {"error": str(e)}
     
-    def _calculate_position_size(self, balance: float, price: float, risk_pct: float, stop_loss_pct: float) -> float:
+    async def _simulate_grid(self, candles: List[Candle], stop_loss_pcts: List[float],
+                             take_profit_pcts: List[float]) -> List[Dict[str, Any]]:
         """
-        Calcula el tamaño de posición basado en riesgo
+        Simula la rejilla de parámetros: los patrones se detectan una sola vez y cada combinación
+        se simula en paralelo con el mismo modelo que _simulate_trading
         
         Args:
-            balance: Balance actual
-            price: Precio de entrada
-            risk_pct: Porcentaje de riesgo (0-1)
-            stop_loss_pct: Porcentaje de stop loss (0-100)
+            candles: Lista de velas históricas
+            stop_loss_pcts: Valores de stop loss (0-100)
+            take_profit_pcts: Valores de take profit (0-100)
             
         Returns:
-            Tamaño de posición
+            Estadísticas de cada combinación (stop_loss_pct, take_profit_pct)
         """
-        risk_amount = balance * risk_pct
-        stop_loss_amount = price * (stop_loss_pct / 100)
+        timestamps, opens, highs, lows, closes = _candles_to_soa(candles)
+        risk_amount = self.initial_capital * self.risk_per_trade
         
-        if stop_loss_amount <= 0:
-            return 0
+        # Señales por vela en formato CSR: direcciones de signal_signs[offsets[i]:offsets[i + 1]]
+        if risk_amount >= self.min_notional:
+            all_patterns = await self.pattern_detector.detect_patterns_batched(
+                opens, highs, lows, closes, LOOKBACK, candles=candles, min_success_rate=self.min_success_rate
+            )
+        else:
+            all_patterns = [[] for _ in range(len(candles))]
+        signs = [[1 if hit.direction == 'bullish' else -1 for hit in hits
+                  if hit.direction in ('bullish', 'bearish')] for hits in all_patterns]
+        signal_offsets = np.zeros(len(candles) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in signs], out=signal_offsets[1:])
+        signal_signs = np.fromiter((v for s in signs for v in s), dtype=np.int8, count=int(signal_offsets[-1]))
         
-        return risk_amount / stop_loss_amount
-    
-    def _calculate_stop_loss(self, price: float, direction: str, stop_loss_pct: float) -> float:
-        """
-        Calcula el nivel de stop loss
+        sl_grid, tp_grid = np.meshgrid(np.asarray(stop_loss_pcts, dtype=float),
+                                       np.asarray(take_profit_pcts, dtype=float), indexing='ij')
+        sl_grid, tp_grid = sl_grid.ravel(), tp_grid.ravel()
+        trades, winning, losing, profit, loss = grid_kernel(
+            highs, lows, closes, LOOKBACK, sl_grid / 100, tp_grid / 100, risk_amount, self.min_notional,
+            signal_offsets, signal_signs
+        )
         
-        Args:
-            price: Precio de entrada
-            direction: Dirección de la posición ('bullish' o 'bearish')
-            stop_loss_pct: Porcentaje de stop loss (0-100)
-            
-        Returns:
-            Nivel de stop loss
-        """
-        if direction == 'bullish':
-            return price * (1 - stop_loss_pct / 100)
-        else:  # bearish
-            return price * (1 + stop_loss_pct / 100)
+        results = []
+        for k in range(len(sl_grid)):
+            result = self._build_results(
+                self.initial_capital + (float(profit[k]) - float(loss[k])), int(trades[k]),
+                int(winning[k]), int(losing[k]), float(profit[k]), float(loss[k])
+            )
+            result['stop_loss_pct'] = float(sl_grid[k])
+            result['take_profit_pct'] = float(tp_grid[k])
+            results.append(result)
+        return results
     
-    def _calculate_take_profit(self, price: float, direction: str, take_profit_pct: float) -> float:
+    async def _update_positions(self, positions: _PositionBook, high: float, low: float,
+                              timestamp: int, completed_trades: List[Dict[str, Any]]):
         """
-        Calcula el nivel de take profit
+        Actualiza el estado de las posiciones abiertas
         
         Args:
-            price: Precio de entrada
-            direction: Dirección de la posición ('bullish' o 'bearish')
-            take_profit_pct: Porcentaje de take profit (0-100)
-            
-        Returns:
-            Nivel de take profit
+            positions: Posiciones abiertas
+            high: Máximo de la vela actual
+            low: Mínimo de la vela actual
+            timestamp: Timestamp de la vela actual
+            completed_trades: Lista de trades completados
         """
-        if direction == 'bullish':
-            return price * (1 + take_profit_pct / 100)
-        else:  # bearish
-            return price * (1 - take_profit_pct / 100)
+        if not len(positions):
+            return
+        
+        # Comprobar stop loss / take profit de todas las posiciones en un solo bucle compilado
+        closed, exit_prices, pls = scan_exits(*positions.views(), low, high)
+        if closed.any():
+            completed_trades.extend(positions.close_mask(closed, exit_prices, pls, timestamp))
     
-    def _calculate_profit_loss(self, entry_price: float, exit_price: float, direction: str, size: float) -> float:
+    def _calculate_profit_loss(self, entry_price: float, exit_price: float, sign: float, size: float) -> float:
         """
         Calcula el beneficio/pérdida de una operación
         
         Args:
             entry_price: Precio de entrada
             exit_price: Precio de salida
-            direction: Dirección de la posición ('bullish' o 'bearish')
+            sign: Dirección de la posición (1.0 bullish, -1.0 bearish)
             size: Tamaño de la posición
             
         Returns:
             Beneficio/pérdida
         """
-        if direction == 'bullish':
-            return (exit_price - entry_price) * size
-        else:  # bearish
-            return (entry_price - exit_price) * size
+        return (exit_price - entry_price) * size * sign
@@ -1,6 +1,6 @@
 # core/pattern_detector.py
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, NamedTuple
 import numpy as np # type: ignore
 import talib # type: ignore
 from models.candle import Candle
@@ -8,6 +8,13 @@ from utils.database import PatternDatabase
 
 logger = logging.getLogger(__name__)
 
+class PatternHit(NamedTuple):
+    """Patrón detectado en una ventana (campos que usa el backtester)"""
+    id: str
+    name: str
+    direction: str
+    success_rate: float
+
 class PatternDetector:
     """Detector de patrones de velas con TA-Lib."""
 
@@ -51,7 +58,28 @@ class PatternDetector:
             highs = np.array([c.high for c in candles], dtype=float)
             lows = np.array([c.low for c in candles], dtype=float)
             closes = np.array([c.close for c in candles], dtype=float)
+        except Exception as e:
+            logger.error(f"Error general en detect_patterns: {e}")
+            return []
+        return await self.detect_patterns_arrays(opens, highs, lows, closes, candles=candles)
+
+    async def detect_patterns_arrays(self, opens, highs, lows, closes,
+                                     candles: Optional[List[Candle]] = None) -> List[Dict[str,Any]]:
+        """
+        Detecta patrones a partir de arrays OHLC (p. ej. vistas de la ventana del backtester)
+        
+        Args:
+            opens, highs, lows, closes: Arrays float64 de igual longitud
+            candles: Velas equivalentes, sólo para los patrones personalizados
             
+        Returns:
+            Lista de patrones detectados
+        """
+        if len(closes) < 10:  # Necesitamos suficientes velas para detectar patrones
+            logger.warning(f"No hay suficientes velas para detectar patrones: {len(closes)}")
+            return []
+        
+        try:
             # Verificar que los arrays tienen datos válidos
             if len(opens) == 0 or len(highs) == 0 or len(lows) == 0 or len(closes) == 0:
                 logger.warning("Arrays de datos vacíos para la detección de patrones")
@@ -72,7 +100,7 @@ class PatternDetector:
             
             # Buscar patrones personalizados en la base de datos
             try:
-                custom_patterns = await self._detect_custom_patterns(candles)
+                custom_patterns = await self._detect_custom_patterns(candles or [])
                 if custom_patterns:
                     results.extend(custom_patterns)
             except Exception as e:
@@ -84,6 +112,56 @@ class PatternDetector:
             logger.error(f"Error general en detect_patterns: {e}")
             return []
 
+    async def detect_patterns_batched(self, opens, highs, lows, closes, lookback: int,
+                                      candles: Optional[List[Candle]] = None,
+                                      min_success_rate: Optional[float] = None) -> List[List[PatternHit]]:
+        """
+        Detecta patrones en todas las ventanas [i - lookback, i] de una serie en una sola llamada
+        
+        Args:
+            opens, highs, lows, closes: Arrays float64 de la serie completa
+            lookback: Velas previas incluidas en cada ventana
+            candles: Velas equivalentes, sólo para los patrones personalizados
+            min_success_rate: Si se indica, sólo se devuelven patrones con success_rate >= este valor
+            
+        Returns:
+            Lista de longitud len(closes): en la posición i, los patrones (PatternHit) de la ventana
+            que termina en i (vacía para i < lookback)
+        """
+        n = len(closes)
+        all_patterns = [[] for _ in range(n)]
+        if lookback + 1 < 10:  # Necesitamos suficientes velas para detectar patrones
+            logger.warning(f"No hay suficientes velas para detectar patrones: {lookback + 1}")
+            return all_patterns
+        
+        # Las funciones CDL de TA-Lib mantienen sumas móviles cuyo redondeo depende del inicio
+        # de la serie: se evalúa cada ventana (slices sin copia) para obtener lo mismo que
+        # detect_patterns sobre esa ventana
+        detect_funcs = list(self.pattern_functions.items())
+        for i in range(lookback, n):
+            window = slice(i - lookback, i + 1)
+            results = []
+            for pattern_name, (pattern_label, detect_func) in detect_funcs:
+                try:
+                    results.extend(detect_func(opens[window], highs[window], lows[window], closes[window]))
+                except Exception as e:
+                    logger.error(f"Error al detectar patrón {pattern_name}: {e}")
+            
+            # Buscar patrones personalizados en la base de datos
+            try:
+                results.extend(await self._detect_custom_patterns(candles[window] if candles is not None else []))
+            except Exception as e:
+                logger.error(f"Error al detectar patrones personalizados: {e}")
+            
+            hits = [PatternHit(pattern.get('id', ''), pattern.get('name', ''), pattern.get('direction', 'neutral'),
+                               pattern.get('success_rate', 0)) for pattern in results]
+            if min_success_rate is not None:
+                hits = [hit for hit in hits if hit.success_rate >= min_success_rate]
+            all_patterns[i] = hits
+        
+        logger.info(f"Total de patrones detectados en {max(n - lookback, 0)} ventanas: "
+                    f"{sum(len(results) for results in all_patterns)}")
+        return all_patterns
             
     def _detect_doji(self, opens, highs, lows, closes) -> List[Dict[str, Any]]:
         """Detecta patrones Doji"""
@@ -196,7 +274,7 @@ class PatternDetector:
             return []
         
         # Buscar todos los índices donde se detectó el patrón
-        for i in range(len(pattern_result)):
+        for i in np.flatnonzero(pattern_result).tolist():
             # Asegurarse de que estamos comparando valores numéricos
             value = pattern_result[i]
             if not isinstance(value, (int, float, np.integer, np.floating)):
@@ -6,6 +6,8 @@ from datetime import datetime
 @dataclass
 class Candle:
     """Clase para representar una vela de trading"""
+    __slots__ = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+    
     timestamp: int
     open: float
     high: float
@@ -85,6 +85,311 @@ class TestIndicators(unittest.TestCase):
         self.assertIn('STOCHk', df_with_indicators.columns)
         self.assertIn('STOCHd', df_with_indicators.columns)
 
+def _ohlcv_frame(n, seed=0):
+    """Velas aleatorias con índice temporal de 1 minuto."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'open': close + rng.normal(0, 0.3, n),
+        'high': close + rng.random(n),
+        'low': close - rng.random(n),
+        'close': close,
+        'volume': rng.random(n) * 10,
+    }, index=pd.date_range('2024-01-01', periods=n, freq='min'))
+
+class TestIndicatorKernels(unittest.TestCase):
+    def test_add_indicators_flat_window(self):
+        from bot import indicators # Importar solo lo necesario
+        # Últimas 20 velas planas (high == low == close): %K indefinido, no ZeroDivisionError
+        df = _ohlcv_frame(300)
+        flat = df['close'].iloc[-21]
+        df.iloc[-20:] = [flat, flat, flat, flat, 1.0]
+
+        out = indicators.add_indicators(df)
+
+        self.assertTrue(out['STOCHk'].iloc[-5:].isna().all())
+        self.assertTrue(out['STOCHd'].iloc[-5:].isna().all())
+        # Antes de la ventana plana los valores siguen definidos
+        self.assertTrue(out['STOCHk'].iloc[-40:-34].notna().all())
+        self.assertTrue(out['STOCHd'].iloc[-40:-34].notna().all())
+
+    def test_add_indicators_cache_key(self):
+        from bot import indicators, config # Importar solo lo necesario
+        df = _ohlcv_frame(300)
+        first = indicators.add_indicators(df)['RSI'].iloc[-1]
+
+        # Cambio de periodo (barrido de parámetros): se recalcula, no se sirve la caché
+        with patch.object(config, 'RSI_PERIOD', 5):
+            swept = indicators.add_indicators(df)['RSI'].iloc[-1]
+            indicators._indicator_cache.clear()
+            self.assertAlmostEqual(swept, indicators.add_indicators(df)['RSI'].iloc[-1])
+        self.assertNotAlmostEqual(first, swept)
+
+        # Mismos extremos y última vela, distinta vela intermedia
+        changed = df.copy()
+        changed.iloc[-10, changed.columns.get_loc('close')] += 5.0
+        self.assertNotAlmostEqual(indicators.add_indicators(changed)['RSI'].iloc[-1], first)
+        self.assertAlmostEqual(indicators.add_indicators(df)['RSI'].iloc[-1], first)
+
+class TestIncrementalIndicators(unittest.TestCase):
+    def test_update_indicators_matches_full_recompute(self):
+        from bot import indicators, indicators_state # Importar solo lo necesario
+        import numpy as np
+        full = _ohlcv_frame(400, seed=1)
+        window = 250
+        columns = ['RSI', 'STOCHk', 'STOCHd', 'MACD', 'macd_signal', 'EMA_fast', 'SMA_slow',
+                   'SMA_trend', 'Volume_MA', 'ema_50', 'ema_200']
+        pair = 'TEST/INCREMENTAL'
+        indicators_state._states.pop(pair, None)
+
+        for end in range(window, len(full) + 1):
+            df = full.iloc[max(0, end - window):end]
+            if end % 5 == 0:
+                # Vela aún abierta: primero llega con otro cierre y luego con el definitivo
+                open_candle = df.copy()
+                open_candle.iloc[-1, open_candle.columns.get_loc('close')] *= 1.01
+                indicators_state.update_indicators(pair, open_candle)
+            candles = indicators_state.update_indicators(pair, df)
+
+            expected = indicators.add_indicators(full.iloc[:end]).iloc[-1]
+            actual = [candles.column(col)[-1] for col in columns]
+            np.testing.assert_allclose(actual, expected[columns].to_numpy(dtype=float),
+                                       rtol=1e-6, atol=1e-6, equal_nan=True, err_msg=f"vela {end}")
+        self.assertEqual(indicators_state.frame(pair, 1).index[-1], full.index[-1])
+        indicators_state._states.pop(pair, None)
+
+    def test_update_indicators_growing_window_seeds_once(self):
+        from bot import indicators, indicators_state # Importar solo lo necesario
+        import numpy as np
+        full = _ohlcv_frame(400, seed=2)
+        pair = 'TEST/GROWING'
+        indicators_state._states.pop(pair, None)
+
+        # Como ohlc_cache.get_history tras un arranque en frío: la ventana crece una vela por ciclo
+        with patch.object(indicators_state, '_seed', wraps=indicators_state._seed) as seed:
+            for end in range(250, len(full) + 1):
+                candles = indicators_state.update_indicators(pair, full.iloc[:end])
+        self.assertEqual(seed.call_count, 1)
+
+        expected = indicators.add_indicators(full).iloc[-1]
+        np.testing.assert_allclose([candles.column(col)[-1] for col in ('RSI', 'MACD', 'SMA_trend')],
+                                   expected[['RSI', 'MACD', 'SMA_trend']].to_numpy(dtype=float), rtol=1e-6)
+        self.assertEqual(len(candles), len(full))
+        indicators_state._states.pop(pair, None)
+
+def _signal_frame(n=600, seed=4):
+    """Velas aleatorias con indicadores y picos de volumen (para que haya señales de todos los tipos)."""
+    import numpy as np
+    from bot import indicators # Importar solo lo necesario
+    df = _ohlcv_frame(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    df.loc[rng.random(n) < 0.15, 'volume'] *= 6
+    return indicators.add_indicators(df)
+
+def _expected_signal(score, threshold, has_level_break=True):
+    """Estado del semáforo que corresponde a un score (regla común de las funciones check_*)."""
+    from bot import strategies # Importar solo lo necesario
+    if has_level_break and score >= threshold:
+        return strategies.SIGNAL_GREEN
+    if has_level_break and score > 0:
+        return strategies.SIGNAL_RED
+    return strategies.SIGNAL_NONE
+
+def _assert_signal(test, signal, expected_status, score, total, msg):
+    """Comprueba estado y score (los detalles de VERDE y ROJO incluyen "(score/total)")."""
+    from bot import strategies # Importar solo lo necesario
+    status, details = signal
+    test.assertEqual(status, expected_status, msg)
+    if status == strategies.SIGNAL_GREEN:
+        test.assertIn(f"({score}/{total})", details['details'], msg)
+    elif status == strategies.SIGNAL_RED:
+        test.assertIn(f"({score}/{total})", details, msg)
+
+class TestSignalKernels(unittest.TestCase):
+    def test_long_signals_match_reference(self):
+        from bot import strategies, config # Importar solo lo necesario
+        df = _signal_frame()
+        lookback = config.BREAKOUT_LOOKBACK_PERIOD
+        statuses = set()
+
+        for end in range(250, len(df) + 1):
+            window = df.iloc[:end]
+            prev, last = window.iloc[-2], window.iloc[-1]
+
+            # Criterios de Reversión Alcista evaluados fila a fila (versión original sin kernels)
+            total_range = last['high'] - last['low']
+            lower_wick = min(last['open'], last['close']) - last['low']
+            is_bullish_candle = last['close'] > last['open']
+            is_engulfing = is_bullish_candle and prev['close'] < prev['open'] and \
+                last['close'] > prev['open'] and last['open'] < prev['close']
+            has_lower_wick = total_range > 0 and lower_wick / total_range > 0.3
+            score = sum([
+                last['close'] < prev['EMA_fast'] and last['close'] < prev['SMA_slow'],
+                is_bullish_candle and (is_engulfing or has_lower_wick),
+                last['volume'] > last['Volume_MA'] * 1.1,
+                last['RSI'] < config.RSI_OVERSOLD
+                or (last['STOCHk'] < config.STOCH_OVERSOLD and last['STOCHd'] < config.STOCH_OVERSOLD)
+                or (last['low'] < prev['low'] and last['RSI'] > prev['RSI']),
+            ])
+            expected = _expected_signal(score, config.REVERSAL_CONFIDENCE_THRESHOLD)
+            signal = strategies.check_reversal_signal(window)
+            _assert_signal(self, signal, expected, score, 5, f"reversal, vela {end}")
+            statuses.add(('reversal', expected))
+
+            # Criterios de Rotura Alcista sobre el lookback
+            lookback_candles = window.iloc[-(lookback + 1):-1]
+            consolidation_high = lookback_candles['high'].max()
+            is_breakout_candle = last['close'] > consolidation_high
+            score = sum([
+                is_breakout_candle,
+                True, # Volumen seco (placeholder)
+                last['volume'] > lookback_candles['volume'].mean() * config.BREAKOUT_VOLUME_FACTOR,
+                last['close'] > last['SMA_trend'],
+                last['RSI'] < 85,
+            ])
+            expected = _expected_signal(score, config.REVERSAL_CONFIDENCE_THRESHOLD, is_breakout_candle)
+            signal = strategies.check_breakout_signal(window)
+            _assert_signal(self, signal, expected, score, 6, f"breakout, vela {end}")
+            if expected == strategies.SIGNAL_GREEN:
+                self.assertAlmostEqual(signal[1]['stop_loss'], consolidation_high * (1 - 0.001))
+            statuses.add(('breakout', expected))
+
+        # La serie recorre los tres estados de ambas señales
+        for kind in ('reversal', 'breakout'):
+            for status in (strategies.SIGNAL_GREEN, strategies.SIGNAL_RED, strategies.SIGNAL_NONE):
+                self.assertIn((kind, status), statuses)
+
+    def test_short_signals_match_reference(self):
+        from bot import strategies, config # Importar solo lo necesario
+        df = _signal_frame()
+        lookback = config.BREAKOUT_LOOKBACK_PERIOD
+        statuses = set()
+
+        for end in range(250, len(df) + 1):
+            window = df.iloc[:end]
+            prev, last = window.iloc[-2], window.iloc[-1]
+
+            # Criterios de Reversión Bajista evaluados fila a fila (versión original sin kernels)
+            total_range = last['high'] - last['low']
+            upper_wick = last['high'] - max(last['open'], last['close'])
+            is_bearish_candle = last['close'] < last['open']
+            is_engulfing = is_bearish_candle and prev['close'] > prev['open'] and \
+                last['close'] < prev['open'] and last['open'] > prev['close']
+            has_upper_wick = total_range > 0 and upper_wick / total_range > 0.3
+            score = sum([
+                last['close'] > prev['EMA_fast'] and last['close'] > prev['SMA_slow'],
+                is_bearish_candle and (is_engulfing or has_upper_wick),
+                last['volume'] > last['Volume_MA'] * 1.1,
+                last['RSI'] > config.RSI_OVERBOUGHT
+                or (last['STOCHk'] > config.STOCH_OVERBOUGHT and last['STOCHd'] > config.STOCH_OVERBOUGHT)
+                or (last['high'] > prev['high'] and last['RSI'] < prev['RSI']),
+            ])
+            expected = _expected_signal(score, config.REVERSAL_CONFIDENCE_THRESHOLD)
+            signal = strategies.check_reversal_signal_short(window)
+            _assert_signal(self, signal, expected, score, 5, f"reversal short, vela {end}")
+            statuses.add(('reversal_short', expected))
+
+            # Criterios de Rotura Bajista sobre el lookback
+            lookback_candles = window.iloc[-(lookback + 1):-1]
+            consolidation_low = lookback_candles['low'].min()
+            is_breakdown_candle = last['close'] < consolidation_low
+            score = sum([
+                is_breakdown_candle,
+                True, # Volumen seco (placeholder)
+                last['volume'] > lookback_candles['volume'].mean() * config.BREAKOUT_VOLUME_FACTOR,
+                last['close'] < last['SMA_trend'],
+                last['RSI'] > 20,
+            ])
+            expected = _expected_signal(score, config.REVERSAL_CONFIDENCE_THRESHOLD, is_breakdown_candle)
+            signal = strategies.check_breakout_signal_short(window)
+            _assert_signal(self, signal, expected, score, 6, f"breakout short, vela {end}")
+            if expected == strategies.SIGNAL_GREEN:
+                self.assertAlmostEqual(signal[1]['stop_loss'], consolidation_low * (1 + 0.001))
+            statuses.add(('breakout_short', expected))
+
+        for kind in ('reversal_short', 'breakout_short'):
+            for status in (strategies.SIGNAL_GREEN, strategies.SIGNAL_RED, strategies.SIGNAL_NONE):
+                self.assertIn((kind, status), statuses)
+
+    def test_streaming_breakout_levels_match_batch(self):
+        from bot import strategies, config # Importar solo lo necesario
+        import numpy as np
+        df = _ohlcv_frame(400, seed=3)
+        df.iloc[150, df.columns.get_loc('volume')] = np.nan # Volumen NaN: NaN mientras esté en el lookback
+        lookback = config.BREAKOUT_LOOKBACK_PERIOD
+        pair = 'TEST/BREAKOUT'
+        strategies._breakout_states.pop(pair, None)
+
+        # Pasos de una vela, vela repetida (en curso), huecos menor y mayor que el lookback,
+        # retroceso (datos reiniciados) y el tramo con el volumen NaN
+        ends = list(range(60, 80)) + [80, 80, 85, 85 + lookback + 5, 70] + list(range(71, 400))
+        for end in ends:
+            window = df.iloc[max(0, end - 100):end]
+            levels = strategies.update_breakout_levels(pair, window)
+            expected = strategies.breakout_levels(window['high'].to_numpy(), window['low'].to_numpy(),
+                                                  window['volume'].to_numpy())
+            np.testing.assert_allclose([levels['high'], levels['low'], levels['volume_mean']],
+                                       [expected['high'][-1], expected['low'][-1], expected['volume_mean'][-1]],
+                                       rtol=1e-9, equal_nan=True, err_msg=f"vela {end}")
+        self.assertTrue(np.isnan(strategies.update_breakout_levels(pair, df.iloc[:160])['volume_mean']))
+        strategies._breakout_states.pop(pair, None)
+
+    def test_polars_frames_match_pandas(self):
+        try:
+            import polars as pl
+        except ImportError:
+            self.skipTest("polars no instalado (dependencia opcional)")
+        from bot import strategies # Importar solo lo necesario
+        df = _signal_frame()
+        gpt_result = {'direction': 'bullish', 'confidence': 70}
+
+        for end in range(250, len(df) + 1, 7):
+            window = df.iloc[:end]
+            polars_window = pl.from_pandas(window)
+            self.assertEqual(strategies.evaluate_all_signals(polars_window),
+                             strategies.evaluate_all_signals(window), f"vela {end}")
+            self.assertEqual(strategies.decision_engine('BTC/USD', polars_window, gpt_result),
+                             strategies.decision_engine('BTC/USD', window, gpt_result), f"vela {end}")
+
+    def test_scan_reversal_signals_matches_per_symbol(self):
+        from bot import strategies # Importar solo lo necesario
+        df = _signal_frame()
+        # Un "símbolo" por ventana, más uno sin datos y otro con muy pocas velas
+        symbol_frames = {f"SYM{end}/USD": df.iloc[:end] for end in range(250, len(df) + 1)}
+        symbol_frames['NONE/USD'] = None
+        symbol_frames['SHORT/USD'] = df.iloc[:1]
+        expected = {symbol: strategies.check_reversal_signal(frame) for symbol, frame in symbol_frames.items()}
+        self.assertEqual({status for status, _ in expected.values()},
+                         {strategies.SIGNAL_GREEN, strategies.SIGNAL_RED, strategies.SIGNAL_NONE})
+
+        # Kernel paralelo (prange) si hay Numba; pool de procesos sin Numba
+        paths = [(True, None), (False, 2)] if strategies.NUMBA_AVAILABLE else [(False, 2)]
+        for numba_available, max_workers in paths:
+            with patch.object(strategies, 'NUMBA_AVAILABLE', numba_available):
+                results = strategies.scan_reversal_signals(symbol_frames, max_workers=max_workers)
+            self.assertEqual(list(results), list(symbol_frames))
+            self.assertEqual(results, expected, f"NUMBA_AVAILABLE={numba_available}")
+
+class TestScoring(unittest.TestCase):
+    @patch('bot.risk_manager.analyze_symbol')
+    def test_weighted_score_sentiment_per_symbol_and_candle(self, mock_analyze_symbol):
+        from bot import scoring, risk_manager, indicators, config # Importar solo lo necesario
+        mock_analyze_symbol.side_effect = lambda symbol: (
+            {"direction": "bullish", "confidence": 80} if symbol == 'AAA/USD' else {"direction": "bearish", "confidence": 50})
+        risk_manager._sentiment.cache_clear()
+        df = indicators.add_indicators(_ohlcv_frame(300))
+
+        score_a, weighted_a = scoring.calculate_weighted_score(df, 'AAA/USD')
+        scoring.calculate_weighted_score(df, 'AAA/USD') # Misma vela: sin nueva consulta
+        score_b, weighted_b = scoring.calculate_weighted_score(df, 'BBB/USD')
+
+        self.assertEqual([call[0][0] for call in mock_analyze_symbol.call_args_list], ['AAA/USD', 'BBB/USD'])
+        self.assertAlmostEqual(weighted_a['gpt_sentiment'], 0.8 * config.GPT_SENTIMENT_WEIGHT)
+        self.assertAlmostEqual(weighted_b['gpt_sentiment'], -0.5 * config.GPT_SENTIMENT_WEIGHT)
+        self.assertAlmostEqual(score_a - score_b, 1.3 * config.GPT_SENTIMENT_WEIGHT)
+        risk_manager._sentiment.cache_clear()
+
 @patch('bot.risk_manager.kraken_api.get_historical_data')
 class TestRiskManager(unittest.TestCase):
     def test_calculate_position_size(self,mock_get_historical_data):
@@ -108,6 +413,23 @@ class TestRiskManager(unittest.TestCase):
         # Verificar que el tamaño de la posición es el esperado
         self.assertAlmostEqual(position_size, 0.2, places=4)  # Ajustar la precisión según sea necesario
 
+    def test_adjusted_risk_matches_chained_helpers(self, mock_get_historical_data):
+        from bot import risk_manager # Importar solo lo necesario
+        sentiments = [{"direction": "bullish", "confidence": 80}, {"direction": "bearish", "confidence": 30},
+                      {"direction": "neutral", "confidence": 90}, {"direction": "Bearish", "confidence": 100}]
+        # Riesgo base por debajo y por encima de MAX_RISK_PER_TRADE (el tope sólo aplica al alcista)
+        for base_risk in (0.01, 0.03):
+            for atr_value in (1.0, 3.0): # Media 1.5: volatilidad normal y alta
+                for drawdown in (0.0, 0.05, 0.5):
+                    for sentiment in sentiments:
+                        with patch.object(risk_manager, '_RISK_PER_TRADE', base_risk), \
+                                patch.object(risk_manager, 'analyze_symbol', return_value=sentiment):
+                            fused = risk_manager.adjusted_risk(atr_value, 1.5, drawdown, sentiment)
+                            chained = risk_manager.adjust_risk_for_volatility(base_risk, atr_value, 1.5)
+                            chained = risk_manager.adjust_risk_for_drawdown(chained, drawdown, risk_manager._MAX_DRAWDOWN)
+                            chained = risk_manager.adjust_risk_for_gpt_sentiment(chained, 'BTC/USD')
+                        self.assertEqual(fused, chained, f"{base_risk}, {atr_value}, {drawdown}, {sentiment}")
+
 @patch('bot.kraken_api.kraken.query_public')
 class TestKrakenAPI(unittest.TestCase):
     def test_get_ticker_info(self, mock_query_public):
@@ -124,13 +446,270 @@ class TestKrakenAPI(unittest.TestCase):
         #self.assertEqual(ticker_info['ask'], 40000.00)
         print("Test get_ticker_info ejecutado") # Añadir para verificar que se ejecuta
 
+def _ohlc_response(start, n, interval=60):
+    """Respuesta OHLC de Kraken con n velas desde start."""
+    rows = [[start + interval * i, '100.0', '101.0', '99.0', '100.5', '100.2', '10.0', 5] for i in range(n)]
+    return {'error': [], 'result': {'XXBTZUSD': rows, 'last': start + interval * (n - 1)}}
+
+@patch('bot.kraken_api.canonical_pair', return_value='XXBTZUSD')
+@patch('bot.kraken_api.query_public')
+class TestKrakenHistoricalData(unittest.TestCase):
+    def test_get_historical_data_config_timeframe(self, mock_query_public, mock_canonical_pair):
+        from bot import kraken_api, config # Importar solo lo necesario
+        mock_query_public.return_value = _ohlc_response(1700000000, 5)
+
+        # config.TIMEFRAME es un str: debe aceptarse igual que un int
+        df, last = kraken_api.get_historical_data(config.TRADING_PAIR, config.TIMEFRAME)
+
+        self.assertEqual(len(df), 5)
+        self.assertEqual(last, 1700000240)
+        self.assertEqual(mock_query_public.call_args[0][1]['interval'], int(config.TIMEFRAME))
+
+class TestOhlcCache(unittest.TestCase):
+    def test_get_history_discards_cache_on_gap(self):
+        from bot import ohlc_cache, config # Importar solo lo necesario
+        import tempfile
+        pair, interval = 'TEST/GAP', 1
+        cached = _ohlcv_frame(100)
+        # Delta posterior a una parada de más de 720 velas: no empalma con la caché
+        fresh = _ohlcv_frame(720, seed=1)
+        fresh.index = fresh.index + pd.Timedelta(days=2)
+        ohlc_cache._memory_cache[(pair, interval)] = cached
+
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                patch.object(config, 'OHLC_CACHE_DIR', cache_dir), \
+                patch('bot.kraken_api.get_historical_data', return_value=(fresh, 12345)):
+            df, last = ohlc_cache.get_history(pair, interval)
+        ohlc_cache._memory_cache.pop((pair, interval), None)
+
+        self.assertEqual(last, 12345)
+        self.assertTrue(df.index.equals(fresh.index))
+
+class TestRetry(unittest.TestCase):
+    def test_circuit_breaker_counts_calls_per_function(self):
+        from bot import utils, config # Importar solo lo necesario
+        attempts = []
+
+        @utils.retry(max_attempts=5, initial_delay=0)
+        def failing_call():
+            attempts.append(1)
+            raise ValueError("fallo")
+
+        @utils.retry(max_attempts=5, initial_delay=0)
+        def healthy_call():
+            return "ok"
+
+        # Cada llamada agota sus 5 intentos antes de contar un fallo para el circuito
+        for _ in range(config.CIRCUIT_BREAKER_THRESHOLD):
+            with self.assertRaises(ValueError):
+                failing_call()
+        self.assertEqual(len(attempts), 5 * config.CIRCUIT_BREAKER_THRESHOLD)
+
+        with self.assertRaises(utils.CircuitOpenError):
+            failing_call()
+        # El circuito abierto de una función no bloquea a las demás
+        self.assertEqual(healthy_call(), "ok")
+
+class _FakeClock:
+    """Sustituye al módulo time en bot.ratelimit: sleep avanza el reloj y se registra."""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = _FakeClock()
+        patcher = patch('bot.ratelimit.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tier_capacity_and_refill(self):
+        from bot import ratelimit # Importar solo lo necesario
+        bucket = ratelimit.TokenBucket.for_tier('starter') # 15 llamadas, -1 cada 3 s
+        for _ in range(15):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+        bucket.acquire() # Contador lleno: espera a recuperar un token
+        self.assertAlmostEqual(sum(self.clock.sleeps), 3.0)
+        self.clock.now += 30.0 # 10 tokens recuperados
+        for _ in range(10):
+            bucket.acquire()
+        self.assertAlmostEqual(sum(self.clock.sleeps), 3.0)
+
+        # Coste mayor que la capacidad: se limita a la capacidad (espera a vaciar el contador, no para siempre)
+        bucket.acquire(cost=100)
+        self.assertAlmostEqual(sum(self.clock.sleeps), 3.0 + 15 * 3.0)
+        self.assertEqual(ratelimit.TokenBucket.for_tier('desconocido').capacity, 15) # Nivel por defecto
+
+    def test_endpoint_costs_and_cooldown(self):
+        from bot import kraken_api, ratelimit, config # Importar solo lo necesario
+        bucket = ratelimit.TokenBucket(capacity=4, refill_rate=1.0)
+        ok = lambda method, data: {'error': []}
+        with patch.object(kraken_api, '_rate_limiter', bucket):
+            kraken_api._throttled_query(ok, 'TradesHistory') # Coste 2
+            kraken_api._throttled_query(ok, 'Ledgers') # Coste 2
+            for _ in range(3):
+                kraken_api._throttled_query(ok, 'AddOrder') # Las órdenes no consumen
+                kraken_api._throttled_query(ok, 'CancelOrder')
+            self.assertEqual(self.clock.sleeps, [])
+            kraken_api._throttled_query(ok, 'Ticker') # Coste 1 con el contador lleno
+            self.assertAlmostEqual(sum(self.clock.sleeps), 1.0)
+
+            # Error de rate limit: ninguna llamada con coste hasta pasar el cooldown
+            self.clock.now += 10.0
+            self.clock.sleeps.clear()
+            kraken_api._throttled_query(lambda method, data: {'error': ['EAPI:Rate limit exceeded']}, 'Ticker')
+            self.assertEqual(self.clock.sleeps, [])
+            kraken_api._throttled_query(ok, 'Ticker')
+            self.assertAlmostEqual(sum(self.clock.sleeps), config.RATE_LIMIT_COOLDOWN)
+
+class TestApi(unittest.TestCase):
+    def test_closed_trades_msgspec_matches_jsonify(self):
+        import importlib
+        import json
+        from api import models # Importar solo lo necesario
+        api_app = importlib.import_module('api.app') # 'from api import app' da el objeto Flask
+        client = api_app.app.test_client()
+
+        response = client.get('/api/trades/closed')
+        with patch('api.app.encode_trades', return_value=None): # Sin msgspec: jsonify
+            fallback = client.get('/api/trades/closed')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(fallback.mimetype, 'application/json')
+        # Mismos valores y orden de claves (msgspec escribe los precios enteros como float: 39500.0)
+        body, expected = json.loads(response.data), json.loads(fallback.data)
+        self.assertEqual(body, expected)
+        self.assertEqual([list(trade) for trade in body], [list(trade) for trade in expected])
+        if models.msgspec is not None:
+            self.assertEqual(response.data, models.encode_trades(expected))
+
+class TestBacktester(unittest.TestCase):
+    def test_compute_metrics(self):
+        from bot import backtester # Importar solo lo necesario
+        import numpy as np
+        pnls = np.array([100.0, -50.0, -80.0, 30.0, 200.0])
+
+        metrics = backtester.compute_metrics(pnls, initial_capital=1000.0)
+
+        self.assertAlmostEqual(metrics['net_pnl'], 200.0)
+        self.assertAlmostEqual(metrics['win_rate'], 60.0)
+        self.assertAlmostEqual(metrics['max_drawdown'], -130.0) # 1100 -> 970
+        self.assertGreater(metrics['sharpe'], 0)
+
+class _StubPatternDetector:
+    """Detector con señales fijas por vela (mismas para _simulate_trading y _simulate_grid)"""
+    def __init__(self, n, lookback, seed=0):
+        import random
+        from core.pattern_detector import PatternHit
+        rng = random.Random(seed)
+        self.hits = [[] for _ in range(n)]
+        for i in range(lookback, n):
+            for k in range(rng.choice([0, 0, 0, 1, 2])):
+                direction = rng.choice(['bullish', 'bearish', 'neutral'])
+                self.hits[i].append(PatternHit(f"p{i}_{k}", 'STUB', direction, 70))
+
+    async def detect_patterns_batched(self, opens, highs, lows, closes, lookback, candles=None,
+                                      min_success_rate=None):
+        return self.hits
+
+class TestCoreBacktester(unittest.TestCase):
+    def test_simulate_grid_matches_simulate_trading(self):
+        import asyncio
+        import random
+        from core import backtester # Importar solo lo necesario
+        from models.candle import Candle
+        rng = random.Random(1)
+        price, candles = 100.0, []
+        for i in range(400):
+            open_ = price
+            price += rng.gauss(0, 1)
+            candles.append(Candle(60000 * i, open_, max(open_, price) + rng.random(),
+                                  min(open_, price) - rng.random(), price, 1.0))
+        detector = _StubPatternDetector(len(candles), backtester.LOOKBACK)
+        stop_loss_pcts, take_profit_pcts = [0.0, 0.5, 1.0, 2.5], [1.0, 2.0, 4.0]
+
+        grid_bt = backtester.Backtester({})
+        grid_bt.pattern_detector = detector
+        grid = asyncio.run(grid_bt._simulate_grid(candles, stop_loss_pcts, take_profit_pcts))
+        self.assertEqual(len(grid), len(stop_loss_pcts) * len(take_profit_pcts))
+        self.assertTrue(any(result['total_trades'] > 0 for result in grid))
+
+        for result in grid:
+            config = {'backtest': {'stop_loss_pct': result['stop_loss_pct'],
+                                   'take_profit_pct': result['take_profit_pct']}}
+            single_bt = backtester.Backtester(config)
+            single_bt.pattern_detector = detector
+            expected = asyncio.run(single_bt._simulate_trading(candles))
+            expected.pop('trades')
+            actual = {k: v for k, v in result.items() if k not in ('stop_loss_pct', 'take_profit_pct')}
+            self.assertEqual(actual.keys(), expected.keys())
+            for key, value in expected.items():
+                self.assertAlmostEqual(actual[key], value, places=6, msg=f"{key} ({config['backtest']})")
+
+    def test_simulate_trading_trades(self):
+        import asyncio
+        from core import backtester # Importar solo lo necesario
+        from core.pattern_detector import PatternHit
+        from models.candle import Candle
+        # Velas planas en 100 (rango 99.5-100.5) salvo las que tocan los niveles de las entradas
+        lookback = backtester.LOOKBACK
+        highs = {lookback + 1: 102.5, lookback + 3: 101.5}
+        candles = [Candle(60000 * i, 100.0, highs.get(i, 100.5), 99.5, 100.0, 1.0) for i in range(lookback + 6)]
+        candles[-1] = Candle(candles[-1].timestamp, 100.0, 100.5, 99.5, 100.5, 1.0)
+        detector = _StubPatternDetector(len(candles), len(candles))
+        detector.hits[lookback] = [PatternHit('p1', 'STUB', 'bullish', 70)] # TP (102) en la vela siguiente
+        detector.hits[lookback + 2] = [PatternHit('p2', 'STUB', 'bearish', 70)] # SL (101) en la vela siguiente
+        detector.hits[lookback + 4] = [PatternHit('p3', 'STUB', 'bullish', 70)] # Abierta hasta el final
+
+        bt = backtester.Backtester({'backtest': {'stop_loss_pct': 1.0, 'take_profit_pct': 2.0}})
+        bt.pattern_detector = detector
+        result = asyncio.run(bt._simulate_trading(candles))
+
+        # Riesgo 20 (2% de 1000) con stop al 1% de 100: tamaño 20
+        trades = result['trades']
+        self.assertEqual([trade['pattern_id'] for trade in trades], ['p1', 'p2', 'p3'])
+        self.assertEqual([trade['exit_price'] for trade in trades], [102.0, 101.0, 100.5])
+        self.assertEqual([trade['exit_time'] for trade in trades],
+                         [candles[lookback + 1].timestamp, candles[lookback + 3].timestamp, candles[-1].timestamp])
+        for trade, pl in zip(trades, [40.0, -20.0, 10.0]):
+            self.assertAlmostEqual(trade['profit_loss'], pl)
+            self.assertAlmostEqual(trade['size'], 20.0)
+        self.assertEqual(set(trades[0]), {'id', 'pattern_id', 'pattern_name', 'entry_price', 'entry_time',
+                                          'direction', 'size', 'stop_loss', 'take_profit', 'status',
+                                          'exit_price', 'exit_time', 'profit_loss', 'profit_loss_pct'})
+        # Como en la versión original, las estadísticas y el balance sólo cuentan las posiciones
+        # cerradas al final del backtest
+        self.assertEqual((result['total_trades'], result['winning_trades'], result['losing_trades']), (3, 1, 0))
+        self.assertAlmostEqual(result['final_balance'], 1010.0)
+
 def run_all_tests():
     """Función para ejecutar todas las pruebas."""
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(TestStrategies))
     suite.addTest(unittest.makeSuite(TestIndicators))
+    suite.addTest(unittest.makeSuite(TestIndicatorKernels))
+    suite.addTest(unittest.makeSuite(TestIncrementalIndicators))
+    suite.addTest(unittest.makeSuite(TestSignalKernels))
+    suite.addTest(unittest.makeSuite(TestScoring))
     suite.addTest(unittest.makeSuite(TestRiskManager))
     suite.addTest(unittest.makeSuite(TestKrakenAPI))
+    suite.addTest(unittest.makeSuite(TestKrakenHistoricalData))
+    suite.addTest(unittest.makeSuite(TestOhlcCache))
+    suite.addTest(unittest.makeSuite(TestRetry))
+    suite.addTest(unittest.makeSuite(TestRateLimiter))
+    suite.addTest(unittest.makeSuite(TestApi))
+    suite.addTest(unittest.makeSuite(TestBacktester))
+    suite.addTest(unittest.makeSuite(TestCoreBacktester))
 
     runner = unittest.TextTestRunner()
     runner.run(suite)